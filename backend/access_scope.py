@@ -0,0 +1,132 @@
+"""
+교사 기록 접근 범위 (teacher_access_scopes)
+- teacher_assignments에서 (학년, 반, 과목) 범위를 미리 계산해 저장
+- NULL은 "전체": class_number NULL → 학년 전체, subject_id NULL → 모든 과목
+- 역할 배정을 바꾼 트랜잭션 안에서 refresh_teacher_access_scope() 호출 (commit은 호출자)
+"""
+from typing import Iterable
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# 역할 → 접근 범위
+# - 학년부장/생기부관리자: 학년 전체
+# - 담임/부담임: 학급 전체 과목
+# - 교과교사: 학급(없으면 학년)의 담당 과목
+_SCOPE_SELECT_ALL = """
+    SELECT DISTINCT
+        teacher_user_id,
+        school_year,
+        grade,
+        CASE WHEN role_type IN ('grade_head', 'record_manager') THEN NULL ELSE class_number END,
+        CASE WHEN role_type = 'subject_teacher' THEN subject_id ELSE NULL END
+    FROM teacher_assignments
+    WHERE school_year IS NOT NULL
+      AND grade IS NOT NULL
+      AND (
+          role_type IN ('grade_head', 'record_manager')
+          OR (role_type IN ('homeroom_teacher', 'assistant_homeroom') AND class_number IS NOT NULL)
+          OR (role_type = 'subject_teacher' AND subject_id IS NOT NULL)
+      )
+"""
+_SCOPE_SELECT = _SCOPE_SELECT_ALL + """
+      AND teacher_user_id = ANY(:teacher_user_ids)
+      AND school_year = :school_year
+"""
+
+# 기존 DB용 테이블 생성 (init.sql / migrations 0001과 같은 정의)
+_CREATE_SCOPE_TABLE = (
+    """
+    CREATE TABLE IF NOT EXISTS teacher_access_scopes (
+        id SERIAL PRIMARY KEY,
+        teacher_user_id VARCHAR(20) NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+        school_year INTEGER NOT NULL,
+        grade INTEGER NOT NULL,
+        class_number INTEGER,
+        subject_id INTEGER REFERENCES subjects(id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_tas_unique
+    ON teacher_access_scopes(
+        teacher_user_id,
+        school_year,
+        grade,
+        COALESCE(class_number, 0),
+        COALESCE(subject_id, 0)
+    )
+    """,
+)
+# 여러 워커가 동시에 시작해도 생성/백필은 한 번만 (pg_advisory_xact_lock 키)
+_SCOPE_TABLE_LOCK_ID = 7301301
+
+# 기록 r이 교사 :scope_user_id의 :school_year 접근 범위에 드는지 (records 쿼리의 WHERE에 붙여 사용)
+# - 범위 행(1~수 개)에서 출발해 idx_records_access_scope를 범위 검색하도록 IN + 등호/BETWEEN만 사용
+#   (EXISTS 안에 "IS NULL OR =" 조건을 쓰면 플래너가 records 전체를 해시 조인으로 훑음)
+# - NULL(전체)은 0 ~ INT 최댓값 구간으로 바꿔 비교, records.class_number NULL은 0으로 취급
+ACCESSIBLE_RECORD_CONDITION = """
+    r.id IN (
+        SELECT ar.id
+        FROM teacher_access_scopes tas
+        JOIN records ar
+          ON ar.school_year = tas.school_year
+         AND ar.grade = tas.grade
+         AND COALESCE(ar.class_number, 0)
+             BETWEEN COALESCE(tas.class_number, 0) AND COALESCE(tas.class_number, 2147483647)
+         AND ar.subject_id
+             BETWEEN COALESCE(tas.subject_id, 0) AND COALESCE(tas.subject_id, 2147483647)
+        WHERE tas.teacher_user_id = :scope_user_id
+          AND tas.school_year = :school_year
+    )
+"""
+
+
+def ensure_teacher_access_scopes(db: Session) -> bool:
+    """
+    teacher_access_scopes가 없으면 만들고 teacher_assignments에서 백필 (commit은 호출자)
+    - alembic upgrade 전의 기존 DB에서도 접근 범위 조회/배정 쓰기가 실패하지 않도록 워커 시작 시 호출
+    - 이미 있으면 아무것도 하지 않음
+
+    Returns:
+        새로 만들었으면 True
+    """
+    if db.execute(text("SELECT to_regclass('teacher_access_scopes') IS NOT NULL")).scalar():
+        return False
+    db.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": _SCOPE_TABLE_LOCK_ID})
+    # 락을 기다리는 동안 다른 워커가 만들었을 수 있음
+    if db.execute(text("SELECT to_regclass('teacher_access_scopes') IS NOT NULL")).scalar():
+        return False
+    for statement in _CREATE_SCOPE_TABLE:
+        db.execute(text(statement))
+    db.execute(
+        text(f"""
+            INSERT INTO teacher_access_scopes (teacher_user_id, school_year, grade, class_number, subject_id)
+            {_SCOPE_SELECT_ALL}
+            ON CONFLICT DO NOTHING
+        """)
+    )
+    return True
+
+
+def refresh_teacher_access_scope(db: Session, teacher_user_ids: Iterable[str], school_year: int):
+    """교사(들)의 해당 학년도 접근 범위를 teacher_assignments 기준으로 다시 계산"""
+    teacher_user_ids = sorted({str(t) for t in teacher_user_ids if t})
+    if not teacher_user_ids or school_year is None:
+        return
+    params = {"teacher_user_ids": teacher_user_ids, "school_year": school_year}
+    db.execute(
+        text("""
+            DELETE FROM teacher_access_scopes
+            WHERE teacher_user_id = ANY(:teacher_user_ids)
+              AND school_year = :school_year
+        """),
+        params
+    )
+    db.execute(
+        text(f"""
+            INSERT INTO teacher_access_scopes (teacher_user_id, school_year, grade, class_number, subject_id)
+            {_SCOPE_SELECT}
+            ON CONFLICT DO NOTHING
+        """),
+        params
+    )
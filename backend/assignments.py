@@ -68,64 +68,59 @@ async def assign_classes_to_subject(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     school_year = request.school_year or 2025
-    assigned_classes = 0
-    assigned_students = 0
     
     try:
-        for cls in request.classes:
-            # 1. 학급 배정
-            db.execute(
-                text("""
+        # 학급 배정 + 해당 학급 학생 배정을 한 문장으로
+        counts = db.execute(
+            text("""
+                WITH classes AS (
+                    SELECT DISTINCT grade, class_number
+                    FROM unnest(CAST(:grades AS INTEGER[]), CAST(:class_numbers AS INTEGER[])) AS c(grade, class_number)
+                ),
+                students AS (
+                    SELECT u.user_id FROM users u
+                    WHERE u.role = 'student'
+                    AND (u.grade, u.class_number) IN (SELECT grade, class_number FROM classes)
+                ),
+                inserted_classes AS (
                     INSERT INTO subject_class_assignments 
                     (subject_id, grade, class_number, school_year, created_by)
-                    VALUES (:subject_id, :grade, :class_number, :school_year, :created_by)
+                    SELECT :subject_id, grade, class_number, :school_year, :created_by FROM classes
                     ON CONFLICT (subject_id, grade, class_number, school_year) DO NOTHING
-                """),
-                {
-                    "subject_id": request.subject_id,
-                    "grade": cls.grade,
-                    "class_number": cls.class_number,
-                    "school_year": school_year,
-                    "created_by": current_user.user_id
-                }
-            )
-            assigned_classes += 1
-            
-            # 2. 해당 학급 학생들 조회
-            students = db.execute(
-                text("""
-                    SELECT user_id FROM users 
-                    WHERE role = 'student' 
-                    AND grade = :grade 
-                    AND class_number = :class_number
-                """),
-                {"grade": cls.grade, "class_number": cls.class_number}
-            ).fetchall()
-            
-            # 3. 학생들 배정
-            for student in students:
-                db.execute(
-                    text("""
-                        INSERT INTO subject_student_assignments 
-                        (subject_id, student_user_id, school_year, assigned_type, created_by)
-                        VALUES (:subject_id, :student_user_id, :school_year, 'class', :created_by)
-                        ON CONFLICT (subject_id, student_user_id, school_year) DO NOTHING
-                    """),
-                    {
-                        "subject_id": request.subject_id,
-                        "student_user_id": student.user_id,
-                        "school_year": school_year,
-                        "created_by": current_user.user_id
-                    }
+                    RETURNING 1
+                ),
+                inserted_students AS (
+                    INSERT INTO subject_student_assignments 
+                    (subject_id, student_user_id, school_year, assigned_type, created_by)
+                    SELECT :subject_id, user_id, :school_year, 'class', :created_by FROM students
+                    ON CONFLICT (subject_id, student_user_id, school_year) DO NOTHING
+                    RETURNING 1
                 )
-                assigned_students += 1
+                SELECT
+                    (SELECT COUNT(*) FROM students) AS matched_students,
+                    (SELECT COUNT(*) FROM inserted_classes) AS inserted_classes,
+                    (SELECT COUNT(*) FROM inserted_students) AS inserted_students
+            """),
+            {
+                "grades": [cls.grade for cls in request.classes],
+                "class_numbers": [cls.class_number for cls in request.classes],
+                "subject_id": request.subject_id,
+                "school_year": school_year,
+                "created_by": current_user.user_id
+            }
+        ).fetchone()
         
         db.commit()
+        assigned_classes = len(request.classes)
+        assigned_students = counts.matched_students
         return {
             "success": True,
             "message": f"{assigned_classes}개 학급, {assigned_students}명 학생 배정 완료",
             "assigned_classes": assigned_classes,
-            "assigned_students": assigned_students
+            "assigned_students": assigned_students,
+            # 이번 요청으로 새로 추가된 배정 (이미 있던 배정 제외)
+            "inserted_classes": counts.inserted_classes,
+            "inserted_students": counts.inserted_students
         }
     except Exception as e:
         db.rollback()
@@ -143,31 +138,32 @@ async def assign_students_to_subject(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     school_year = request.school_year or 2025
-    assigned_count = 0
     
     try:
-        for student_id in request.student_ids:
-            db.execute(
-                text("""
-                    INSERT INTO subject_student_assignments 
-                    (subject_id, student_user_id, school_year, assigned_type, created_by)
-                    VALUES (:subject_id, :student_user_id, :school_year, 'individual', :created_by)
-                    ON CONFLICT (subject_id, student_user_id, school_year) DO NOTHING
-                """),
-                {
-                    "subject_id": request.subject_id,
-                    "student_user_id": student_id,
-                    "school_year": school_year,
-                    "created_by": current_user.user_id
-                }
-            )
-            assigned_count += 1
+        result = db.execute(
+            text("""
+                INSERT INTO subject_student_assignments 
+                (subject_id, student_user_id, school_year, assigned_type, created_by)
+                SELECT :subject_id, student_user_id, :school_year, 'individual', :created_by
+                FROM unnest(CAST(:student_ids AS VARCHAR[])) AS s(student_user_id)
+                ON CONFLICT (subject_id, student_user_id, school_year) DO NOTHING
+            """),
+            {
+                "subject_id": request.subject_id,
+                "student_ids": request.student_ids,
+                "school_year": school_year,
+                "created_by": current_user.user_id
+            }
+        )
         
         db.commit()
+        assigned_count = len(request.student_ids)
         return {
             "success": True,
             "message": f"{assigned_count}명 학생 배정 완료",
-            "assigned_count": assigned_count
+            "assigned_count": assigned_count,
+            # 이번 요청으로 새로 추가된 배정 (이미 있던 배정 제외)
+            "inserted_count": result.rowcount
         }
     except Exception as e:
         db.rollback()
@@ -185,24 +181,22 @@ async def remove_students_from_subject(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     school_year = request.school_year or 2025
-    removed_count = 0
     
     try:
-        for student_id in request.student_ids:
-            result = db.execute(
-                text("""
-                    DELETE FROM subject_student_assignments 
-                    WHERE subject_id = :subject_id 
-                    AND student_user_id = :student_user_id 
-                    AND school_year = :school_year
-                """),
-                {
-                    "subject_id": request.subject_id,
-                    "student_user_id": student_id,
-                    "school_year": school_year
-                }
-            )
-            removed_count += result.rowcount
+        result = db.execute(
+            text("""
+                DELETE FROM subject_student_assignments 
+                WHERE subject_id = :subject_id 
+                AND student_user_id = ANY(:student_ids) 
+                AND school_year = :school_year
+            """),
+            {
+                "subject_id": request.subject_id,
+                "student_ids": request.student_ids,
+                "school_year": school_year
+            }
+        )
+        removed_count = result.rowcount
         
         db.commit()
         return {
@@ -228,14 +222,26 @@ async def remove_class_from_subject(
     school_year = request.school_year or 2025
     
     try:
-        # 1. 학급 배정 삭제
-        db.execute(
+        # 학급 배정 삭제 + 해당 학급의 학급 배정 타입 학생 제외를 한 문장으로
+        result = db.execute(
             text("""
-                DELETE FROM subject_class_assignments 
-                WHERE subject_id = :subject_id 
-                AND grade = :grade 
-                AND class_number = :class_number 
-                AND school_year = :school_year
+                WITH removed_class AS (
+                    DELETE FROM subject_class_assignments 
+                    WHERE subject_id = :subject_id 
+                    AND grade = :grade 
+                    AND class_number = :class_number 
+                    AND school_year = :school_year
+                    RETURNING 1
+                )
+                DELETE FROM subject_student_assignments ssa
+                USING users u
+                WHERE ssa.student_user_id = u.user_id
+                AND u.role = 'student'
+                AND u.grade = :grade
+                AND u.class_number = :class_number
+                AND ssa.subject_id = :subject_id 
+                AND ssa.school_year = :school_year 
+                AND ssa.assigned_type = 'class'
             """),
             {
                 "subject_id": request.subject_id,
@@ -244,36 +250,7 @@ async def remove_class_from_subject(
                 "school_year": school_year
             }
         )
-        
-        # 2. 해당 학급 학생들 조회
-        students = db.execute(
-            text("""
-                SELECT user_id FROM users 
-                WHERE role = 'student' 
-                AND grade = :grade 
-                AND class_number = :class_number
-            """),
-            {"grade": request.grade, "class_number": request.class_number}
-        ).fetchall()
-        
-        # 3. 학급 배정 타입인 학생만 제외
-        removed_students = 0
-        for student in students:
-            result = db.execute(
-                text("""
-                    DELETE FROM subject_student_assignments 
-                    WHERE subject_id = :subject_id 
-                    AND student_user_id = :student_user_id 
-                    AND school_year = :school_year 
-                    AND assigned_type = 'class'
-                """),
-                {
-                    "subject_id": request.subject_id,
-                    "student_user_id": student.user_id,
-                    "school_year": school_year
-                }
-            )
-            removed_students += result.rowcount
+        removed_students = result.rowcount
         
         db.commit()
         return {
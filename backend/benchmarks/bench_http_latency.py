@@ -0,0 +1,110 @@
+"""
+동시 요청 지연시간(p50/p95/p99) 벤치마크
+
+실행 중인 백엔드에 동시 요청을 보내 엔드포인트별 지연시간 분포를 측정한다.
+동기 세션 → 비동기 세션 전환 전/후 빌드에 같은 옵션으로 실행해 비교한다.
+(httpx 필요: pip install httpx)
+
+사용법:
+    python benchmarks/bench_http_latency.py --base-url http://localhost:8000 \\
+        --user root2025 --password '1234!' --concurrency 50 --requests 1000 \\
+        --endpoint "/api/records?grade=2" \\
+        --endpoint "/api/teacher/accessible-records?school_year=2025&grade=2" \\
+        --endpoint "/api/teacher/subject-records?subject_id=1&school_year=2025&semester=1&grade=2" \\
+        --endpoint "/api/teacher/activity-records?subject_id=6&grade=2&class_number=1"
+
+--background 옵션을 주면 측정 중 다른 엔드포인트에 느린 부하를 같이 걸어
+한 요청이 워커 전체를 막는지 확인할 수 있다.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def _login(client, user, password):
+    response = await client.post("/api/token", data={"username": user, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def _run_endpoint(client, endpoint, total, concurrency):
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.get(endpoint)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+async def _background_load(client, endpoint, stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            await client.get(endpoint)
+        except httpx.HTTPError:
+            pass
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--user", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--endpoint", action="append", required=True)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--background", help="측정 중 계속 호출할 느린 엔드포인트")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency + 10)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        token = await _login(client, args.user, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        stop = asyncio.Event()
+        background = None
+        if args.background:
+            background = asyncio.create_task(_background_load(client, args.background, stop))
+
+        print(f"concurrency={args.concurrency}, requests={args.requests}")
+        print(f"{'endpoint':<70} {'p50':>8} {'p95':>8} {'p99':>8} {'mean':>8} {'rps':>8} {'err':>5}")
+        for endpoint in args.endpoint:
+            latencies, errors, elapsed = await _run_endpoint(client, endpoint, args.requests, args.concurrency)
+            print(
+                f"{endpoint[:70]:<70} "
+                f"{_percentile(latencies, 50):8.1f} {_percentile(latencies, 95):8.1f} "
+                f"{_percentile(latencies, 99):8.1f} {statistics.mean(latencies):8.1f} "
+                f"{args.requests / elapsed:8.1f} {errors:5d}"
+            )
+
+        stop.set()
+        if background:
+            await background
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
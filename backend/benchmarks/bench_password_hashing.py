@@ -0,0 +1,60 @@
+"""
+대량 비밀번호 해싱 벤치마크
+
+사용법 (backend 디렉터리에서):
+    python benchmarks/bench_password_hashing.py
+    python benchmarks/bench_password_hashing.py --sizes 1000 5000 --rounds 12
+
+행 단위 순차 해싱(기존 임포트 방식)과 hash_passwords_bulk 병렬 해싱을 비교한다.
+학생 명단처럼 대부분 같은 기본 비밀번호를 쓰는 경우를 가정한다.
+"""
+import argparse
+import os
+import sys
+import time
+
+import bcrypt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passwords import hash_passwords_bulk, BULK_HASH_WORKERS  # noqa: E402
+
+
+def _roster(size: int):
+    # 90%는 기본 비밀번호, 나머지는 개별 비밀번호
+    return ["1234!" if i % 10 else f"pw-{i:05d}" for i in range(size)]
+
+
+def bench_serial(passwords, rounds):
+    started = time.perf_counter()
+    for password in passwords:
+        bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds))
+    return time.perf_counter() - started
+
+
+def bench_bulk(passwords, rounds):
+    started = time.perf_counter()
+    hash_passwords_bulk(passwords, progress=lambda done, total: None, rounds=rounds)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--skip-serial", action="store_true", help="순차 해싱 측정 생략 (오래 걸림)")
+    args = parser.parse_args()
+
+    print(f"bcrypt rounds={args.rounds}, bulk workers={BULK_HASH_WORKERS}")
+    for size in args.sizes:
+        passwords = _roster(size)
+        bulk = bench_bulk(passwords, args.rounds)
+        line = f"{size:>6} rows | bulk {bulk:8.2f}s ({size / bulk:7.1f} rows/s)"
+        if not args.skip_serial:
+            serial = bench_serial(passwords, args.rounds)
+            line += f" | serial {serial:8.2f}s | speedup x{serial / bulk:.2f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+엑셀 임포트 행 읽기 메모리 벤치마크
+
+사용법 (backend 디렉터리에서):
+    python benchmarks/bench_workbook_reader.py
+    python benchmarks/bench_workbook_reader.py --sizes 10000 50000
+
+과목별 세특 임포트 형식(11열, 세특 본문 약 1,500바이트)의 워크북을 만들어
+기존 방식(일반 모드 load_workbook + list(iter_rows))과
+iter_workbook_rows(read_only 스트리밍)의 최대 메모리(tracemalloc)와 시간을 비교한다.
+스트리밍 쪽 최대 메모리는 행 수와 무관하게 거의 일정해야 한다.
+(업로드 바이트와 공유 문자열 테이블은 두 방식 모두 들고 있으므로 공통으로 포함됨)
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook, load_workbook  # noqa: E402
+
+from excel_io import iter_workbook_rows  # noqa: E402
+
+CONTENT = "수업 시간에 탐구 활동을 주도적으로 수행하며 "
+
+
+def _workbook(size: int) -> bytes:
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(["학년도", "학기", "학년", "학생개인번호", "과목", "과목코드", "반/번호", "성명",
+               "학적변동 구분", "세부능력 및 특기사항", "영재·발명교육 기록사항"])
+    for i in range(size):
+        # 본문마다 다른 문자열 (공유 문자열 중복 제거로 결과가 왜곡되지 않도록)
+        ws.append([2025, 1, i % 3 + 1, f"25{i:06d}", "국어", "KOR", f"{i % 12 + 1}/{i % 30 + 1}",
+                   f"학생{i}", "재학", f"{i} " + CONTENT * 35, None])
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def _measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def read_legacy(contents: bytes) -> int:
+    ws = load_workbook(BytesIO(contents)).active
+    rows = list(ws.iter_rows(min_row=2, values_only=True))
+    return sum(1 for row in rows if any(row))
+
+
+def read_streaming(contents: bytes) -> int:
+    return sum(1 for _, row in iter_workbook_rows(contents, min_row=2) if any(row))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'xlsx MB':>8} {'legacy MB':>10} {'stream MB':>10} {'legacy s':>9} {'stream s':>9}")
+    for size in args.sizes:
+        contents = _workbook(size)
+        legacy_count, legacy_s, legacy_peak = _measure(lambda: read_legacy(contents))
+        stream_count, stream_s, stream_peak = _measure(lambda: read_streaming(contents))
+        assert legacy_count == stream_count == size, (legacy_count, stream_count)
+        print(
+            f"{size:7d} {len(contents) / 2**20:8.1f} {legacy_peak / 2**20:10.1f} "
+            f"{stream_peak / 2**20:10.1f} {legacy_s:9.2f} {stream_s:9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
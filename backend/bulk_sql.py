@@ -0,0 +1,282 @@
+"""
+대량 upsert 헬퍼
+- 여러 행을 다건 VALUES INSERT ... ON CONFLICT 한 문장으로 청크 단위 실행
+- 같은 충돌 키가 한 문장에 두 번 들어가면 Postgres가 거부하므로(ON CONFLICT cardinality violation)
+  나중 행만 남김 (행 단위로 순서대로 upsert했을 때와 같은 결과)
+- 청크마다 SAVEPOINT: 청크가 실패하면 그 청크만 행 단위로 다시 실행해 실패한 행을 보고
+- fingerprint_columns를 주면 값 해시(content_hash)를 기존 행과 한 번에 비교해 바뀐 행만 씀
+  (같은 파일 재임포트 시 WAL/dead tuple/updated_at 갱신 없음)
+- preview_upsert: 쓰지 않고 행별 insert/update/unchanged와 바뀌는 값만 계산 (임포트 dry_run)
+- commit은 호출자가 한 번만
+"""
+import os
+import json
+import hashlib
+from decimal import Decimal
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+# 기존 해시 조회는 키만 보내므로 더 크게 묶음
+FINGERPRINT_LOOKUP_CHUNK = int(os.getenv("FINGERPRINT_LOOKUP_CHUNK", "5000"))
+
+FINGERPRINT_COLUMN = "content_hash"
+
+# (행 라벨, 컬럼 값) — 라벨은 오류 보고용 (예: 엑셀 행 번호)
+BulkRow = Tuple[Hashable, Dict]
+
+
+class BulkUpsertResult:
+    """대량 upsert 결과"""
+
+    def __init__(self):
+        # success = inserted + updated + unchanged (+ 같은 파일 안에서 뒤 행에 덮인 중복 행)
+        self.success = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors: List[Tuple[Hashable, str]] = []
+
+    def _count(self, kind: Optional[str], rows: int = 1):
+        self.success += rows
+        if kind:
+            setattr(self, kind, getattr(self, kind) + rows)
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+
+def dedupe_rows(rows: Sequence[BulkRow], key_columns: Sequence[str]) -> List[BulkRow]:
+    """충돌 키가 같은 행은 마지막 행만 남김 (원래 순서 유지)"""
+    latest = {}
+    for position, (label, values) in enumerate(rows):
+        latest[tuple(values[c] for c in key_columns)] = position
+    keep = set(latest.values())
+    return [row for position, row in enumerate(rows) if position in keep]
+
+
+def row_fingerprint(values: dict, columns: Sequence[str]) -> str:
+    """임포트 값의 해시 (컬럼 순서 고정, 타입은 문자열 표현으로 정규화)"""
+    payload = json.dumps([values.get(c) for c in columns], ensure_ascii=False, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def fetch_existing(
+    db: Session,
+    table: str,
+    key_columns: Sequence[str],
+    rows: Sequence[BulkRow],
+    columns: Sequence[str],
+    key_where: str = "",
+) -> Dict[tuple, dict]:
+    """충돌 키 목록에 해당하는 기존 행 {키: {컬럼: 값}} (행이 없으면 키 없음, 키 묶음당 쿼리 1번)"""
+    existing = {}
+    select_columns = ", ".join(f"t.{c}" for c in tuple(key_columns) + tuple(columns))
+    join_on = " AND ".join(f"t.{c} = k.{c}" for c in key_columns)
+    where = f"WHERE {key_where}" if key_where else ""
+    for start in range(0, len(rows), FINGERPRINT_LOOKUP_CHUNK):
+        chunk = rows[start:start + FINGERPRINT_LOOKUP_CHUNK]
+        values = ", ".join(
+            "(" + ", ".join(f":{c}_{i}" for c in key_columns) + ")"
+            for i in range(len(chunk))
+        )
+        result = db.execute(
+            text(f"""
+                SELECT {select_columns}
+                FROM {table} t
+                JOIN (VALUES {values}) AS k({", ".join(key_columns)}) ON {join_on}
+                {where}
+            """),
+            _bind(key_columns, chunk)
+        )
+        for row in result:
+            existing[tuple(row[:len(key_columns)])] = dict(zip(columns, row[len(key_columns):]))
+    return existing
+
+
+def fetch_fingerprints(
+    db: Session,
+    table: str,
+    key_columns: Sequence[str],
+    rows: Sequence[BulkRow],
+    key_where: str = "",
+) -> Dict[tuple, Optional[str]]:
+    """충돌 키 목록에 해당하는 기존 행의 해시 {키: content_hash} (행이 없으면 키 없음)"""
+    existing = fetch_existing(db, table, key_columns, rows, (FINGERPRINT_COLUMN,), key_where)
+    return {key: values[FINGERPRINT_COLUMN] for key, values in existing.items()}
+
+
+def _comparable(value):
+    """DB 값과 엑셀 값 비교용 정규화 (숫자는 3 / 3.0 / Decimal('3.0') / '3'을 같게)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return format(Decimal(str(value)).normalize(), "f")
+    return str(value)
+
+
+def diff_values(old: dict, new: dict, columns: Sequence[str]) -> Dict[str, list]:
+    """바뀌는 컬럼만 {컬럼: [기존 값, 새 값]}"""
+    return {
+        c: [old.get(c), new.get(c)]
+        for c in columns
+        if _comparable(old.get(c)) != _comparable(new.get(c))
+    }
+
+
+def preview_upsert(
+    db: Session,
+    table: str,
+    rows: Sequence[BulkRow],
+    conflict_columns: Sequence[str],
+    compare_columns: Sequence[str],
+    fingerprint_columns: Optional[Sequence[str]] = None,
+    key_where: str = "",
+) -> List[dict]:
+    """
+    bulk_upsert를 실행했을 때의 행별 결과를 쓰기 없이 계산
+
+    Returns:
+        입력 순서대로 {"row": 라벨, "action": insert|update|unchanged|duplicate, "changes": {...}}
+        - fingerprint_columns를 주면 bulk_upsert와 같은 해시 기준으로 update/unchanged 판정
+          (해시가 없는 기존 행은 값이 같아도 update, changes는 비어 있음)
+        - duplicate: 같은 파일 안에서 뒤 행에 덮이는 행
+    """
+    kept = {id(row) for row in dedupe_rows(rows, conflict_columns)}
+    columns = tuple(compare_columns)
+    if fingerprint_columns:
+        columns += (FINGERPRINT_COLUMN,)
+    existing = fetch_existing(
+        db, table, conflict_columns, [row for row in rows if id(row) in kept], columns, key_where
+    )
+
+    preview = []
+    for row in rows:
+        label, values = row
+        if id(row) not in kept:
+            preview.append({"row": label, "action": "duplicate", "changes": {}})
+            continue
+        old = existing.get(tuple(values[c] for c in conflict_columns))
+        if old is None:
+            preview.append({"row": label, "action": "insert", "changes": {}})
+            continue
+        changes = diff_values(old, values, compare_columns)
+        if fingerprint_columns:
+            same = old[FINGERPRINT_COLUMN] == row_fingerprint(values, fingerprint_columns)
+        else:
+            same = not changes
+        preview.append({"row": label, "action": "unchanged" if same else "update", "changes": changes})
+    return preview
+
+
+def build_upsert_sql(
+    table: str,
+    columns: Sequence[str],
+    row_count: int,
+    conflict_target: str,
+    update_columns: Sequence[str],
+    extra_set: str = "",
+) -> str:
+    """INSERT INTO t (...) VALUES (:c_0_0, ...), ... ON CONFLICT ... DO UPDATE SET ..."""
+    values = ", ".join(
+        "(" + ", ".join(f":{c}_{i}" for c in columns) + ")"
+        for i in range(row_count)
+    )
+    assignments = [f"{c} = EXCLUDED.{c}" for c in update_columns]
+    if extra_set:
+        assignments.append(extra_set)
+    action = f"DO UPDATE SET {', '.join(assignments)}" if assignments else "DO NOTHING"
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values} "
+        f"ON CONFLICT {conflict_target} {action}"
+    )
+
+
+def _bind(columns: Sequence[str], rows: Sequence[BulkRow]) -> dict:
+    params = {}
+    for i, (_, values) in enumerate(rows):
+        for c in columns:
+            params[f"{c}_{i}"] = values.get(c)
+    return params
+
+
+def bulk_upsert(
+    db: Session,
+    table: str,
+    columns: Sequence[str],
+    rows: Sequence[BulkRow],
+    conflict_target: str,
+    conflict_columns: Sequence[str],
+    update_columns: Sequence[str],
+    extra_set: str = "",
+    chunk_size: Optional[int] = None,
+    log_tag: str = "Bulk Upsert",
+    fingerprint_columns: Optional[Sequence[str]] = None,
+    key_where: str = "",
+) -> BulkUpsertResult:
+    """
+    행들을 청크 단위 다건 upsert
+
+    Args:
+        conflict_target: ON CONFLICT 뒤에 올 대상 (부분 유니크 인덱스면 WHERE 절 포함)
+        conflict_columns: 중복 제거에 쓸 충돌 키 컬럼
+        update_columns: 충돌 시 EXCLUDED 값으로 덮어쓸 컬럼
+        extra_set: 충돌 시 추가로 실행할 SET 식 (예: "updated_at = CURRENT_TIMESTAMP")
+        fingerprint_columns: 해시를 계산할 컬럼 (주면 기존 해시와 같은 행은 쓰지 않음)
+        key_where: 기존 해시 조회 시 조건 (부분 유니크 인덱스의 WHERE, 테이블 별칭 t)
+    """
+    result = BulkUpsertResult()
+    # 중복 키로 밀려난 앞쪽 행도 순차 처리였다면 성공했으므로 성공으로 집계
+    deduped = dedupe_rows(rows, conflict_columns)
+    result._count(None, len(rows) - len(deduped))
+    rows = deduped
+
+    # 행별 분류: inserted / updated (해시 비교를 안 하면 분류 없음)
+    kinds: Dict[int, Optional[str]] = {}
+    if fingerprint_columns:
+        columns = tuple(columns) + (FINGERPRINT_COLUMN,)
+        update_columns = tuple(update_columns) + (FINGERPRINT_COLUMN,)
+        for _, values in rows:
+            values[FINGERPRINT_COLUMN] = row_fingerprint(values, fingerprint_columns)
+        existing = fetch_fingerprints(db, table, conflict_columns, rows, key_where)
+        changed = []
+        for row in rows:
+            key = tuple(row[1][c] for c in conflict_columns)
+            if key not in existing:
+                kinds[id(row)] = "inserted"
+            elif existing[key] == row[1][FINGERPRINT_COLUMN]:
+                result._count("unchanged")
+                continue
+            else:
+                kinds[id(row)] = "updated"
+            changed.append(row)
+        rows = changed
+
+    chunk_size = chunk_size or BULK_CHUNK_SIZE
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        sql = text(build_upsert_sql(table, columns, len(chunk), conflict_target, update_columns, extra_set))
+        try:
+            with db.begin_nested():
+                db.execute(sql, _bind(columns, chunk))
+            for row in chunk:
+                result._count(kinds.get(id(row)))
+            continue
+        except Exception as e:
+            # 다건 문장 전체가 딸린 메시지 대신 DB 드라이버 오류만 출력
+            print(f"[{log_tag}] 행 {chunk[0][0]}~{chunk[-1][0]} 묶음 실패, 행 단위로 재시도: {getattr(e, 'orig', e)}")
+
+        # 실패한 청크만 행 단위 재실행 (오류 행 식별)
+        single = text(build_upsert_sql(table, columns, 1, conflict_target, update_columns, extra_set))
+        for row in chunk:
+            try:
+                with db.begin_nested():
+                    db.execute(single, _bind(columns, [row]))
+                result._count(kinds.get(id(row)))
+            except Exception as e:
+                result.errors.append((row[0], str(e)))
+
+    return result
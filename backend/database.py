@@ -0,0 +1,235 @@
+"""
+공유 연결 풀 모듈
+- uvicorn 워커당 SQLAlchemy 엔진(동기 psycopg2 + 비동기 asyncpg) 1개씩, Redis 연결 풀 1개만 생성
+- 풀 크기/재활용/pre-ping은 환경변수로 조정
+- 연결 대기(checkout wait) 시간 지표 수집
+"""
+import os
+import time
+import threading
+
+import redis
+import redis.asyncio as aioredis
+from sqlalchemy import create_engine, text, exc as sa_exc
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# ==================== 환경 설정 ====================
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    raise RuntimeError("DATABASE_URL environment variable not set")
+
+# 비동기 엔진은 같은 DB에 asyncpg 드라이버로 접속
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    DATABASE_URL.replace("postgresql+psycopg2://", "postgresql://", 1)
+                .replace("postgresql://", "postgresql+asyncpg://", 1)
+)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+# 워커 수 x (DB_POOL_SIZE + DB_MAX_OVERFLOW + ASYNC_DB_POOL_SIZE + ASYNC_DB_MAX_OVERFLOW)가
+# Postgres max_connections보다 작아야 함
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", str(DB_POOL_SIZE)))
+ASYNC_DB_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", str(DB_MAX_OVERFLOW)))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", "true")
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", str(DB_POOL_SIZE)))
+
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+
+# 비동기 Redis (레코드 잠금용): Redis 장애 시 잠금 관련 요청만 짧게 실패하도록 타임아웃을 짧게
+ASYNC_REDIS_MAX_CONNECTIONS = int(os.getenv("ASYNC_REDIS_MAX_CONNECTIONS", "50"))
+ASYNC_REDIS_POOL_TIMEOUT = float(os.getenv("ASYNC_REDIS_POOL_TIMEOUT", "1"))
+ASYNC_REDIS_SOCKET_TIMEOUT = float(os.getenv("ASYNC_REDIS_SOCKET_TIMEOUT", "0.5"))
+ASYNC_REDIS_CONNECT_TIMEOUT = float(os.getenv("ASYNC_REDIS_CONNECT_TIMEOUT", "1"))
+
+# 이 시간 이상 기다린 checkout은 slow로 집계
+SLOW_CHECKOUT_SECONDS = 0.1
+
+
+# ==================== 풀 지표 ====================
+class PoolWaitMetrics:
+    """연결 checkout 대기 시간 집계 (워커 단위)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            if waited >= SLOW_CHECKOUT_SECONDS:
+                self.slow_checkouts += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "slow_checkouts": self.slow_checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+pool_metrics = PoolWaitMetrics()
+async_pool_metrics = PoolWaitMetrics()
+
+
+class _InstrumentedPoolMixin:
+    """checkout 대기 시간 측정"""
+    metrics: PoolWaitMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except sa_exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    metrics = pool_metrics
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
+
+
+# ==================== 데이터베이스 ====================
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=ASYNC_DB_POOL_SIZE,
+    max_overflow=ASYNC_DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# ==================== Redis ====================
+redis_pool = redis.BlockingConnectionPool.from_url(
+    REDIS_URL,
+    decode_responses=True,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_POOL_TIMEOUT,
+)
+redis_client = redis.Redis(connection_pool=redis_pool)
+
+async_redis_pool = aioredis.BlockingConnectionPool.from_url(
+    REDIS_URL,
+    decode_responses=True,
+    max_connections=ASYNC_REDIS_MAX_CONNECTIONS,
+    timeout=ASYNC_REDIS_POOL_TIMEOUT,
+    socket_timeout=ASYNC_REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=ASYNC_REDIS_CONNECT_TIMEOUT,
+)
+async_redis_client = aioredis.Redis(connection_pool=async_redis_pool)
+
+
+# ==================== 워밍업 / 상태 ====================
+def warm_up_pools():
+    """워커 시작 시 DB/Redis 연결을 미리 열어 첫 요청 지연 제거"""
+    connections = []
+    try:
+        for _ in range(min(DB_POOL_WARMUP, DB_POOL_SIZE)):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            connections.append(conn)
+    except Exception as e:
+        print(f"[Pool] DB 워밍업 실패: {e}")
+    finally:
+        for conn in connections:
+            conn.close()
+
+    try:
+        redis_client.ping()
+    except redis.RedisError as e:
+        print(f"[Pool] Redis 워밍업 실패: {e}")
+
+    print(f"[Pool] 워밍업 완료 (pid={os.getpid()}, db={len(connections)}/{DB_POOL_SIZE})")
+
+
+async def warm_up_async_pool():
+    """비동기 엔진 연결 워밍업"""
+    connections = []
+    try:
+        for _ in range(min(DB_POOL_WARMUP, ASYNC_DB_POOL_SIZE)):
+            conn = await async_engine.connect()
+            connections.append(conn)
+            await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        print(f"[Pool] 비동기 DB 워밍업 실패: {e}")
+    finally:
+        for conn in connections:
+            await conn.close()
+
+
+def get_db_pool_stats() -> dict:
+    """DB/Redis 풀 상태 (워커 단위)"""
+    pool = engine.pool
+    return {
+        "worker_pid": os.getpid(),
+        "db": {
+            "pool_size": pool.size(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            **pool_metrics.snapshot(),
+        },
+        "async_db": {
+            "pool_size": async_engine.pool.size(),
+            "max_overflow": ASYNC_DB_MAX_OVERFLOW,
+            "checked_in": async_engine.pool.checkedin(),
+            "checked_out": async_engine.pool.checkedout(),
+            "overflow": async_engine.pool.overflow(),
+            **async_pool_metrics.snapshot(),
+        },
+        "redis": {
+            "max_connections": REDIS_MAX_CONNECTIONS,
+            "created": len(redis_pool._connections),
+            "idle": sum(1 for c in list(redis_pool.pool.queue) if c is not None),
+        },
+        "async_redis": {
+            "max_connections": ASYNC_REDIS_MAX_CONNECTIONS,
+            "in_use": len(async_redis_pool._in_use_connections),
+            "idle": len(async_redis_pool._available_connections),
+        },
+    }
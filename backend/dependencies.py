@@ -5,17 +5,22 @@
 - 모든 라우터에서 공통으로 사용
 """
 import os
+import logging
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Optional
+import redis
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import text
+from sqlalchemy.orm import Session
 from jose import JWTError, jwt
+from database import engine, SessionLocal, AsyncSessionLocal, redis_client, async_redis_client
+from user_cache import get_cached_user, cache_user
 
-# ==================== 환경 설정 ====================
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL environment variable not set")
+logger = logging.getLogger(__name__)
 
+# ==================== 환경 설정 ====================
 SECRET_KEY = os.getenv("SECRET_KEY")
 if not SECRET_KEY:
     raise RuntimeError("SECRET_KEY environment variable not set")
@@ -23,13 +28,109 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# ==================== 데이터베이스 ====================
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 토큰에 role/grade/class_number 클레임 포함 여부 (opt-in)
+TOKEN_CLAIMS_ENABLED = os.getenv("TOKEN_CLAIMS_ENABLED", "false").lower() in ("1", "true", "yes")
+# 토큰 버전의 원본은 users.token_version, Redis에는 짧은 TTL로 캐시만 함
+# (키가 없거나 Redis 오류면 get_current_user로 재조회 → 축출/재시작돼도 옛 토큰이 되살아나지 않음)
+TOKEN_VERSION_KEY_PREFIX = "token_version:"
+TOKEN_VERSION_CACHE_TTL = int(os.getenv("TOKEN_VERSION_CACHE_TTL", "60"))
 
 # ==================== OAuth2 ====================
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/token")
 
+# ==================== 토큰 ====================
+class TokenClaims(SimpleNamespace):
+    """토큰 클레임만으로 구성한 사용자 (DB 조회 없음)"""
+
+
+def _token_version_key(user_id: str) -> str:
+    return f"{TOKEN_VERSION_KEY_PREFIX}{user_id}"
+
+
+async def get_cached_token_version(user_id: str) -> Optional[int]:
+    """캐시된 토큰 버전 조회 (키가 없거나 Redis 오류면 None → 호출 측은 DB로 확인)"""
+    try:
+        version = await async_redis_client.get(_token_version_key(user_id))
+    except redis.RedisError as e:
+        logger.warning("[Token] 버전 조회 실패: %s", e)
+        return None
+    return int(version) if version is not None else None
+
+
+async def cache_token_version(user_id: str, version: Optional[int]):
+    """DB에서 확인한 토큰 버전을 캐시 (NX: 그 사이 무효화된 키를 옛 값으로 덮지 않도록)"""
+    if version is None:
+        return
+    try:
+        await async_redis_client.set(_token_version_key(user_id), version, ex=TOKEN_VERSION_CACHE_TTL, nx=True)
+    except redis.RedisError as e:
+        logger.warning("[Token] 버전 캐시 실패: %s", e)
+
+
+def bump_token_version(db: Session, *user_ids: str):
+    """
+    역할/소속이 바뀌거나 삭제된 사용자의 클레임 토큰 무효화
+    - users.token_version을 올리고 commit (원본)
+    - Redis 캐시 키 삭제 (실패해도 TOKEN_VERSION_CACHE_TTL 안에 DB 값으로 돌아옴)
+    """
+    user_ids = [str(u) for u in user_ids if u]
+    if not user_ids:
+        return
+    db.execute(
+        text("UPDATE users SET token_version = token_version + 1 WHERE user_id = ANY(:user_ids)"),
+        {"user_ids": user_ids}
+    )
+    db.commit()
+    try:
+        redis_client.delete(*[_token_version_key(u) for u in user_ids])
+    except redis.RedisError as e:
+        logger.error(
+            "[Token] 버전 캐시 무효화 실패 - 최대 %s초간 이전 클레임 토큰 유효: %s (%s)",
+            TOKEN_VERSION_CACHE_TTL, user_ids, e
+        )
+
+
+def build_token_data(user) -> dict:
+    """access token payload 구성"""
+    data = {"sub": user.user_id}
+    if TOKEN_CLAIMS_ENABLED:
+        # 버전 컬럼이 없는 이전 캐시 항목이면 클레임 없이 발급
+        version = getattr(user, "token_version", None)
+        if version is not None:
+            data.update({
+                "role": user.role,
+                "grade": user.grade,
+                "class_number": user.class_number,
+                "ver": version,
+            })
+    return data
+
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    to_encode = data.copy()
+    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=15))
+    to_encode.update({"exp": expire})
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _decode_token(token: str) -> dict:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
+
+
 # ==================== Dependency 함수 ====================
 def get_db():
     """DB 세션 Dependency"""
@@ -40,32 +141,65 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """비동기 DB 세션 Dependency (asyncpg, 이벤트 루프를 막지 않음)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme), 
     db: Session = Depends(get_db)
 ):
     """현재 사용자 인증 Dependency"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+    user_id: str = _decode_token(token)["sub"]
     
-    user = db.execute(
+    # 캐시 우선 조회 (워커 내 캐시 → Redis → DB)
+    user = get_cached_user(user_id)
+    if user is not None:
+        return user
+    
+    row = db.execute(
         text("SELECT * FROM users WHERE user_id = :user_id"),
         {"user_id": user_id}
     ).fetchone()
     
-    if user is None:
-        raise credentials_exception
-    return user
+    if row is None:
+        raise _credentials_exception()
+    return cache_user(row)
+
+
+async def get_token_claims(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    """
+    읽기 전용 엔드포인트용 경량 인증 Dependency
+    - 클레임 토큰이고 버전이 최신이면 토큰만으로 인증
+    - 버전 캐시가 없으면 users.token_version을 DB에서 직접 읽어 비교하고 캐시
+      (사용자 캐시는 다른 워커에 옛 버전이 남아 있을 수 있으므로 쓰지 않음)
+    - 클레임이 없거나 버전이 다르면 get_current_user로 재조회
+    """
+    payload = _decode_token(token)
+    if "role" in payload and "ver" in payload:
+        user_id = payload["sub"]
+        version = await get_cached_token_version(user_id)
+        if version is None:
+            version = db.execute(
+                text("SELECT token_version FROM users WHERE user_id = :user_id"),
+                {"user_id": user_id}
+            ).scalar()
+            if version is None:
+                raise _credentials_exception()
+            await cache_token_version(user_id, version)
+        if version == payload["ver"]:
+            return TokenClaims(
+                user_id=user_id,
+                role=payload["role"],
+                grade=payload.get("grade"),
+                class_number=payload.get("class_number"),
+            )
+    return await get_current_user(token, db)
 
 
 def require_admin(current_user = Depends(get_current_user)):
@@ -0,0 +1,106 @@
+"""
+엑셀 임포트/익스포트용 스트리밍 행 읽기/쓰기
+- read_only 모드: 시트 전체의 셀 객체를 만들지 않고 시트 XML을 순차 파싱
+- 값 튜플을 한 행씩 yield → 최대 메모리가 시트 크기와 무관
+- 시트의 dimension 정보는 믿지 않음 (잘못 기록된 파일에서 열이 잘리는 것 방지)
+  대신 행 길이가 제각각이므로 width로 채우거나 row_values()로 꺼내 씀
+- 익스포트는 write_only 모드로 임시 파일에 한 행씩 기록 → 행 수와 무관하게 메모리 일정
+  응답은 임시 파일을 그대로 전송하고 전송이 끝나면 삭제
+"""
+import os
+import tempfile
+from io import BytesIO
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter
+from starlette.background import BackgroundTask
+from fastapi.responses import FileResponse
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# (엑셀 행 번호, 값 튜플)
+SheetRow = Tuple[int, tuple]
+
+
+def iter_workbook_rows(contents: bytes, min_row: int = 1, width: Optional[int] = None) -> Iterator[SheetRow]:
+    """
+    업로드된 엑셀 활성 시트의 (행 번호, 값 튜플)을 한 행씩 반환
+    - 끝까지 읽거나 close()하면 워크북 파일을 닫음
+
+    Args:
+        min_row: 시작 행 (헤더가 1행이면 2)
+        width: 값 튜플을 최소 이 길이까지 None으로 채움 (고정 컬럼 언패킹용)
+    """
+    wb = load_workbook(BytesIO(contents), read_only=True)
+    try:
+        ws = wb.active
+        ws.reset_dimensions()
+        for row_idx, row in enumerate(ws.iter_rows(min_row=min_row, values_only=True), start=min_row):
+            if width and len(row) < width:
+                row = row + (None,) * (width - len(row))
+            yield row_idx, row
+    finally:
+        wb.close()
+
+
+def find_header(rows: Iterator[SheetRow], keyword: str, max_row: int = 19, max_col: int = 9) -> Tuple[Optional[int], Optional[int]]:
+    """
+    keyword가 들어 있는 헤더 셀 위치 찾기 → (헤더 행, 헤더 시작 열), 없으면 (None, None)
+    - rows 이터레이터를 그대로 소비하므로 이후 rows는 헤더 다음 행부터 이어짐
+    """
+    for row_idx, row in rows:
+        for col_idx, value in enumerate(row[:max_col], start=1):
+            if value and keyword in str(value):
+                return row_idx, col_idx
+        if row_idx >= max_row:
+            break
+    return None, None
+
+
+def row_values(row: tuple, start_col: int, count: int) -> tuple:
+    """start_col(1부터)부터 count개 값 (행이 짧으면 None으로 채움)"""
+    values = row[start_col - 1:start_col - 1 + count]
+    return values + (None,) * (count - len(values))
+
+
+def _cell_value(value):
+    """엑셀에 쓸 수 없는 제어 문자 제거 (편집기에서 붙여 넣은 본문 대비)"""
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub("", value)
+    return value
+
+
+def write_workbook_file(rows: Iterable[Sequence], title: Optional[str] = None, column_widths: Sequence[float] = ()) -> str:
+    """
+    행 이터러블을 write_only 워크북으로 임시 파일에 기록 → 파일 경로
+    - rows는 DB 커서처럼 한 행씩 소비 (전체를 리스트로 만들지 않음)
+    - 호출자가 파일 삭제 책임 (xlsx_file_response 사용 시 전송 후 자동 삭제)
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    for col_idx, width in enumerate(column_widths, start=1):
+        if width:
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+    
+    fd, path = tempfile.mkstemp(suffix=".xlsx", prefix="export_")
+    os.close(fd)
+    try:
+        for row in rows:
+            ws.append([_cell_value(value) for value in row])
+        wb.save(path)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def xlsx_file_response(path: str, filename: str) -> FileResponse:
+    """임시 엑셀 파일을 청크 단위로 전송하고 전송이 끝나면 삭제"""
+    return FileResponse(
+        path,
+        media_type=XLSX_MEDIA_TYPE,
+        filename=filename,
+        background=BackgroundTask(os.unlink, path),
+    )
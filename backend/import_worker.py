@@ -0,0 +1,40 @@
+"""
+임포트 작업 워커 서비스 (docker-compose의 import-worker)
+- API 서버와 분리된 프로세스 IMPORT_JOB_WORKERS개가 Redis 대기열(jobs.JOB_QUEUE_KEY)에서 작업을 꺼내 실행
+- 프로세스마다 자체 DB 풀 (DB_POOL_SIZE 등 환경변수로 API와 따로 조정)
+- 프로세스가 죽으면 같은 슬롯으로 다시 띄움
+  (새 프로세스가 슬롯의 처리 중 리스트에 남은 작업을 failed로 정리, 정리 전에는 heartbeat 끊김으로 failed 표시)
+
+실행: python import_worker.py
+"""
+import multiprocessing
+import time
+
+from jobs import IMPORT_JOB_WORKERS
+
+
+def _worker_process(slot: int):
+    # 임포트 함수(@import_job_handler) 등록을 위해 main을 import (앱 startup 훅은 실행되지 않음)
+    import main  # noqa: F401
+    from jobs import run_worker
+    run_worker(slot)
+
+
+def main():
+    # spawn: 부모가 만든 DB/Redis 연결 풀을 자식이 물려받지 않도록 프로세스마다 새로 import
+    context = multiprocessing.get_context("spawn")
+    processes = {}
+    while True:
+        for slot in range(IMPORT_JOB_WORKERS):
+            process = processes.get(slot)
+            if process is None or not process.is_alive():
+                if process is not None:
+                    print(f"[Import Worker] 프로세스 {process.pid} 종료 (exit={process.exitcode}) → 재시작")
+                process = context.Process(target=_worker_process, args=(slot,), name=f"import-worker-{slot}", daemon=True)
+                process.start()
+                processes[slot] = process
+        time.sleep(1)
+
+
+if __name__ == "__main__":
+    main()
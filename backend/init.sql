@@ -13,6 +13,7 @@ CREATE TABLE IF NOT EXISTS users (
     grade INTEGER,
     class_number INTEGER,
     number_in_class INTEGER,
+    token_version INTEGER NOT NULL DEFAULT 0,  -- 올리면 이전에 발급된 클레임 토큰 무효화
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -72,6 +73,8 @@ CREATE TABLE IF NOT EXISTS records (
     byte_count INTEGER DEFAULT 0,
     is_editable_by_student BOOLEAN DEFAULT true,
     created_by VARCHAR(20),
+    content_hash VARCHAR(64),  -- 마지막 엑셀 임포트 값의 해시 (같은 내용 재임포트 시 쓰기 생략)
+    lock_fence BIGINT,  -- 마지막 저장에 쓰인 편집 잠금 fencing token (오래된 token의 저장 거절)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
@@ -159,6 +162,7 @@ CREATE INDEX IF NOT EXISTS idx_users_grade_class ON users(grade, class_number);
 
 -- Subjects
 CREATE INDEX IF NOT EXISTS idx_subjects_code ON subjects(subject_code);
+CREATE INDEX IF NOT EXISTS idx_subjects_name ON subjects(subject_name);
 
 -- Records
 CREATE INDEX IF NOT EXISTS idx_records_student ON records(student_user_id);
@@ -167,6 +171,19 @@ CREATE INDEX IF NOT EXISTS idx_records_type ON records(record_type);
 CREATE INDEX IF NOT EXISTS idx_records_year_semester ON records(school_year, semester);
 CREATE INDEX IF NOT EXISTS idx_records_grade_class ON records(grade, class_number);
 CREATE INDEX IF NOT EXISTS idx_records_student_number ON records(student_number);
+-- 관리자 필터 조회 (accessible-records)
+CREATE INDEX IF NOT EXISTS idx_records_access_path ON records(school_year, grade, class_number, subject_id, record_type);
+-- 교사 접근 범위 조인 (access_scope.ACCESSIBLE_RECORD_CONDITION)
+CREATE INDEX IF NOT EXISTS idx_records_access_scope ON records(school_year, grade, (COALESCE(class_number, 0)), subject_id);
+-- 과목별 세특 조회 (subject-records, 반/번호 순)
+CREATE INDEX IF NOT EXISTS idx_records_subject_class_order
+ON records(subject_id, school_year, semester, grade, class_number, number_in_class)
+WHERE record_type = 'subject';
+-- 기록 목록 키셋 페이지네이션 (main.RECORD_LIST_SORT_KEYS와 같은 식, 정렬 노드 없이 커서부터 읽음)
+CREATE INDEX IF NOT EXISTS idx_records_list_order_name
+ON records((COALESCE(grade, 2147483647)), (COALESCE(class_number, 2147483647)), (COALESCE(number_in_class, 2147483647)), (CAST(subject_name IS NULL AS INTEGER)), (COALESCE(subject_name, '')), id);
+CREATE INDEX IF NOT EXISTS idx_records_year_list_order_name
+ON records(school_year, (COALESCE(grade, 2147483647)), (COALESCE(class_number, 2147483647)), (COALESCE(number_in_class, 2147483647)), (CAST(subject_name IS NULL AS INTEGER)), (COALESCE(subject_name, '')), id);
 
 -- Record Versions
 CREATE INDEX IF NOT EXISTS idx_record_versions_record ON record_versions(record_id);
@@ -311,6 +328,7 @@ CREATE INDEX IF NOT EXISTS idx_ta_role ON teacher_assignments(role_type);
 CREATE INDEX IF NOT EXISTS idx_ta_grade_class ON teacher_assignments(grade, class_number);
 CREATE INDEX IF NOT EXISTS idx_ta_subject ON teacher_assignments(subject_id);
 CREATE INDEX IF NOT EXISTS idx_ta_year ON teacher_assignments(school_year);
+CREATE INDEX IF NOT EXISTS idx_ta_teacher_year ON teacher_assignments(teacher_user_id, school_year);
 
 -- 중복 방지 (NULL 값 처리를 위해 COALESCE 사용)
 CREATE UNIQUE INDEX IF NOT EXISTS idx_ta_unique 
@@ -323,6 +341,47 @@ ON teacher_assignments(
     COALESCE(subject_id, 0)
 );
 
+-- ==================== 교사 접근 범위 테이블 ====================
+-- teacher_assignments에서 파생 (역할 배정 생성/수정/삭제/임포트 시 애플리케이션이 갱신)
+-- NULL은 "전체"를 의미: class_number NULL → 학년 전체, subject_id NULL → 모든 과목
+CREATE TABLE IF NOT EXISTS teacher_access_scopes (
+    id SERIAL PRIMARY KEY,
+    teacher_user_id VARCHAR(20) NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    school_year INTEGER NOT NULL,
+    grade INTEGER NOT NULL,
+    class_number INTEGER,
+    subject_id INTEGER REFERENCES subjects(id) ON DELETE CASCADE
+);
+
+COMMENT ON TABLE teacher_access_scopes IS '교사별 기록 접근 범위 (teacher_assignments에서 파생)';
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tas_unique
+ON teacher_access_scopes(
+    teacher_user_id,
+    school_year,
+    grade,
+    COALESCE(class_number, 0),
+    COALESCE(subject_id, 0)
+);
+
+-- 기존 배정 백필
+INSERT INTO teacher_access_scopes (teacher_user_id, school_year, grade, class_number, subject_id)
+SELECT DISTINCT
+    teacher_user_id,
+    school_year,
+    grade,
+    CASE WHEN role_type IN ('grade_head', 'record_manager') THEN NULL ELSE class_number END,
+    CASE WHEN role_type = 'subject_teacher' THEN subject_id ELSE NULL END
+FROM teacher_assignments
+WHERE school_year IS NOT NULL
+  AND grade IS NOT NULL
+  AND (
+      role_type IN ('grade_head', 'record_manager')
+      OR (role_type IN ('homeroom_teacher', 'assistant_homeroom') AND class_number IS NOT NULL)
+      OR (role_type = 'subject_teacher' AND subject_id IS NOT NULL)
+  )
+ON CONFLICT DO NOTHING;
+
 -- ==================== 13. 과목-학급 배정 테이블 ====================
 CREATE TABLE IF NOT EXISTS subject_class_assignments (
     id SERIAL PRIMARY KEY,
@@ -0,0 +1,436 @@
+"""
+엑셀 임포트 작업 실행
+- 임포트는 API 워커가 아니라 별도 임포트 워커 서비스(import_worker.py)의 프로세스에서 실행
+  → openpyxl 파싱/행 변환(CPU, GIL 점유)이 편집 요청을 처리하는 이벤트 루프를 느리게 하지 않음
+  → 임포트 트랜잭션은 워커 프로세스 자체 DB 풀을 사용 (API 워커 풀을 점유하지 않음)
+- 대기열은 Redis 리스트(import_job_queue) 하나 → 대기 작업 수 상한(IMPORT_JOB_MAX_PENDING)도 전체 기준
+- 작업 상태는 Redis 해시(import_job:{id})에 저장 (24시간 보관) → 어느 워커에서든 조회 가능
+- 워커는 대기열에서 꺼낸 작업을 자기 처리 중 리스트(import_job_processing:{host}:{slot})로 옮기고(BLMOVE)
+  바로 running/owner/heartbeat_at을 기록 → 꺼낸 직후 워커가 죽어도 queued로 남지 않음
+- 실행 중인 작업은 heartbeat_at/owner를 주기적으로 기록, 일정 시간 갱신이 없으면 조회 시 failed로 표시
+  (워커 프로세스가 죽어도 running으로 24시간 남지 않음)
+- 워커 프로세스는 Redis zset(import_job_workers)에 주기적으로 자기 heartbeat를 기록
+  → /api/admin/metrics의 workers는 API 컨테이너 설정값이 아니라 실제로 살아 있는 워커 수
+- 같은 슬롯의 워커가 다시 시작되면 처리 중 리스트에 남은 작업(이전 프로세스가 실행하다 죽은 작업)을 failed로 정리
+- 기본(background=true)은 job_id를 바로 반환하고 GET /api/jobs/{id}로 진행 상황 조회
+  background=false면 작업이 끝날 때까지(최대 IMPORT_JOB_WAIT_TIMEOUT초) 기다려 결과를 반환 (스크립트 호환)
+"""
+import os
+import json
+import time
+import uuid
+import base64
+import socket
+import asyncio
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import redis
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+from database import SessionLocal, redis_client
+
+# ==================== 환경 설정 ====================
+# 임포트 워커 서비스의 프로세스 수 (동시에 실행되는 임포트 수, import_worker.py에서만 사용)
+IMPORT_JOB_WORKERS = int(os.getenv("IMPORT_JOB_WORKERS", "2"))
+IMPORT_JOB_MAX_PENDING = int(os.getenv("IMPORT_JOB_MAX_PENDING", "16"))
+IMPORT_JOB_TTL = int(os.getenv("IMPORT_JOB_TTL", str(24 * 3600)))
+# 진행 상황은 이 간격(초)마다만 Redis에 기록
+IMPORT_JOB_PROGRESS_INTERVAL = float(os.getenv("IMPORT_JOB_PROGRESS_INTERVAL", "1"))
+IMPORT_JOB_HEARTBEAT_INTERVAL = float(os.getenv("IMPORT_JOB_HEARTBEAT_INTERVAL", "5"))
+# 이 시간 동안 heartbeat가 없으면 실행 중인 작업을 실패로 처리
+IMPORT_JOB_STALE_SECONDS = float(os.getenv("IMPORT_JOB_STALE_SECONDS", "60"))
+# background=false 요청이 결과를 기다리는 최대 시간
+IMPORT_JOB_WAIT_TIMEOUT = float(os.getenv("IMPORT_JOB_WAIT_TIMEOUT", "600"))
+
+JOB_KEY_PREFIX = "import_job:"
+JOB_PAYLOAD_KEY_PREFIX = "import_job_payload:"
+JOB_QUEUE_KEY = "import_job_queue"
+JOB_PROCESSING_KEY_PREFIX = "import_job_processing:"
+# 살아 있는 워커 (owner → 마지막 heartbeat 시각)
+WORKER_REGISTRY_KEY = "import_job_workers"
+
+# KEYS[1]=대기열, KEYS[2]=상태 hash, KEYS[3]=payload 키 / ARGV[1]=대기 상한, ARGV[2]=ttl(초),
+# ARGV[3]=job_id, ARGV[4]=payload, ARGV[5..]=상태 hash 필드/값 쌍
+# 반환: 1 등록 / 0 대기열이 가득 참 (상한 확인과 등록을 한 번에 → 동시 제출이 상한을 넘지 않음)
+_ENQUEUE_SCRIPT = redis_client.register_script("""
+if redis.call('LLEN', KEYS[1]) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('HSET', KEYS[2], unpack(ARGV, 5))
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+redis.call('SET', KEYS[3], ARGV[4], 'EX', ARGV[2])
+redis.call('RPUSH', KEYS[1], ARGV[3])
+return 1
+""")
+
+# 워커 프로세스가 실행할 수 있는 임포트 함수 (이름 → 함수, @import_job_handler로 등록)
+_handlers: Dict[str, Callable] = {}
+
+
+def import_job_handler(func: Callable) -> Callable:
+    """임포트 작업 함수 등록 (func(db, progress, *args) → {"success", "failed", "errors", ...})"""
+    _handlers[func.__name__] = func
+    return func
+
+
+def _job_key(job_id: str) -> str:
+    return f"{JOB_KEY_PREFIX}{job_id}"
+
+
+def _payload_key(job_id: str) -> str:
+    return f"{JOB_PAYLOAD_KEY_PREFIX}{job_id}"
+
+
+def _processing_key(slot: int) -> str:
+    """워커 슬롯별 처리 중 리스트 (슬롯이 같으면 재시작된 프로세스도 같은 키)"""
+    return f"{JOB_PROCESSING_KEY_PREFIX}{socket.gethostname()}:{slot}"
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _save(job_id: str, fields: dict):
+    """작업 상태 기록 (Redis 장애 시 작업 자체는 계속 진행)"""
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(_job_key(job_id), mapping=fields)
+        pipe.expire(_job_key(job_id), IMPORT_JOB_TTL)
+        pipe.execute()
+        return True
+    except redis.RedisError as e:
+        print(f"[Import Job] {job_id} 상태 저장 실패: {e}")
+        return False
+
+
+# ==================== 작업 인자 직렬화 ====================
+def _encode_args(args: tuple) -> list:
+    """JSON으로 보낼 수 있게 bytes(업로드 파일 내용)만 base64로 감쌈"""
+    return [
+        {"__bytes__": base64.b64encode(arg).decode("ascii")} if isinstance(arg, bytes) else arg
+        for arg in args
+    ]
+
+
+def _decode_args(args: list) -> tuple:
+    return tuple(
+        base64.b64decode(arg["__bytes__"]) if isinstance(arg, dict) and "__bytes__" in arg else arg
+        for arg in args
+    )
+
+
+# ==================== 진행 상황 ====================
+class JobProgress:
+    """임포트 함수가 행마다 호출 (Redis에는 일정 간격으로만 기록)"""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.rows_processed = 0
+        self.success = 0
+        self.failed = 0
+        self._flushed_at = time.monotonic()
+
+    def tick(self, success: int, failed: int, rows: int = 1):
+        """rows: 이번 호출로 처리한 행 수 (검증 후 저장 단계처럼 집계만 갱신할 때는 0)"""
+        self.rows_processed += rows
+        self.success = success
+        self.failed = failed
+        if time.monotonic() - self._flushed_at >= IMPORT_JOB_PROGRESS_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        self._flushed_at = time.monotonic()
+        _save(self.job_id, {
+            "rows_processed": self.rows_processed,
+            "success": self.success,
+            "failed": self.failed,
+        })
+
+
+class _Heartbeat(threading.Thread):
+    """실행 중 작업의 heartbeat_at 갱신 (임포트 함수가 CPU를 오래 잡아도 GIL 전환 간격마다 실행됨)"""
+
+    def __init__(self, job_id: str):
+        super().__init__(name=f"import-job-heartbeat-{job_id}", daemon=True)
+        self.job_id = job_id
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(IMPORT_JOB_HEARTBEAT_INTERVAL):
+            _save(self.job_id, {"heartbeat_at": time.time()})
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class _WorkerHeartbeat(threading.Thread):
+    """워커 프로세스의 생존 기록 (작업 실행 중에도 갱신되도록 별도 스레드)"""
+
+    def __init__(self):
+        super().__init__(name="import-worker-heartbeat", daemon=True)
+
+    def run(self):
+        while True:
+            try:
+                redis_client.zadd(WORKER_REGISTRY_KEY, {_owner(): time.time()})
+            except redis.RedisError as e:
+                print(f"[Import Job] 워커 heartbeat 기록 실패: {e}")
+            time.sleep(IMPORT_JOB_HEARTBEAT_INTERVAL)
+
+
+# ==================== 실행 (임포트 워커 프로세스) ====================
+def _run(job_id: str, func: Callable, args: tuple):
+    """워커 프로세스에서 실행: 자체 풀의 DB 세션을 열고 임포트 함수 호출 (running 기록은 process_next_job에서)"""
+    started = time.perf_counter()
+    heartbeat = _Heartbeat(job_id)
+    heartbeat.start()
+    progress = JobProgress(job_id)
+    db = SessionLocal()
+    try:
+        result = func(db, progress, *args)
+        _save(job_id, {
+            "status": "succeeded",
+            "finished_at": _now(),
+            "rows_processed": progress.rows_processed,
+            "success": result.get("success", 0),
+            "failed": result.get("failed", 0),
+            "result": json.dumps(result, ensure_ascii=False, default=str),
+        })
+        print(f"[Import Job] {job_id} 완료 ({time.perf_counter() - started:.1f}s)")
+    except Exception as e:
+        db.rollback()
+        is_http = isinstance(e, HTTPException)
+        message = e.detail if is_http else str(e)
+        _save(job_id, {
+            "status": "failed",
+            "finished_at": _now(),
+            "rows_processed": progress.rows_processed,
+            "error": str(message),
+            "error_status": e.status_code if is_http else status.HTTP_500_INTERNAL_SERVER_ERROR,
+        })
+        print(f"[Import Job] {job_id} 실패: {message}")
+    finally:
+        heartbeat.stop()
+        db.close()
+
+
+def _fail(job_id: str, message: str, error_status: Optional[int] = None):
+    fields = {"status": "failed", "finished_at": _now(), "error": message}
+    if error_status is not None:
+        fields["error_status"] = error_status
+    _save(job_id, fields)
+    print(f"[Import Job] {job_id} 실패: {message}")
+
+
+def process_next_job(slot: int = 0, timeout: int = 5) -> bool:
+    """
+    대기열에서 작업 하나를 꺼내 실행 (대기열이 비어 있으면 timeout초 대기 후 False)
+
+    꺼낸 작업은 슬롯의 처리 중 리스트로 옮겨지고 바로 running으로 기록됨
+    → 이후 어느 시점에 프로세스가 죽어도 heartbeat 끊김(_mark_stale) 또는 재시작 시 정리(recover_jobs)로 failed 처리
+    """
+    processing_key = _processing_key(slot)
+    job_id = redis_client.blmove(JOB_QUEUE_KEY, processing_key, timeout, "LEFT", "RIGHT")
+    if job_id is None:
+        return False
+    _save(job_id, {"status": "running", "started_at": _now(), "owner": _owner(), "heartbeat_at": time.time()})
+    try:
+        raw = redis_client.get(_payload_key(job_id))
+        if raw is None:
+            _fail(job_id, "작업 데이터가 만료되었습니다. 파일을 다시 업로드하세요.")
+            return True
+        payload = json.loads(raw)
+        func = _handlers.get(payload["handler"])
+        if func is None:
+            _fail(job_id, f"알 수 없는 임포트 작업입니다: {payload['handler']}")
+        else:
+            _run(job_id, func, _decode_args(payload["args"]))
+        redis_client.delete(_payload_key(job_id))
+    finally:
+        redis_client.lrem(processing_key, 0, job_id)
+    return True
+
+
+def recover_jobs(slot: int = 0) -> int:
+    """
+    슬롯의 처리 중 리스트에 남은 작업을 failed로 정리 (워커 시작 시 호출)
+
+    남아 있는 작업 = 이전 프로세스가 실행 도중 죽은 작업
+    (메모리 부족 등으로 죽었을 수 있으므로 대기열에 다시 넣지 않고 실패로 알림)
+    """
+    processing_key = _processing_key(slot)
+    recovered = 0
+    while True:
+        job_id = redis_client.lpop(processing_key)
+        if job_id is None:
+            return recovered
+        redis_client.delete(_payload_key(job_id))
+        # 끝난 작업은 리스트에서 빠지기 직전에 죽은 경우 → 결과 유지
+        if redis_client.hget(_job_key(job_id), "status") in ("succeeded", "failed"):
+            continue
+        _fail(
+            job_id,
+            "임포트 워커가 작업 도중 재시작되어 작업이 중단되었습니다. 다시 시도하세요.",
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+        recovered += 1
+
+
+def run_worker(slot: int = 0):
+    """임포트 워커 프로세스 본체 (Redis 장애 시 잠시 쉬고 재시도)"""
+    print(f"[Import Job] 워커 시작 ({_owner()}, slot={slot}, handlers={sorted(_handlers)})")
+    _WorkerHeartbeat().start()
+    try:
+        recovered = recover_jobs(slot)
+        if recovered:
+            print(f"[Import Job] 중단된 작업 {recovered}건 failed 처리 (slot={slot})")
+    except redis.RedisError as e:
+        print(f"[Import Job] 중단된 작업 정리 실패: {e}")
+    while True:
+        try:
+            process_next_job(slot)
+        except redis.RedisError as e:
+            print(f"[Import Job] 대기열 조회 실패: {e}")
+            time.sleep(IMPORT_JOB_HEARTBEAT_INTERVAL)
+
+
+# ==================== 제출 (API 워커) ====================
+async def run_import_job(kind: str, user_id: str, background: bool, func: Callable, *args):
+    """
+    임포트 작업 제출
+
+    Args:
+        kind: 작업 종류 (예: "subject_records")
+        func: @import_job_handler로 등록한 func(db, progress, *args) → {"success", "failed", "errors", ...}
+        background: True면 202와 job_id를 바로 반환, False면 결과를 기다려 반환
+    """
+    if _handlers.get(func.__name__) is not func:
+        raise RuntimeError(f"{func.__name__}는 @import_job_handler로 등록되지 않았습니다")
+
+    job_id = uuid.uuid4().hex
+    try:
+        fields = {
+            "job_id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "created_by": user_id,
+            "created_at": _now(),
+            "rows_processed": 0,
+            "success": 0,
+            "failed": 0,
+        }
+        payload = json.dumps({"handler": func.__name__, "args": _encode_args(args)}, ensure_ascii=False)
+        enqueued = _ENQUEUE_SCRIPT(
+            keys=[JOB_QUEUE_KEY, _job_key(job_id), _payload_key(job_id)],
+            args=[IMPORT_JOB_MAX_PENDING, IMPORT_JOB_TTL, job_id, payload,
+                  *[item for pair in fields.items() for item in pair]],
+        )
+    except redis.RedisError as e:
+        print(f"[Import Job] {job_id} 제출 실패: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="작업을 등록할 수 없습니다. 잠시 후 다시 시도하세요.",
+        )
+    if not enqueued:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="진행 중인 임포트가 많습니다. 잠시 후 다시 시도하세요.",
+            headers={"Retry-After": "10"},
+        )
+    print(f"[Import Job] {job_id} 제출 ({kind}, {user_id})")
+
+    if background:
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content={"job_id": job_id, "status": "queued"})
+    return await _wait_for_result(job_id)
+
+
+async def _wait_for_result(job_id: str) -> dict:
+    """background=false: 작업이 끝날 때까지 상태를 조회해 결과 반환 (실패면 작업의 에러 코드로 응답)"""
+    deadline = time.monotonic() + IMPORT_JOB_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        job = await run_in_threadpool(get_job, job_id)
+        if job is None:
+            break
+        if job["status"] == "succeeded":
+            return job["result"]
+        if job["status"] == "failed":
+            raise HTTPException(status_code=job["error_status"] or 400, detail=job["error"])
+        await asyncio.sleep(IMPORT_JOB_PROGRESS_INTERVAL)
+    raise HTTPException(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        detail=f"작업이 아직 끝나지 않았습니다. GET /api/jobs/{job_id}로 확인하세요.",
+    )
+
+
+# ==================== 조회 ====================
+def _mark_stale(job_id: str, fields: dict) -> dict:
+    """heartbeat가 끊긴 실행 중 작업을 실패로 표시 (워커 프로세스 중단)"""
+    heartbeat_at = float(fields.get("heartbeat_at") or 0)
+    if fields.get("status") != "running" or time.time() - heartbeat_at < IMPORT_JOB_STALE_SECONDS:
+        return fields
+    stale = {
+        "status": "failed",
+        "finished_at": _now(),
+        "error": f"임포트 워커({fields.get('owner')})가 응답하지 않아 작업이 중단되었습니다. 다시 시도하세요.",
+        "error_status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+    }
+    _save(job_id, stale)
+    print(f"[Import Job] {job_id} heartbeat 끊김 → failed ({fields.get('owner')})")
+    return {**fields, **stale}
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """작업 상태 조회 (없거나 만료되면 None)"""
+    try:
+        fields = redis_client.hgetall(_job_key(job_id))
+    except redis.RedisError as e:
+        print(f"[Import Job] {job_id} 조회 실패: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="작업 상태를 조회할 수 없습니다.")
+    if not fields:
+        return None
+    fields = _mark_stale(job_id, fields)
+
+    result = json.loads(fields["result"]) if fields.get("result") else None
+    return {
+        "job_id": fields.get("job_id", job_id),
+        "kind": fields.get("kind"),
+        "status": fields.get("status"),
+        "created_by": fields.get("created_by"),
+        "created_at": fields.get("created_at"),
+        "started_at": fields.get("started_at"),
+        "finished_at": fields.get("finished_at"),
+        "owner": fields.get("owner"),
+        "rows_processed": int(fields.get("rows_processed", 0)),
+        "success": int(fields.get("success", 0)),
+        "failed": int(fields.get("failed", 0)),
+        "errors": result.get("errors", []) if result else [],
+        "error": fields.get("error"),
+        "error_status": int(fields["error_status"]) if fields.get("error_status") else None,
+        "result": result,
+    }
+
+
+def get_job_pool_stats() -> dict:
+    """임포트 대기열 상태 (전체 기준, workers는 heartbeat가 살아 있는 워커 프로세스 수)"""
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.zremrangebyscore(WORKER_REGISTRY_KEY, "-inf", time.time() - IMPORT_JOB_STALE_SECONDS)
+        pipe.zcard(WORKER_REGISTRY_KEY)
+        pipe.llen(JOB_QUEUE_KEY)
+        _, workers, queue_depth = pipe.execute()
+    except redis.RedisError as e:
+        print(f"[Import Job] 대기열 조회 실패: {e}")
+        workers = queue_depth = None
+    return {
+        "workers": workers,
+        "max_pending": IMPORT_JOB_MAX_PENDING,
+        "queue_depth": queue_depth,
+    }
@@ -1,55 +1,50 @@
 import os
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Body, Form
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Body, Form, Query
 from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List
 from pydantic import BaseModel
 #from passlib.context import CryptContext
-from jose import JWTError, jwt
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
 from io import BytesIO
-from activity import router as activity_router
-from assignments import router as assignments_router
-import redis
 import re
 import bcrypt
+from database import SessionLocal, warm_up_pools, warm_up_async_pool, get_db_pool_stats
 from dependencies import (
-    get_db, get_current_user, require_admin, require_teacher_or_admin,
-    SessionLocal, engine,
-    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES,
-    oauth2_scheme
+    get_db, get_async_db, get_current_user, get_token_claims, require_admin, require_teacher_or_admin,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    create_access_token, build_token_data, bump_token_version
+)
+from user_cache import invalidate_user, get_user_cache_stats
+from pagination import (
+    fetch_page, sort_columns_sql, strip_sort_columns, int_key, text_keys,
+    NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, MAX_PAGE_SIZE
+)
+from serialization import fast_json_response
+from bulk_sql import bulk_upsert, preview_upsert, fetch_existing
+from excel_io import iter_workbook_rows, find_header, row_values, write_workbook_file, xlsx_file_response
+from schema import ensure_required_columns
+from access_scope import ensure_teacher_access_scopes, refresh_teacher_access_scope, ACCESSIBLE_RECORD_CONDITION
+from record_locks import (
+    acquire_lock, release_lock, release_lock_after_save, get_lock_owner, get_lock_owners, extend_lock, check_write_fence
 )
+from passwords import (
+    verify_password_async, get_password_hash_async, hash_passwords_bulk, hash_passwords_bulk_async,
+    get_password_pool_stats
+)
+from jobs import JobProgress, import_job_handler, run_import_job, get_job, get_job_pool_stats
 from activity import router as activity_router
 from assignments import router as assignments_router
 
-# Configuration
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL environment variable not set")
-
-REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
-redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30  # 0.5 hours
-
-# Database setup
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Redis setup
-redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-
 # Password hashing
 #pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# OAuth2
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/token")
-
 # FastAPI app
 app = FastAPI(title="Teacher Logbook API", version="1.0.0", root_path="/api")
 
@@ -64,6 +59,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER],
 )
 
 
@@ -136,6 +132,7 @@ class RecordCreate(BaseModel):
 
 class RecordUpdate(BaseModel):
     content: str
+    lock_token: Optional[int] = None  # 잠금 획득 시 받은 fencing token
 
 
 class Record(BaseModel):
@@ -158,6 +155,7 @@ class RecordWithDetails(Record):
     subject_name: Optional[str] = None
     is_locked: bool = False
     locked_by: Optional[str] = None
+    has_content: Optional[bool] = None
 
 
 class CommentCreate(BaseModel):
@@ -201,63 +199,13 @@ def calculate_byte_count(text: str) -> tuple:
     return char_count, byte_count
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-#    return pwd_context.verify(plain_password, hashed_password)
-    try:
-        if not plain_password or not hashed_password:
-            return False
-        # 입력값 검증
-        return bcrypt.checkpw(
-            plain_password.encode('utf-8'),
-            hashed_password.encode('utf-8')
-        )
-    except Exception as e:
-        print(f"verify_password error: {e}")
-        return False
-
-def get_password_hash(password: str) -> str:
-#    return pwd_context.hash(password)
-    try:
-        if not password:
-            raise ValueError("Password cannot be empty")
-        
-        password = password.strip()
-        
-        if len(password.encode('utf-8')) > 72:
-            raise ValueError("Password too long (max 72 bytes)")
-        
-        salt = bcrypt.gensalt(rounds=12)
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
-    except Exception as e:
-        print(f"get_password_hash error: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Password hashing failed: {str(e)}"
-        )
-
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=15))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-def _build_record_response(r, include_lock=False):
+def _build_record_response(r, include_lock=False, lock_owner=None):
     """Build record response dict"""
     response = {
         "id": r.id,
         "student_user_id": r.student_user_id,
         "subject_id": r.subject_id,
-        "content": r.content,
+        "content": getattr(r, 'content', None),
         "char_count": r.char_count,
         "byte_count": r.byte_count,
         "is_editable_by_student": r.is_editable_by_student,
@@ -266,8 +214,9 @@ def _build_record_response(r, include_lock=False):
     }
     if hasattr(r, 'student_name'):
         response.update({"student_name": r.student_name, "subject_name": r.subject_name})
+    if hasattr(r, 'has_content'):
+        response["has_content"] = r.has_content
     if include_lock:
-        lock_owner = get_lock_owner(r.id)
         response.update({"is_locked": lock_owner is not None, "locked_by": lock_owner})
     return response
 
@@ -286,48 +235,32 @@ def _build_user_response(u):
     }
 
 
-# Lock management functions
-def acquire_lock(record_id: int, user_id: str, duration_minutes: int = 30) -> bool:
-    """Acquire edit lock for a record"""
-    lock_key = f"record_lock:{record_id}"
-    
-    # Check if already locked
-    existing_lock = redis_client.get(lock_key)
-    if existing_lock and existing_lock != user_id:
-        return False
-    
-    # Set lock with expiration
-    redis_client.setex(lock_key, duration_minutes * 60, user_id)
-    return True
-
-
-def release_lock(record_id: int, user_id: str) -> bool:
-    """Release edit lock for a record"""
-    lock_key = f"record_lock:{record_id}"
-    
-    # Only release if current user owns the lock
-    current_lock = redis_client.get(lock_key)
-    if current_lock == user_id:
-        redis_client.delete(lock_key)
-        return True
-    return False
-
-
-def get_lock_owner(record_id: int) -> Optional[str]:
-    """Get the current lock owner for a record"""
-    lock_key = f"record_lock:{record_id}"
-    return redis_client.get(lock_key)
+# Startup
+def _ensure_schema():
+    """
+    마이그레이션 전 기존 DB에서도 코드가 쓰는 컬럼/파생 테이블(교사 접근 범위)이 있도록 추가
+    - 추가하지 못하면 예외로 워커 시작을 중단 (요청마다 500이 나는 대신 시작 시 한 번에 드러나도록)
+    """
+    db = SessionLocal()
+    try:
+        added = ensure_required_columns(db)
+        if added:
+            print(f"[Startup] 누락 컬럼 추가: {', '.join(added)}")
+        if ensure_teacher_access_scopes(db):
+            print("[Startup] teacher_access_scopes 생성 및 백필 완료")
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
 
-def extend_lock(record_id: int, user_id: str, duration_minutes: int = 30) -> bool:
-    """Extend lock duration"""
-    lock_key = f"record_lock:{record_id}"
-    current_lock = redis_client.get(lock_key)
-    
-    if current_lock == user_id:
-        redis_client.expire(lock_key, duration_minutes * 60)
-        return True
-    return False
+@app.on_event("startup")
+async def startup():
+    await run_in_threadpool(_ensure_schema)
+    await run_in_threadpool(warm_up_pools)
+    await warm_up_async_pool()
 
 
 # API Routes
@@ -342,6 +275,20 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/api/admin/metrics")
+async def get_metrics(current_user = Depends(get_current_user)):
+    """워커 단위 성능 지표 (admin only)"""
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return {
+        "user_cache": get_user_cache_stats(),
+        "password_pool": get_password_pool_stats(),
+        "import_jobs": get_job_pool_stats(),
+        "connection_pools": get_db_pool_stats(),
+    }
+
+
 @app.post("/api/token", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     # Query user
@@ -350,7 +297,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
         {"user_id": form_data.username}
     ).fetchone()
     
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not user or not await verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -359,7 +306,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.user_id}, expires_delta=access_token_expires
+        data=build_token_data(user), expires_delta=access_token_expires
     )
     
     return {
@@ -395,7 +342,7 @@ async def update_user_me(
     if user_update.full_name:
         update_data["full_name"] = user_update.full_name
     if user_update.password:
-        update_data["password_hash"] = get_password_hash(user_update.password)
+        update_data["password_hash"] = await get_password_hash_async(user_update.password)
     
     if update_data:
         update_data["updated_at"] = datetime.now(timezone.utc)
@@ -406,6 +353,7 @@ async def update_user_me(
         result = db.execute(text(query), update_data)
         db.commit()
         updated_user = result.fetchone()
+        invalidate_user(current_user.user_id)
         
         return _build_user_response(updated_user)
     
@@ -416,7 +364,7 @@ async def update_user_me(
 async def refresh_token(current_user = Depends(get_current_user)):
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": current_user.user_id}, expires_delta=access_token_expires
+        data=build_token_data(current_user), expires_delta=access_token_expires
     )
     
     return {
@@ -430,7 +378,7 @@ async def refresh_token(current_user = Depends(get_current_user)):
 
 @app.get("/api/subjects", response_model=List[Subject])
 async def get_subjects(
-    current_user = Depends(get_current_user),
+    current_user = Depends(get_token_claims),
     db: Session = Depends(get_db)
 ):
     result = db.execute(text("SELECT * FROM subjects ORDER BY subject_name"))
@@ -483,38 +431,137 @@ async def create_subject(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.get("/api/records", response_model=List[RecordWithDetails])
-async def get_records(
+# 본문 컬럼 (TOAST 대상) — 요약 조회(view=summary)에서는 읽지 않고 /api/records/content로 따로 조회
+RECORD_TEXT_COLUMNS = ("content", "remarks", "gifted_education")
+RECORD_SUMMARY_COLUMNS = (
+    "id", "student_user_id", "subject_id", "record_type",
+    "school_year", "semester", "grade", "class_number", "number_in_class", "student_name",
+    "student_number", "subject_name", "subject_code", "class_and_number", "status",
+    "hours", "club_category", "club_name", "club_hours", "record_hours",
+    "char_count", "byte_count", "is_editable_by_student", "created_by", "created_at", "updated_at",
+)
+# 전체 조회 컬럼 — r.*를 쓰지 않고 명시 (content_hash/lock_fence 같은 내부 컬럼은 응답에 싣지 않음)
+RECORD_FULL_COLUMNS = RECORD_SUMMARY_COLUMNS + RECORD_TEXT_COLUMNS
+
+
+def _record_columns(view: Optional[str]) -> str:
+    """
+    목록 조회 컬럼
+    - full(기본): RECORD_FULL_COLUMNS (내부 컬럼 제외)
+    - summary: 본문 제외 + has_content (IS NOT NULL은 TOAST를 풀지 않음)
+      과목 기록은 content, 활동 기록은 remarks에 본문이 있으므로 둘 중 하나라도 있으면 true
+    """
+    if view in (None, "full"):
+        return ", ".join(f"r.{c}" for c in RECORD_FULL_COLUMNS)
+    if view == "summary":
+        columns = ", ".join(f"r.{c}" for c in RECORD_SUMMARY_COLUMNS)
+        return f"{columns}, (r.content IS NOT NULL OR r.remarks IS NOT NULL) AS has_content"
+    raise HTTPException(status_code=400, detail="view는 full 또는 summary만 가능합니다.")
+
+
+# 목록 정렬 키 (키셋 페이지네이션 커서와 ORDER BY가 같은 식을 사용)
+# - 기존 정렬(학년, 반, 번호, 과목명)을 records 컬럼으로 유지
+#   학년/반/번호는 기록의 값, 과목명은 records.subject_name (create_record/임포트가 채우고 과목 임포트 시 동기화)
+# - records 컬럼만 사용 (조인 테이블 컬럼이 섞이면 인덱스로 정렬/커서 비교를 못 함)
+# - NULL 가능 컬럼은 int_key/text_keys로 치환 (행 비교에서 NULL이면 해당 행이 빠지므로)
+#   → idx_records_list_order_name / idx_records_year_list_order_name이 이 식 그대로의 인덱스
+RECORD_LIST_SORT_KEYS = (
+    int_key("r.grade"), int_key("r.class_number"), int_key("r.number_in_class"),
+    *text_keys("r.subject_name"), "r.id",
+)
+ACCESSIBLE_RECORD_SORT_KEYS = RECORD_LIST_SORT_KEYS
+
+# 목록 쿼리 뼈대 ({columns} ← _record_columns(view), 필터는 " AND ..."로 덧붙임)
+# scripts/check_query_plans.py도 이 상수로 실행 계획을 점검하므로 쿼리 모양은 여기서만 수정
+RECORD_LIST_QUERY = (
+    "SELECT {columns}, u.full_name as student_name, s.subject_name"
+    + sort_columns_sql(RECORD_LIST_SORT_KEYS)
+    + " FROM records r LEFT JOIN users u ON r.student_user_id = u.user_id"
+    " LEFT JOIN subjects s ON r.subject_id = s.id WHERE 1=1"
+)
+
+
+def _record_list_filters(
+    params: dict,
     student_user_id: Optional[str] = None,
     subject_id: Optional[int] = None,
     grade: Optional[int] = None,
     class_number: Optional[int] = None,
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    if current_user.role == 'student':
-        student_user_id = current_user.user_id
-
-    query = "SELECT r.*, u.full_name as student_name, s.subject_name FROM records r LEFT JOIN users u ON r.student_user_id = u.user_id LEFT JOIN subjects s ON r.subject_id = s.id WHERE 1=1"
-    params = {}
-    
+) -> str:
+    """/api/records 선택 필터 → 덧붙일 WHERE 조건 (params도 함께 채움)"""
+    conditions = ""
     if student_user_id:
-        query += " AND r.student_user_id = :student_user_id"
+        conditions += " AND r.student_user_id = :student_user_id"
         params["student_user_id"] = student_user_id
     if subject_id:
-        query += " AND r.subject_id = :subject_id"
+        conditions += " AND r.subject_id = :subject_id"
         params["subject_id"] = subject_id
     if grade:
-        query += " AND u.grade = :grade"
+        conditions += " AND u.grade = :grade"
         params["grade"] = grade
     if class_number:
-        query += " AND u.class_number = :class_number"
+        conditions += " AND u.class_number = :class_number"
         params["class_number"] = class_number
+    return conditions
 
-    query += " ORDER BY u.grade, u.class_number, u.number_in_class, s.subject_name"
-    
-    records = db.execute(text(query), params).fetchall()
-    return [_build_record_response(r, include_lock=True) for r in records]
+
+@app.get("/api/records", response_model=List[RecordWithDetails])
+async def get_records(
+    response: Response,
+    student_user_id: Optional[str] = None,
+    subject_id: Optional[int] = None,
+    grade: Optional[int] = None,
+    class_number: Optional[int] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    view: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    기록 목록 조회
+    - 키셋 페이지네이션: limit 기본 DEFAULT_PAGE_SIZE, 최대 MAX_PAGE_SIZE (다음 페이지 커서는 X-Next-Cursor 헤더)
+    - include_total=true면 X-Total-Count 헤더에 근사 전체 건수
+    - view=summary면 본문 없이 조회 (content는 null, has_content로 유무 표시)
+    """
+    if current_user.role == 'student':
+        student_user_id = current_user.user_id
+
+    query = RECORD_LIST_QUERY.format(columns=_record_columns(view))
+    params = {}
+    query += _record_list_filters(params, student_user_id, subject_id, grade, class_number)
+
+    records = await fetch_page(db, response, query, params, RECORD_LIST_SORT_KEYS, limit, cursor, include_total)
+    lock_owners = await get_lock_owners(r.id for r in records)
+    return fast_json_response([
+        _build_record_response(r, include_lock=True, lock_owner=lock_owners.get(r.id))
+        for r in records
+    ], response)
+
+
+@app.get("/api/records/content")
+async def get_records_content(
+    ids: List[int] = Query(...),
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    본문 일괄 조회 (view=summary 목록에서 편집기를 열 때 사용)
+    - 학생은 본인 기록만 반환
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {MAX_PAGE_SIZE}건까지 조회할 수 있습니다.")
+
+    query = "SELECT id, content, remarks, gifted_education FROM records WHERE id = ANY(:ids)"
+    params = {"ids": ids}
+    if current_user.role == 'student':
+        query += " AND student_user_id = :student_user_id"
+        params["student_user_id"] = current_user.user_id
+
+    rows = (await db.execute(text(query), params)).fetchall()
+    return [dict(row._mapping) for row in rows]
 
 
 @app.get("/api/records/{record_id}", response_model=RecordWithDetails)
@@ -534,7 +581,8 @@ async def get_record(
     if current_user.role == 'student' and record.student_user_id != current_user.user_id:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    return _build_record_response(record, include_lock=True)
+    lock_owners = await get_lock_owners([record.id])
+    return _build_record_response(record, include_lock=True, lock_owner=lock_owners.get(record.id))
 
 
 @app.post("/api/records", response_model=Record)
@@ -549,8 +597,22 @@ async def create_record(
     char_count, byte_count = calculate_byte_count(record.content)
     
     try:
+        # 학년/반/번호/과목명은 목록 정렬 기준이므로 학생·과목 정보로 함께 채움
         result = db.execute(
-            text("INSERT INTO records (student_user_id, subject_id, content, char_count, byte_count) VALUES (:student_user_id, :subject_id, :content, :char_count, :byte_count) RETURNING *"),
+            text("""
+                INSERT INTO records (
+                    student_user_id, subject_id, content, char_count, byte_count,
+                    grade, class_number, number_in_class, student_name, student_number,
+                    subject_name, subject_code
+                )
+                SELECT :student_user_id, :subject_id, :content, :char_count, :byte_count,
+                       u.grade, u.class_number, u.number_in_class, u.full_name, u.student_number,
+                       s.subject_name, s.subject_code
+                FROM (SELECT 1) AS one
+                LEFT JOIN users u ON u.user_id = :student_user_id
+                LEFT JOIN subjects s ON s.id = :subject_id
+                RETURNING *
+            """),
             {
                 "student_user_id": record.student_user_id,
                 "subject_id": record.subject_id,
@@ -604,10 +666,11 @@ async def lock_record(
             raise HTTPException(status_code=403, detail="Record not editable by student")
     
     # Try to acquire lock
-    if acquire_lock(record_id, current_user.user_id):
-        return {"message": "Lock acquired", "locked_by": current_user.user_id}
+    fencing_token = await acquire_lock(record_id, current_user.user_id, stored_fence=record.lock_fence)
+    if fencing_token is not None:
+        return {"message": "Lock acquired", "locked_by": current_user.user_id, "fencing_token": fencing_token}
     else:
-        lock_owner = get_lock_owner(record_id)
+        lock_owner = await get_lock_owner(record_id)
         raise HTTPException(
             status_code=423,
             detail=f"Record is locked by {lock_owner}"
@@ -615,15 +678,23 @@ async def lock_record(
 
 
 @app.delete("/api/records/{record_id}/lock")
-async def unlock_record(record_id: int, current_user = Depends(get_current_user)):
-    if release_lock(record_id, current_user.user_id):
+async def unlock_record(
+    record_id: int,
+    lock_token: Optional[int] = None,
+    current_user = Depends(get_current_user)
+):
+    if await release_lock(record_id, current_user.user_id, lock_token):
         return {"message": "Lock released"}
     raise HTTPException(status_code=400, detail="You don't own this lock")
 
 
 @app.put("/api/records/{record_id}/lock/extend")
-async def extend_record_lock(record_id: int, current_user = Depends(get_current_user)):
-    if extend_lock(record_id, current_user.user_id):
+async def extend_record_lock(
+    record_id: int,
+    lock_token: Optional[int] = None,
+    current_user = Depends(get_current_user)
+):
+    if await extend_lock(record_id, current_user.user_id, token=lock_token):
         return {"message": "Lock extended"}
     raise HTTPException(status_code=400, detail="You don't own this lock")
 
@@ -647,24 +718,41 @@ async def update_record(
         if not record.is_editable_by_student:
             raise HTTPException(status_code=403, detail="Record not editable by student")
     
-    lock_owner = get_lock_owner(record_id)
-    if lock_owner and lock_owner != current_user.user_id:
-        raise HTTPException(status_code=423, detail=f"Record is locked by {lock_owner}")
+    # 다른 사용자의 잠금 / 오래된 fencing token이면 거절
+    await check_write_fence(record_id, current_user.user_id, record_update.lock_token)
     
     char_count, byte_count = calculate_byte_count(record_update.content)
     
     try:
+        # 직접 수정하면 임포트 해시를 지워 다음 엑셀 임포트가 다시 덮어쓰도록 함
+        # fencing token은 행에도 기록하고 같은 문장에서 비교
+        # → 위 Redis 검사 뒤에 잠금이 만료/재획득되어도 오래된 token의 저장은 반영되지 않음
         result = db.execute(
-            text("UPDATE records SET content = :content, char_count = :char_count, byte_count = :byte_count, updated_at = CURRENT_TIMESTAMP WHERE id = :id RETURNING *"),
+            text("""
+                UPDATE records
+                SET content = :content, char_count = :char_count, byte_count = :byte_count,
+                    content_hash = NULL, lock_fence = COALESCE(CAST(:token AS BIGINT), lock_fence),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = :id
+                AND (CAST(:token AS BIGINT) IS NULL OR lock_fence IS NULL OR lock_fence <= CAST(:token AS BIGINT))
+                RETURNING *
+            """),
             {
                 "id": record_id,
                 "content": record_update.content,
                 "char_count": char_count,
-                "byte_count": byte_count
+                "byte_count": byte_count,
+                "token": record_update.lock_token
             }
         )
-        db.commit()
         updated_record = result.fetchone()
+        if not updated_record:
+            db.rollback()
+            raise HTTPException(
+                status_code=409,
+                detail="편집 잠금이 만료되었거나 다른 세션에서 다시 획득되었습니다. 잠금을 다시 획득하세요."
+            )
+        db.commit()
         
         db.execute(
             text("INSERT INTO record_versions (record_id, content, char_count, byte_count, edited_by, edit_type) VALUES (:record_id, :content, :char_count, :byte_count, :edited_by, :edit_type)"),
@@ -678,13 +766,16 @@ async def update_record(
             }
         )
         db.commit()
-        
-        release_lock(record_id, current_user.user_id)
-        
-        return _build_record_response(updated_record)
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
+    
+    # 저장은 이미 커밋됨 → 잠금 해제 실패(Redis 장애)로 저장 실패처럼 응답하지 않음
+    await release_lock_after_save(record_id, current_user.user_id, record_update.lock_token)
+
+    return _build_record_response(updated_record)
 
 
 @app.put("/api/records/{record_id}/permissions")
@@ -812,7 +903,7 @@ async def create_user(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     try:
-        password_hash = get_password_hash(user.password)
+        password_hash = await get_password_hash_async(user.password)
         
         result = db.execute(
             text("INSERT INTO users (user_id, password_hash, full_name, role, grade, class_number, number_in_class) VALUES (:user_id, :password_hash, :full_name, :role, :grade, :class_number, :number_in_class) RETURNING *"),
@@ -849,10 +940,14 @@ async def bulk_upload_users(
     created_count = 0
     errors = []
     
-    for user in users:
+    # 비밀번호 일괄 해싱 (병렬)
+    hashes = await hash_passwords_bulk_async([user.password for user in users])
+    
+    for user, (password_hash, hash_error) in zip(users, hashes):
+        if hash_error:
+            errors.append({"user_id": user.user_id, "error": hash_error})
+            continue
         try:
-            password_hash = get_password_hash(user.password)
-            
             db.execute(
                 text("""
                     INSERT INTO users (user_id, password_hash, full_name, role, grade, class_number, number_in_class)
@@ -917,6 +1012,7 @@ def reset_user_password(
         {"password_hash": hashed.decode('utf-8'), "user_id": user_id}
     )
     db.commit()
+    invalidate_user(user_id)
     
     return {"message": f"Password reset for {user_id}"}
 
@@ -996,22 +1092,70 @@ def download_excel_template(
 
 
 # ==================== Excel 파일 업로드 및 임포트 ====================
+
+IMPORT_DRY_RUN_ACTIONS = ("insert", "update", "unchanged", "duplicate", "error")
+
+
+def _dry_run_results(preview: list, errors: list) -> dict:
+    """
+    임포트 dry_run 응답 (DB에 쓰지 않음)
+    
+    Args:
+        preview: bulk_sql.preview_upsert 결과 (행별 insert/update/unchanged/duplicate)
+        errors: [(행 번호, 에러 메시지)]
+    """
+    rows = list(preview) + [{"row": idx, "action": "error", "error": message} for idx, message in errors]
+    rows.sort(key=lambda r: r["row"])
+    counts = {action: 0 for action in IMPORT_DRY_RUN_ACTIONS}
+    for row in rows:
+        counts[row["action"]] += 1
+    return {
+        "dry_run": True,
+        "success": len(rows) - counts["error"],
+        "failed": counts["error"],
+        **counts,
+        "rows": rows,
+        "errors": [row["error"] for row in rows if row["action"] == "error"]
+    }
+
 @app.post("/api/admin/import-excel/{import_type}")
 async def import_excel(
     import_type: str,
     file: UploadFile = File(...),
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    background: bool = True,
+    dry_run: bool = False,
+    current_user = Depends(get_current_user)
 ):
-    """Import data from Excel file (admin only)"""
+    """
+    Import data from Excel file (admin only)
+    
+    기본은 202와 job_id를 바로 반환 (GET /api/jobs/{job_id}로 진행 상황 조회), background=false면 끝날 때까지 기다려 결과 반환
+    dry_run=true면 저장하지 않고 행별 insert/update/unchanged/error만 반환
+    """
     
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin only")
     
+    if import_type not in ("users", "subjects"):
+        raise HTTPException(status_code=400, detail="Invalid import type")
+    
     # 파일 읽기
     contents = await file.read()
-    wb = load_workbook(BytesIO(contents))
-    ws = wb.active
+    
+    return await run_import_job(
+        f"excel_{import_type}", current_user.user_id, background,
+        _import_excel_rows, import_type, contents, dry_run
+    )
+
+
+USER_IMPORT_COMPARE_COLUMNS = ("full_name", "role", "student_number", "grade", "class_number", "number_in_class")
+USER_IMPORT_COLUMNS = ("user_id", "password_hash") + USER_IMPORT_COMPARE_COLUMNS
+SUBJECT_IMPORT_COMPARE_COLUMNS = ("subject_name", "description")
+
+
+@import_job_handler
+def _import_excel_rows(db: Session, progress: JobProgress, import_type: str, contents: bytes, dry_run: bool = False) -> dict:
+    """import_excel 작업 본문 (임포트 워커 프로세스에서 실행)"""
     
     results = {
         "success": 0,
@@ -1021,157 +1165,164 @@ async def import_excel(
     
     if import_type == "users":
         # 헤더 건너뛰기
-        rows = list(ws.iter_rows(min_row=2, values_only=True))
+        rows = iter_workbook_rows(contents, min_row=2, width=8)
+        imported_user_ids = []
+        changed_scope_user_ids = []
         
-        for idx, row in enumerate(rows, start=2):
+        # 1단계: 행 검증
+        valid_rows = []
+        invalid_rows = []
+        for idx, row in rows:
             try:
                 user_id, password, full_name, role, student_number, grade, class_number, number_in_class = row
                 
                 # 필수 필드 검증
                 if not user_id or not password or not role:
-                    results["errors"].append(f"Row {idx}: Missing required fields")
-                    results["failed"] += 1
+                    invalid_rows.append((idx, f"Row {idx}: Missing required fields"))
                     continue
                 
                 # 역할 검증
                 if role not in ["admin", "teacher", "student"]:
-                    results["errors"].append(f"Row {idx}: Invalid role '{role}'")
-                    results["failed"] += 1
+                    invalid_rows.append((idx, f"Row {idx}: Invalid role '{role}'"))
                     continue
                 
                 # 학생인 경우 추가 필드 검증
                 if role == "student":
                     if not student_number or not grade or not class_number or not number_in_class:
-                        results["errors"].append(f"Row {idx}: Students require student_number, grade, class_number, number_in_class")
-                        results["failed"] += 1
+                        invalid_rows.append((idx, f"Row {idx}: Students require student_number, grade, class_number, number_in_class"))
                         continue
                 
-                # 기존 사용자 확인 (Raw SQL)
-                result = db.execute(
-                    text("SELECT * FROM users WHERE user_id = :user_id"),
-                    {"user_id": user_id}
-                )
-                existing_user = result.fetchone()
-                
-                if existing_user:
-                    # 업데이트
-                    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()) if password else None
-                    
-                    if hashed:
-                        db.execute(
-                            text("""UPDATE users 
-                                   SET full_name = :full_name, password_hash = :password_hash, role = :role,
-                                       student_number = :student_number, grade = :grade, 
-                                       class_number = :class_number, number_in_class = :number_in_class
-                                   WHERE user_id = :user_id"""),
-                            {
-                                "user_id": user_id,
-                                "full_name": full_name,
-                                "password_hash": hashed.decode('utf-8'),
-                                "role": role,
-                                "student_number": student_number,
-                                "grade": grade,
-                                "class_number": class_number,
-                                "number_in_class": number_in_class
-                            }
-                        )
-                    else:
-                        db.execute(
-                            text("""UPDATE users 
-                                   SET full_name = :full_name, role = :role,
-                                       student_number = :student_number, grade = :grade, 
-                                       class_number = :class_number, number_in_class = :number_in_class
-                                   WHERE user_id = :user_id"""),
-                            {
-                                "user_id": user_id,
-                                "full_name": full_name,
-                                "role": role,
-                                "student_number": student_number,
-                                "grade": grade,
-                                "class_number": class_number,
-                                "number_in_class": number_in_class
-                            }
-                        )
-                else:
-                    # 새로 생성
-                    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-                    db.execute(
-                        text("""INSERT INTO users (user_id, password_hash, full_name, role, student_number, grade, class_number, number_in_class)
-                               VALUES (:user_id, :password_hash, :full_name, :role, :student_number, :grade, :class_number, :number_in_class)"""),
-                        {
-                            "user_id": user_id,
-                            "password_hash": hashed.decode('utf-8'),
-                            "full_name": full_name,
-                            "role": role,
-                            "student_number": student_number,
-                            "grade": grade,
-                            "class_number": class_number,
-                            "number_in_class": number_in_class
-                        }
-                    )
-                
-                db.commit()
-                results["success"] += 1
-                
+                valid_rows.append((idx, row))
             except Exception as e:
-                db.rollback()
-                results["errors"].append(f"Row {idx}: {str(e)}")
-                results["failed"] += 1
+                invalid_rows.append((idx, f"Row {idx}: {str(e)}"))
+            finally:
+                progress.tick(results["success"], len(invalid_rows))
+        
+        if dry_run:
+            # 비밀번호는 해시라 비교하지 않음 (실제 임포트는 기존 사용자 비밀번호도 재설정)
+            preview = preview_upsert(
+                db, "users",
+                [(idx, {"user_id": str(row[0]), **dict(zip(USER_IMPORT_COMPARE_COLUMNS, row[2:]))}) for idx, row in valid_rows],
+                ("user_id",), USER_IMPORT_COMPARE_COLUMNS
+            )
+            return _dry_run_results(preview, invalid_rows)
+        
+        # 2단계: 비밀번호 일괄 해싱 (병렬)
+        hashes = hash_passwords_bulk([str(row[1]) for _, row in valid_rows])
+        
+        upsert_rows = []
+        for (idx, row), (hashed, hash_error) in zip(valid_rows, hashes):
+            if hash_error:
+                invalid_rows.append((idx, f"Row {idx}: {hash_error}"))
+                continue
+            user_id, password, full_name, role, student_number, grade, class_number, number_in_class = row
+            upsert_rows.append((idx, {
+                "user_id": str(user_id),
+                "password_hash": hashed,
+                "full_name": full_name,
+                "role": role,
+                "student_number": student_number,
+                "grade": grade,
+                "class_number": class_number,
+                "number_in_class": number_in_class
+            }))
+        
+        # 3단계: 기존 사용자(캐시 무효화/토큰 버전 판단용)를 한 번에 조회 후 다건 upsert, commit 1번
+        existing_users = fetch_existing(
+            db, "users", ("user_id",), upsert_rows, ("role", "grade", "class_number")
+        )
+        upserted = bulk_upsert(
+            db,
+            "users",
+            USER_IMPORT_COLUMNS,
+            upsert_rows,
+            conflict_target="(user_id)",
+            conflict_columns=("user_id",),
+            update_columns=USER_IMPORT_COLUMNS[1:],
+            log_tag="Import Users",
+        )
+        db.commit()
+        
+        failed_rows = {idx for idx, _ in upserted.errors}
+        invalid_rows.extend((idx, f"Row {idx}: {message}") for idx, message in upserted.errors)
+        for idx, values in upsert_rows:
+            existing_user = existing_users.get((values["user_id"],))
+            if idx in failed_rows or not existing_user:
+                continue
+            imported_user_ids.append(values["user_id"])
+            if (existing_user["role"], existing_user["grade"], existing_user["class_number"]) != (
+                values["role"], values["grade"], values["class_number"]
+            ):
+                changed_scope_user_ids.append(values["user_id"])
+        
+        invalid_rows.sort(key=lambda e: e[0])
+        results["success"] = upserted.success
+        results["failed"] = len(invalid_rows)
+        results["errors"] = [message for _, message in invalid_rows]
+        progress.tick(results["success"], results["failed"], rows=0)
+        
+        # 버전을 먼저 올려야 무효화 직후 다시 채워진 사용자 캐시에 옛 버전이 남지 않음
+        bump_token_version(db, *changed_scope_user_ids)
+        invalidate_user(*imported_user_ids)
     
     elif import_type == "subjects":
-        rows = list(ws.iter_rows(min_row=2, values_only=True))
-        
-        for idx, row in enumerate(rows, start=2):
+        # 1단계: 행 검증
+        valid_rows = []
+        invalid_rows = []
+        for idx, row in iter_workbook_rows(contents, min_row=2, width=3):
             try:
                 subject_code, subject_name, description = row
                 
                 # 필수 필드 검증
                 if not subject_code or not subject_name:
-                    results["errors"].append(f"Row {idx}: Missing required fields")
-                    results["failed"] += 1
+                    invalid_rows.append((idx, f"Row {idx}: Missing required fields"))
                     continue
                 
-                # 기존 과목 확인 (Raw SQL)
-                result = db.execute(
-                    text("SELECT * FROM subjects WHERE subject_code = :subject_code"),
-                    {"subject_code": subject_code}
-                )
-                existing_subject = result.fetchone()
-                
-                if existing_subject:
-                    # 업데이트
-                    db.execute(
-                        text("""UPDATE subjects 
-                               SET subject_name = :subject_name, description = :description
-                               WHERE subject_code = :subject_code"""),
-                        {
-                            "subject_code": subject_code,
-                            "subject_name": subject_name,
-                            "description": description
-                        }
-                    )
-                else:
-                    # 새로 생성
-                    db.execute(
-                        text("""INSERT INTO subjects (subject_code, subject_name, description)
-                               VALUES (:subject_code, :subject_name, :description)"""),
-                        {
-                            "subject_code": subject_code,
-                            "subject_name": subject_name,
-                            "description": description
-                        }
-                    )
-                
-                db.commit()
-                results["success"] += 1
-                
+                valid_rows.append((idx, {
+                    "subject_code": str(subject_code),
+                    "subject_name": subject_name,
+                    "description": description
+                }))
             except Exception as e:
-                db.rollback()
-                results["errors"].append(f"Row {idx}: {str(e)}")
-                results["failed"] += 1
-    
-    else:
-        raise HTTPException(status_code=400, detail="Invalid import type")
+                invalid_rows.append((idx, f"Row {idx}: {str(e)}"))
+            finally:
+                progress.tick(0, len(invalid_rows))
+        
+        if dry_run:
+            preview = preview_upsert(db, "subjects", valid_rows, ("subject_code",), SUBJECT_IMPORT_COMPARE_COLUMNS)
+            return _dry_run_results(preview, invalid_rows)
+        
+        # 2단계: 다건 upsert, commit 1번
+        upserted = bulk_upsert(
+            db,
+            "subjects",
+            ("subject_code",) + SUBJECT_IMPORT_COMPARE_COLUMNS,
+            valid_rows,
+            conflict_target="(subject_code)",
+            conflict_columns=("subject_code",),
+            update_columns=SUBJECT_IMPORT_COMPARE_COLUMNS,
+            log_tag="Import Subjects",
+        )
+        # 과목명이 바뀌었으면 기록의 과목명(목록 정렬 키)도 맞춤
+        db.execute(
+            text("""
+                UPDATE records r
+                SET subject_name = s.subject_name
+                FROM subjects s
+                WHERE r.subject_id = s.id
+                  AND s.subject_code = ANY(:subject_codes)
+                  AND r.subject_name IS DISTINCT FROM s.subject_name
+            """),
+            {"subject_codes": [values["subject_code"] for _, values in valid_rows]}
+        )
+        db.commit()
+        
+        invalid_rows.extend((idx, f"Row {idx}: {message}") for idx, message in upserted.errors)
+        invalid_rows.sort(key=lambda e: e[0])
+        results["success"] = upserted.success
+        results["failed"] = len(invalid_rows)
+        results["errors"] = [message for _, message in invalid_rows]
+        progress.tick(results["success"], results["failed"], rows=0)
     
     return results
 
@@ -1183,26 +1334,67 @@ def bulk_delete_users(
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Bulk delete users (admin only)"""
+    """
+    Bulk delete users (admin only)
+    
+    요청 ID 목록을 한 문장으로 삭제 (ID 개수와 무관하게 쿼리 1번, 트랜잭션 1번)
+    
+    Returns:
+        {"message", "deleted": int, "deleted_ids": [], "blocked": [{"user_id", "reason"}], "errors": []}
+        - blocked: 자기 자신이거나 존재하지 않는 ID
+    """
     
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin only")
     
-    deleted_count = 0
+    try:
+        rows = db.execute(
+            text("""
+                WITH deleted AS (
+                    DELETE FROM users
+                    WHERE user_id = ANY(:user_ids) AND user_id <> :self_id
+                    RETURNING user_id
+                )
+                SELECT
+                    r.user_id,
+                    d.user_id IS NOT NULL AS deleted,
+                    CASE
+                        WHEN d.user_id IS NOT NULL THEN NULL
+                        WHEN r.user_id = :self_id THEN 'self'
+                        ELSE 'not_found'
+                    END AS reason
+                FROM (SELECT DISTINCT unnest(CAST(:user_ids AS VARCHAR[])) AS user_id) r
+                LEFT JOIN deleted d ON d.user_id = r.user_id
+                ORDER BY r.user_id
+            """),
+            {"user_ids": user_ids, "self_id": current_user.user_id}
+        ).fetchall()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     
-    for user_id in user_ids:
-        try:
-            db.execute(
-                text("DELETE FROM users WHERE user_id = :user_id"),
-                {"user_id": user_id}
-            )
-            db.commit()
-            deleted_count += 1
-        except Exception as e:
-            db.rollback()
-            continue
+    reasons = {
+        "self": "자기 자신은 삭제할 수 없습니다.",
+        "not_found": "사용자를 찾을 수 없습니다.",
+    }
+    deleted_ids = [row.user_id for row in rows if row.deleted]
+    blocked = [
+        {"user_id": row.user_id, "reason": reasons[row.reason]}
+        for row in rows if not row.deleted
+    ]
+    
+    if deleted_ids:
+        bump_token_version(db, *deleted_ids)
+        invalidate_user(*deleted_ids)
     
-    return {"message": f"{deleted_count} users deleted"}
+    return {
+        "message": f"{len(deleted_ids)} users deleted",
+        "deleted": len(deleted_ids),
+        "deleted_ids": deleted_ids,
+        "blocked": blocked,
+        "errors": [f"{b['user_id']}: {b['reason']}" for b in blocked]
+    }
 
 
 # ===================== 교사용 api  ====================
@@ -1213,6 +1405,8 @@ async def import_activity_records(
     grade: int = Form(...),
     class_number: int = Form(...),
     school_year: int = Form(2025),
+    background: bool = True,
+    dry_run: bool = False,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -1225,9 +1419,13 @@ async def import_activity_records(
         grade: 학년
         class_number: 반
         school_year: 학년도 (기본 2025)
+        background: 기본 true → 202와 job_id를 바로 반환 (GET /api/jobs/{job_id}로 진행 상황 조회), false면 결과를 기다려 반환
+        dry_run: true면 저장하지 않고 행별 insert/update/unchanged/error만 반환
     
     Returns:
-        {"success": int, "failed": int, "errors": []}
+        {"job_id", "status": "queued"} (202)
+        background=false면 {"success": int, "failed": int, "inserted": int, "updated": int, "unchanged": int, "errors": []}
+        (작업 조회의 result도 같은 형식)
     """
     
     # 과목 정보 확인
@@ -1239,173 +1437,279 @@ async def import_activity_records(
     if not subject:
         raise HTTPException(status_code=404, detail="과목을 찾을 수 없습니다")
     
-    subject_code = subject.subject_code
-    
     # 파일 읽기
     contents = await file.read()
-    wb = load_workbook(BytesIO(contents))
-    ws = wb.active
     
-    results = {
-        "success": 0,
-        "failed": 0,
-        "errors": []
-    }
+    return await run_import_job(
+        "activity_records", current_user.user_id, background,
+        _import_activity_rows, contents, subject_id, subject.subject_name, subject.subject_code,
+        grade, class_number, school_year, current_user.user_id, dry_run
+    )
+
+
+def _activity_number(value):
+    return int(float(value)) if value else None
+
+
+def _activity_float(value):
+    return float(value) if value else None
+
+
+def _activity_text(value):
+    return str(value).strip() if value else None
+
+
+# 활동 유형별 임포트 스키마 (헤더 '번호' 열부터의 컬럼 순서, 컬럼별 변환, 충돌 시 갱신 컬럼)
+# - 자율: A4부터, 진로: B8부터 / 번호, 성명, 이수시간, 특기사항
+# - 동아리: 번호(B), 성명(C), 부서구분(D), 부서명(E), 부서별이수시간(F), 학생부이수시간(G), 특기사항(H)
+#   (hours에는 학생부이수시간을 저장)
+_ACTIVITY_BASIC_SCHEMA = {
+    "columns": (
+        ("number_in_class", _activity_number),
+        ("student_name", _activity_text),
+        ("hours", _activity_float),
+        ("remarks", _activity_text),
+    ),
+    "update_columns": ("student_name", "hours", "remarks"),
+}
+ACTIVITY_IMPORT_SCHEMAS = {
+    'AUTO': _ACTIVITY_BASIC_SCHEMA,
+    'CAREER': _ACTIVITY_BASIC_SCHEMA,
+    'CLUB': {
+        "columns": (
+            ("number_in_class", _activity_number),
+            ("student_name", _activity_text),
+            ("club_category", _activity_text),
+            ("club_name", _activity_text),
+            ("club_hours", _activity_float),
+            ("record_hours", _activity_float),
+            ("remarks", _activity_text),
+        ),
+        "update_columns": ("student_name", "hours", "remarks", "club_category", "club_name", "club_hours", "record_hours"),
+    },
+}
+ACTIVITY_RECORD_CONFLICT_COLUMNS = ("school_year", "subject_id", "grade", "class_number", "number_in_class")
+ACTIVITY_RECORD_CONFLICT_TARGET = """
+    (school_year, subject_id, grade, class_number, number_in_class)
+    WHERE record_type = 'activity'
+"""
+
+
+def _coerce_activity_columns(schema: dict, rows: list):
+    """
+    (행 번호, 원본 값 튜플) 목록을 컬럼 단위로 한 번에 변환
+    
+    Returns:
+        ([(행 번호, {컬럼: 값})], [(행 번호, 에러 메시지)])
+    """
+    names = [name for name, _ in schema["columns"]]
+    row_numbers = [row_idx for row_idx, _ in rows]
+    columns = list(zip(*(values for _, values in rows))) if rows else [()] * len(names)
+    
+    errors = {}
+    coerced = []
+    for (name, convert), column in zip(schema["columns"], columns):
+        converted = []
+        for position, value in enumerate(column):
+            try:
+                converted.append(convert(value))
+            except Exception as e:
+                errors.setdefault(position, str(e))
+                converted.append(None)
+        coerced.append(converted)
+    
+    valid = []
+    for position, values in enumerate(zip(*coerced)):
+        if position in errors:
+            continue
+        valid.append((row_numbers[position], dict(zip(names, values))))
+    return valid, sorted((row_numbers[p], message) for p, message in errors.items())
+
+
+@import_job_handler
+def _import_activity_rows(
+    db: Session,
+    progress: JobProgress,
+    contents: bytes,
+    subject_id: int,
+    subject_name: str,
+    subject_code: str,
+    grade: int,
+    class_number: int,
+    school_year: int,
+    created_by: str,
+    dry_run: bool = False
+) -> dict:
+    """import_activity_records 작업 본문 (임포트 워커 프로세스에서 실행)"""
     
-    # 헤더 행 찾기 (번호, 성명이 있는 행)
-    header_row = None
-    header_col_start = 1  # 기본 A열부터
+    schema = ACTIVITY_IMPORT_SCHEMAS.get(subject_code, _ACTIVITY_BASIC_SCHEMA)
+    width = len(schema["columns"])
     
-    for row_idx in range(1, 20):
-        for col_idx in range(1, 10):
-            cell_value = ws.cell(row=row_idx, column=col_idx).value
-            if cell_value and '번호' in str(cell_value):
-                header_row = row_idx
-                header_col_start = col_idx
-                break
-        if header_row:
-            break
+    # 헤더 행 찾기 (번호, 성명이 있는 행) — 이후 rows는 헤더 다음 행부터
+    rows = iter_workbook_rows(contents)
+    header_row, header_col_start = find_header(rows, '번호')
     
     if not header_row:
+        rows.close()
         raise HTTPException(status_code=400, detail="헤더를 찾을 수 없습니다. '번호' 컬럼이 있는지 확인하세요.")
     
     print(f"[Import Activity] 헤더 행: {header_row}, 시작 열: {header_col_start}")
-    print(f"[Import Activity] 과목: {subject.subject_name} ({subject_code})")
+    print(f"[Import Activity] 과목: {subject_name} ({subject_code})")
+    
+    # 1) 한 번만 읽으며 스키마 컬럼만 잘라 둠 (번호/성명이 빈 행은 스킵)
+    raw_rows = []
+    for row_idx, row in rows:
+        values = row_values(row, header_col_start, width)
+        if values[0] and values[1]:
+            raw_rows.append((row_idx, values))
+        progress.tick(0, 0)
+    
+    # 2) 컬럼 단위 타입 변환
+    parsed, errors = _coerce_activity_columns(schema, raw_rows)
+    
+    upsert_rows = []
+    for row_idx, values in parsed:
+        if not values["number_in_class"] or not values["student_name"]:
+            errors.append((row_idx, "필수 필드 누락 (번호, 성명)"))
+            continue
+        values.update({
+            "record_type": 'activity',
+            "subject_id": subject_id,
+            "grade": grade,
+            "class_number": class_number,
+            "school_year": school_year,
+            "created_by": created_by,
+        })
+        if "record_hours" in values:
+            values["hours"] = values["record_hours"]
+        upsert_rows.append((row_idx, values))
+    
+    if dry_run:
+        preview = preview_upsert(
+            db, "records", upsert_rows, ACTIVITY_RECORD_CONFLICT_COLUMNS, schema["update_columns"],
+            fingerprint_columns=schema["update_columns"], key_where="t.record_type = 'activity'"
+        )
+        return _dry_run_results(preview, [(row_idx, f"행 {row_idx}: {message}") for row_idx, message in errors])
+    
+    # 3) 학급 전체를 다건 upsert 후 한 번만 commit
+    insert_columns = (
+        "record_type", "subject_id", "grade", "class_number", "school_year", "created_by", "hours",
+    ) + tuple(name for name, _ in schema["columns"] if name != "hours")
+    upserted = bulk_upsert(
+        db,
+        "records",
+        insert_columns,
+        upsert_rows,
+        conflict_target=ACTIVITY_RECORD_CONFLICT_TARGET,
+        conflict_columns=ACTIVITY_RECORD_CONFLICT_COLUMNS,
+        update_columns=schema["update_columns"],
+        extra_set="updated_at = CURRENT_TIMESTAMP",
+        log_tag="Import Activity",
+        fingerprint_columns=schema["update_columns"],
+        key_where="t.record_type = 'activity'",
+    )
+    db.commit()
     
-    # 데이터 처리
-    for row_idx in range(header_row + 1, ws.max_row + 1):
-        try:
-            # 동아리활동
-            if subject_code == 'CLUB':
-                # 컬럼: 번호(B), 성명(C), 부서구분(D), 부서명(E), 부서별이수시간(F), 학생부이수시간(G), 특기사항(H)
-                number = ws.cell(row=row_idx, column=header_col_start).value
-                name = ws.cell(row=row_idx, column=header_col_start + 1).value
-                club_category = ws.cell(row=row_idx, column=header_col_start + 2).value
-                club_name = ws.cell(row=row_idx, column=header_col_start + 3).value
-                club_hours = ws.cell(row=row_idx, column=header_col_start + 4).value
-                record_hours = ws.cell(row=row_idx, column=header_col_start + 5).value
-                remarks = ws.cell(row=row_idx, column=header_col_start + 6).value
-                
-                # 빈 행 스킵
-                if not number or not name:
-                    continue
-                
-                number = int(float(number)) if number else None
-                club_hours = float(club_hours) if club_hours else None
-                record_hours = float(record_hours) if record_hours else None
-                
-                if not number or not name:
-                    results["errors"].append(f"행 {row_idx}: 필수 필드 누락 (번호, 성명)")
-                    results["failed"] += 1
-                    continue
-                
-                # DB 저장
-                db.execute(
-                    text("""
-                        INSERT INTO records 
-                        (record_type, subject_id, grade, class_number, number_in_class, student_name, 
-                         school_year, hours, remarks, club_category, club_name, club_hours, record_hours, created_by)
-                        VALUES ('activity', :subject_id, :grade, :class_number, :number, :name,
-                                :school_year, :record_hours, :remarks, :club_category, :club_name, :club_hours, :record_hours2, :created_by)
-                        ON CONFLICT (school_year, subject_id, grade, class_number, number_in_class)
-                        WHERE record_type = 'activity'
-                        DO UPDATE SET
-                            student_name = EXCLUDED.student_name,
-                            hours = EXCLUDED.hours,
-                            remarks = EXCLUDED.remarks,
-                            club_category = EXCLUDED.club_category,
-                            club_name = EXCLUDED.club_name,
-                            club_hours = EXCLUDED.club_hours,
-                            record_hours = EXCLUDED.record_hours,
-                            updated_at = CURRENT_TIMESTAMP
-                    """),
-                    {
-                        "subject_id": subject_id,
-                        "grade": grade,
-                        "class_number": class_number,
-                        "number": number,
-                        "name": str(name).strip(),
-                        "school_year": school_year,
-                        "record_hours": record_hours,
-                        "remarks": str(remarks).strip() if remarks else None,
-                        "club_category": str(club_category).strip() if club_category else None,
-                        "club_name": str(club_name).strip() if club_name else None,
-                        "club_hours": club_hours,
-                        "record_hours2": record_hours,
-                        "created_by": current_user.user_id
-                    }
-                )
-            
-            # 자율/진로활동
-            else:
-                # 컬럼: 번호, 성명, 이수시간, 특기사항
-                # 자율: A4부터, 진로: B8부터
-                number = ws.cell(row=row_idx, column=header_col_start).value
-                name = ws.cell(row=row_idx, column=header_col_start + 1).value
-                hours = ws.cell(row=row_idx, column=header_col_start + 2).value
-                remarks = ws.cell(row=row_idx, column=header_col_start + 3).value
-                
-                # 빈 행 스킵
-                if not number or not name:
-                    continue
-                
-                number = int(float(number)) if number else None
-                hours = float(hours) if hours else None
-                
-                if not number or not name:
-                    results["errors"].append(f"행 {row_idx}: 필수 필드 누락 (번호, 성명)")
-                    results["failed"] += 1
-                    continue
-                
-                # DB 저장
-                db.execute(
-                    text("""
-                        INSERT INTO records 
-                        (record_type, subject_id, grade, class_number, number_in_class, student_name, 
-                         school_year, hours, remarks, created_by)
-                        VALUES ('activity', :subject_id, :grade, :class_number, :number, :name,
-                                :school_year, :hours, :remarks, :created_by)
-                        ON CONFLICT (school_year, subject_id, grade, class_number, number_in_class)
-                        WHERE record_type = 'activity'
-                        DO UPDATE SET
-                            student_name = EXCLUDED.student_name,
-                            hours = EXCLUDED.hours,
-                            remarks = EXCLUDED.remarks,
-                            updated_at = CURRENT_TIMESTAMP
-                    """),
-                    {
-                        "subject_id": subject_id,
-                        "grade": grade,
-                        "class_number": class_number,
-                        "number": number,
-                        "name": str(name).strip(),
-                        "school_year": school_year,
-                        "hours": hours,
-                        "remarks": str(remarks).strip() if remarks else None,
-                        "created_by": current_user.user_id
-                    }
-                )
-            
-            db.commit()
-            results["success"] += 1
-            
-        except Exception as e:
-            db.rollback()
-            print(f"[Import Activity] 행 {row_idx} 에러: {e}")
-            results["errors"].append(f"행 {row_idx}: {str(e)}")
-            results["failed"] += 1
+    errors.extend(upserted.errors)
+    errors.sort(key=lambda e: e[0])
+    for row_idx, message in errors:
+        print(f"[Import Activity] 행 {row_idx} 에러: {message}")
     
-    print(f"[Import Activity] 완료 - 성공: {results['success']}, 실패: {results['failed']}")
+    results = {
+        "success": upserted.success,
+        "failed": len(errors),
+        "inserted": upserted.inserted,
+        "updated": upserted.updated,
+        "unchanged": upserted.unchanged,
+        "errors": [f"행 {row_idx}: {message}" for row_idx, message in errors]
+    }
+    
+    print(
+        f"[Import Activity] 완료 - 성공: {results['success']} (신규 {upserted.inserted}, "
+        f"변경 {upserted.updated}, 동일 {upserted.unchanged}), 실패: {results['failed']}"
+    )
     return results
 
 
 # ==================== 과목별 세특 임포트 API ====================
 
+SUBJECT_RECORD_IMPORT_COLUMNS = (
+    "record_type", "school_year", "semester", "grade", "subject_id", "student_number", "student_name",
+    "class_and_number", "class_number", "number_in_class", "subject_name", "subject_code",
+    "status", "content", "gifted_education", "created_by",
+)
+SUBJECT_RECORD_CONFLICT_COLUMNS = ("school_year", "semester", "grade", "subject_id", "student_number")
+SUBJECT_RECORD_CONFLICT_TARGET = """
+    (school_year, semester, grade, subject_id, student_number)
+    WHERE record_type = 'subject' AND student_number IS NOT NULL
+"""
+SUBJECT_RECORD_UPDATE_COLUMNS = (
+    "student_name", "class_and_number", "class_number", "number_in_class",
+    "status", "content", "gifted_education",
+)
+
+
+def _resolve_import_subjects(db: Session, pairs, create: bool = True) -> dict:
+    """
+    (과목코드, 과목명) 목록 → {(과목코드, 과목명): subject_id}
+    - 과목코드 일치 우선, 없으면 과목명 일치
+    - 둘 다 없으면 과목코드(없으면 AUTO_과목명)로 한 번에 생성 (create=False면 결과에서 제외)
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return {}
+    
+    by_code = {}
+    by_name = {}
+    for s in db.execute(text("SELECT id, subject_code, subject_name FROM subjects ORDER BY id")).fetchall():
+        by_code.setdefault(s.subject_code, s.id)
+        by_name.setdefault(s.subject_name, s.id)
+    
+    resolved = {}
+    missing = {}
+    for code, name in pairs:
+        subject_id = (by_code.get(code) if code else None) or by_name.get(name)
+        if subject_id:
+            resolved[(code, name)] = subject_id
+        else:
+            missing[(code, name)] = code if code else f"AUTO_{name[:10]}"
+    
+    if missing and create:
+        new_subjects = {}
+        for (code, name), new_code in missing.items():
+            new_subjects.setdefault(new_code, name)
+        params = {}
+        values = []
+        for i, (new_code, name) in enumerate(new_subjects.items()):
+            values.append(f"(:name_{i}, :code_{i}, :desc_{i})")
+            params.update({f"name_{i}": name, f"code_{i}": new_code, f"desc_{i}": f"{name} 과목"})
+        db.execute(
+            text(f"""
+                INSERT INTO subjects (subject_name, subject_code, description)
+                VALUES {', '.join(values)}
+                ON CONFLICT (subject_code) DO NOTHING
+            """),
+            params
+        )
+        created = {
+            s.subject_code: s.id
+            for s in db.execute(
+                text("SELECT id, subject_code FROM subjects WHERE subject_code = ANY(:codes)"),
+                {"codes": list(new_subjects)}
+            ).fetchall()
+        }
+        for key, new_code in missing.items():
+            if new_code in created:
+                resolved[key] = created[new_code]
+    
+    return resolved
+
 @app.post("/api/teacher/import-subject-records")
 async def import_subject_records(
     file: UploadFile = File(...),
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    background: bool = True,
+    dry_run: bool = False,
+    current_user = Depends(get_current_user)
 ):
     """
     과목별 세부능력 및 특기사항 임포트
@@ -1414,24 +1718,33 @@ async def import_subject_records(
     학년도, 학기, 학년, 학생개인번호, 과목, 과목코드, 반/번호, 성명, 
     학적변동 구분, 세부능력 및 특기사항, 영재·발명교육 기록사항
     
+    기본은 202와 job_id를 바로 반환 (GET /api/jobs/{job_id}로 진행 상황 조회), background=false면 끝날 때까지 기다려 결과 반환
+    dry_run=true면 저장하지 않고 행별 insert/update/unchanged/error만 반환 (없는 과목도 만들지 않음)
+    
     Returns:
-        {"success": int, "failed": int, "errors": []}
+        {"job_id", "status": "queued"} (202)
+        background=false면 {"success": int, "failed": int, "inserted": int, "updated": int, "unchanged": int, "errors": []}
+        (작업 조회의 result도 같은 형식)
     """
     
     contents = await file.read()
-    wb = load_workbook(BytesIO(contents))
-    ws = wb.active
     
-    results = {
-        "success": 0,
-        "failed": 0,
-        "errors": []
-    }
+    return await run_import_job(
+        "subject_records", current_user.user_id, background,
+        _import_subject_rows, contents, current_user.user_id, dry_run
+    )
+
+
+@import_job_handler
+def _import_subject_rows(db: Session, progress: JobProgress, contents: bytes, created_by: str, dry_run: bool = False) -> dict:
+    """import_subject_records 작업 본문 (임포트 워커 프로세스에서 실행)"""
     
-    # 헤더는 1행
-    rows = list(ws.iter_rows(min_row=2, values_only=True))
+    # (행 번호, 메시지) — 마지막에 행 순서로 정렬해 반환
+    errors = []
     
-    for idx, row in enumerate(rows, start=2):
+    # 1) 전체 행을 먼저 파이썬에서 검증/변환 (헤더는 1행)
+    parsed = []
+    for idx, row in iter_workbook_rows(contents, min_row=2):
         try:
             if not any(row):
                 continue
@@ -1451,8 +1764,7 @@ async def import_subject_records(
             
             # 필수 필드 검증
             if not all([school_year, semester, grade, student_number, subject_name]):
-                results["errors"].append(f"행 {idx}: 필수 필드 누락 (학년도, 학기, 학년, 학생개인번호, 과목)")
-                results["failed"] += 1
+                errors.append((idx, f"행 {idx}: 필수 필드 누락 (학년도, 학기, 학년, 학생개인번호, 과목)"))
                 continue
             
             # 반/번호 파싱 (예: "6/1" → class_number=6, number_in_class=1)
@@ -1466,109 +1778,119 @@ async def import_subject_records(
                 except:
                     pass
             
-            # 과목 ID 찾기 (과목코드 또는 과목명으로)
-            subject = db.execute(
-                text("""
-                    SELECT id FROM subjects 
-                    WHERE subject_code = :code OR subject_name = :name 
-                    LIMIT 1
-                """),
-                {"code": subject_code, "name": subject_name}
-            ).fetchone()
-            
-            if not subject:
-                # 과목이 없으면 생성
-                new_code = subject_code if subject_code else f"AUTO_{subject_name[:10]}"
-                db.execute(
-                    text("""
-                        INSERT INTO subjects (subject_name, subject_code, description)
-                        VALUES (:name, :code, :desc)
-                        ON CONFLICT (subject_code) DO NOTHING
-                    """),
-                    {
-                        "name": str(subject_name),
-                        "code": new_code,
-                        "desc": f"{subject_name} 과목"
-                    }
-                )
-                db.commit()
-                
-                subject = db.execute(
-                    text("SELECT id FROM subjects WHERE subject_code = :code LIMIT 1"),
-                    {"code": new_code}
-                ).fetchone()
-            
-            subject_id = subject.id if subject else None
-            
-            if not subject_id:
-                results["errors"].append(f"행 {idx}: 과목을 찾거나 생성할 수 없습니다 ({subject_name})")
-                results["failed"] += 1
-                continue
-            
-            # DB 저장
-            db.execute(
-                text("""
-                    INSERT INTO records 
-                    (record_type, school_year, semester, grade, subject_id, student_number, student_name,
-                     class_and_number, class_number, number_in_class, subject_name, subject_code,
-                     status, content, gifted_education, created_by)
-                    VALUES ('subject', :school_year, :semester, :grade, :subject_id, :student_number, :student_name,
-                            :class_and_number, :class_number, :number_in_class, :subject_name, :subject_code,
-                            :status, :content, :gifted_education, :created_by)
-                    ON CONFLICT (school_year, semester, grade, subject_id, student_number)
-                    WHERE record_type = 'subject' AND student_number IS NOT NULL
-                    DO UPDATE SET
-                        student_name = EXCLUDED.student_name,
-                        class_and_number = EXCLUDED.class_and_number,
-                        class_number = EXCLUDED.class_number,
-                        number_in_class = EXCLUDED.number_in_class,
-                        status = EXCLUDED.status,
-                        content = EXCLUDED.content,
-                        gifted_education = EXCLUDED.gifted_education,
-                        updated_at = CURRENT_TIMESTAMP
-                """),
-                {
-                    "school_year": int(school_year),
-                    "semester": int(semester),
-                    "grade": int(grade),
-                    "subject_id": subject_id,
-                    "student_number": str(student_number),
-                    "student_name": str(student_name),
-                    "class_and_number": str(class_and_number) if class_and_number else None,
-                    "class_number": class_number,
-                    "number_in_class": number_in_class,
-                    "subject_name": str(subject_name),
-                    "subject_code": str(subject_code) if subject_code else None,
-                    "status": str(status) if status else '재학',
-                    "content": str(remarks) if remarks else None,
-                    "gifted_education": str(gifted_education) if gifted_education else None,
-                    "created_by": current_user.user_id
-                }
-            )
-            
-            db.commit()
-            results["success"] += 1
-            
+            parsed.append((idx, {
+                "school_year": int(school_year),
+                "semester": int(semester),
+                "grade": int(grade),
+                "student_number": str(student_number),
+                "student_name": str(student_name),
+                "class_and_number": str(class_and_number) if class_and_number else None,
+                "class_number": class_number,
+                "number_in_class": number_in_class,
+                "subject_name": str(subject_name),
+                "subject_code": str(subject_code) if subject_code else None,
+                "status": str(status) if status else '재학',
+                "content": str(remarks) if remarks else None,
+                "gifted_education": str(gifted_education) if gifted_education else None,
+                "created_by": created_by
+            }))
         except Exception as e:
-            db.rollback()
             print(f"[Import Subject] 행 {idx} 에러: {e}")
-            results["errors"].append(f"행 {idx}: {str(e)}")
-            results["failed"] += 1
+            errors.append((idx, f"행 {idx}: {str(e)}"))
+        finally:
+            progress.tick(0, len(errors))
+    
+    # 2) 과목 ID 매핑 (한 번에 조회, 없는 과목은 한 문장으로 생성)
+    subject_ids = _resolve_import_subjects(
+        db, [(v["subject_code"], v["subject_name"]) for _, v in parsed], create=not dry_run
+    )
     
-    print(f"[Import Subject] 완료 - 성공: {results['success']}, 실패: {results['failed']}")
+    rows = []
+    new_subject_rows = []
+    for idx, values in parsed:
+        subject_id = subject_ids.get((values["subject_code"], values["subject_name"]))
+        if not subject_id:
+            if dry_run:
+                new_subject_rows.append({"row": idx, "action": "insert", "changes": {}, "new_subject": values["subject_name"]})
+                continue
+            errors.append((idx, f"행 {idx}: 과목을 찾거나 생성할 수 없습니다 ({values['subject_name']})"))
+            continue
+        values["subject_id"] = subject_id
+        values["record_type"] = 'subject'
+        rows.append((idx, values))
+    
+    if dry_run:
+        preview = preview_upsert(
+            db, "records", rows, SUBJECT_RECORD_CONFLICT_COLUMNS, SUBJECT_RECORD_UPDATE_COLUMNS,
+            fingerprint_columns=SUBJECT_RECORD_UPDATE_COLUMNS,
+            key_where="t.record_type = 'subject' AND t.student_number IS NOT NULL"
+        )
+        return _dry_run_results(preview + new_subject_rows, errors)
+    
+    # 3) 다건 upsert 후 한 번만 commit
+    upserted = bulk_upsert(
+        db,
+        "records",
+        SUBJECT_RECORD_IMPORT_COLUMNS,
+        rows,
+        conflict_target=SUBJECT_RECORD_CONFLICT_TARGET,
+        conflict_columns=SUBJECT_RECORD_CONFLICT_COLUMNS,
+        update_columns=SUBJECT_RECORD_UPDATE_COLUMNS,
+        extra_set="updated_at = CURRENT_TIMESTAMP",
+        log_tag="Import Subject",
+        fingerprint_columns=SUBJECT_RECORD_UPDATE_COLUMNS,
+        key_where="t.record_type = 'subject' AND t.student_number IS NOT NULL",
+    )
+    db.commit()
+    
+    for idx, message in upserted.errors:
+        print(f"[Import Subject] 행 {idx} 에러: {message}")
+        errors.append((idx, f"행 {idx}: {message}"))
+    errors.sort(key=lambda e: e[0])
+    
+    results = {
+        "success": upserted.success,
+        "failed": len(errors),
+        "inserted": upserted.inserted,
+        "updated": upserted.updated,
+        "unchanged": upserted.unchanged,
+        "errors": [message for _, message in errors]
+    }
+    
+    print(
+        f"[Import Subject] 완료 - 성공: {results['success']} (신규 {upserted.inserted}, "
+        f"변경 {upserted.updated}, 동일 {upserted.unchanged}), 실패: {results['failed']}"
+    )
     return results
 
 
 # ==================== 활동 기록 조회 API ====================
 
+ACTIVITY_RECORDS_QUERY = """
+    SELECT 
+        {columns},
+        s.subject_name,
+        s.subject_code
+    FROM records r
+    JOIN subjects s ON r.subject_id = s.id
+    WHERE r.record_type = 'activity'
+      AND r.subject_id = :subject_id 
+      AND r.grade = :grade 
+      AND r.class_number = :class_number
+      AND r.school_year = :school_year
+    ORDER BY r.number_in_class
+"""
+
+
 @app.get("/api/teacher/activity-records")
 async def get_activity_records(
     subject_id: int,
     grade: int,
     class_number: int,
     school_year: int = 2025,
+    view: Optional[str] = None,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     활동 기록 조회 (학급별)
@@ -1578,39 +1900,43 @@ async def get_activity_records(
         grade: 학년
         class_number: 반
         school_year: 학년도
+        view: summary면 본문 제외
     
     Returns:
         List of activity records
     """
     
-    records = db.execute(
-        text("""
-            SELECT 
-                r.*,
-                s.subject_name,
-                s.subject_code
-            FROM records r
-            JOIN subjects s ON r.subject_id = s.id
-            WHERE r.record_type = 'activity'
-              AND r.subject_id = :subject_id 
-              AND r.grade = :grade 
-              AND r.class_number = :class_number
-              AND r.school_year = :school_year
-            ORDER BY r.number_in_class
-        """),
+    records = (await db.execute(
+        text(ACTIVITY_RECORDS_QUERY.format(columns=_record_columns(view))),
         {
             "subject_id": subject_id,
             "grade": grade,
             "class_number": class_number,
             "school_year": school_year
         }
-    ).fetchall()
+    )).fetchall()
     
-    return [dict(row._mapping) for row in records]
+    return fast_json_response([dict(row._mapping) for row in records])
 
 
 # ==================== 과목별 세특 조회 API ====================
 
+SUBJECT_RECORDS_QUERY = """
+    SELECT 
+        {columns},
+        s.subject_name,
+        s.subject_code
+    FROM records r
+    JOIN subjects s ON r.subject_id = s.id
+    WHERE r.record_type = 'subject'
+      AND r.subject_id = :subject_id 
+      AND r.school_year = :school_year
+      AND r.semester = :semester
+      AND r.grade = :grade
+"""
+SUBJECT_RECORDS_ORDER_BY = " ORDER BY r.class_number, r.number_in_class"
+
+
 @app.get("/api/teacher/subject-records")
 async def get_subject_records(
     subject_id: int,
@@ -1618,8 +1944,9 @@ async def get_subject_records(
     semester: int,
     grade: int,
     class_number: Optional[int] = None,
+    view: Optional[str] = None,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     과목별 세특 조회
@@ -1630,16 +1957,105 @@ async def get_subject_records(
         semester: 학기
         grade: 학년
         class_number: 반 (선택, 없으면 전체 학년)
+        view: summary면 본문 제외
     
     Returns:
         List of subject records
     """
     
+    query = SUBJECT_RECORDS_QUERY.format(columns=_record_columns(view))
+    
+    params = {
+        "subject_id": subject_id,
+        "school_year": school_year,
+        "semester": semester,
+        "grade": grade
+    }
+    
+    if class_number:
+        query += " AND r.class_number = :class_number"
+        params["class_number"] = class_number
+    
+    query += SUBJECT_RECORDS_ORDER_BY
+    
+    records = (await db.execute(text(query), params)).fetchall()
+    
+    return fast_json_response([dict(row._mapping) for row in records])
+
+
+# ==================== 기록 엑셀 익스포트 (NEIS 양식) ====================
+# 임포트가 받는 양식 그대로 내보냄 → 내보낸 파일을 수정해 다시 임포트 가능
+# 서버 측 커서(yield_per)로 읽어 write_only 워크북에 한 행씩 기록 (학년 전체도 메모리 일정)
+
+EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "1000"))
+
+SUBJECT_RECORD_EXPORT_HEADERS = (
+    "학년도", "학기", "학년", "학생개인번호", "과목", "과목코드", "반/번호", "성명",
+    "학적변동 구분", "세부능력 및 특기사항", "영재·발명교육 기록사항",
+)
+SUBJECT_RECORD_EXPORT_WIDTHS = (8, 6, 6, 14, 15, 12, 8, 10, 12, 80, 40)
+
+# 활동 유형별 헤더 위치 (import_activity_records가 '번호' 헤더를 찾는 위치와 같게)
+# 컬럼은 ACTIVITY_IMPORT_SCHEMAS 순서를 따르고 hours는 이수시간(동아리는 학생부이수시간 컬럼) 값
+ACTIVITY_EXPORT_HEADERS = {
+    "number_in_class": "번호",
+    "student_name": "성명",
+    "hours": "이수시간",
+    "club_category": "부서구분",
+    "club_name": "부서명",
+    "club_hours": "부서별이수시간",
+    "record_hours": "학생부이수시간",
+    "remarks": "특기사항",
+}
+ACTIVITY_EXPORT_LAYOUTS = {
+    'AUTO': {"header_row": 4, "start_col": 1},
+    'CAREER': {"header_row": 8, "start_col": 2},
+    'CLUB': {"header_row": 8, "start_col": 2},
+}
+ACTIVITY_EXPORT_WIDTHS = {"remarks": 80, "club_name": 20, "student_name": 10}
+
+
+def _require_export_role(current_user):
+    if current_user.role not in ['teacher', 'admin']:
+        raise HTTPException(status_code=403, detail="교사만 접근 가능합니다.")
+
+
+@app.get("/api/teacher/subject-records/export")
+def export_subject_records(
+    subject_id: int,
+    school_year: int,
+    semester: int,
+    grade: int,
+    class_number: Optional[int] = None,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    과목별 세특 엑셀 익스포트 (import_subject_records 양식, 헤더 1행)
+    
+    Args:
+        subject_id: 과목 ID
+        school_year: 학년도
+        semester: 학기
+        grade: 학년
+        class_number: 반 (선택, 없으면 전체 학년)
+    """
+    _require_export_role(current_user)
+    
+    subject = db.execute(
+        text("SELECT subject_name, subject_code FROM subjects WHERE id = :id"),
+        {"id": subject_id}
+    ).fetchone()
+    if not subject:
+        raise HTTPException(status_code=404, detail="과목을 찾을 수 없습니다")
+    
     query = """
         SELECT 
-            r.*,
-            s.subject_name,
-            s.subject_code
+            r.school_year, r.semester, r.grade, r.student_number,
+            COALESCE(r.subject_name, s.subject_name) AS subject_name,
+            COALESCE(r.subject_code, s.subject_code) AS subject_code,
+            COALESCE(r.class_and_number, r.class_number || '/' || r.number_in_class) AS class_and_number,
+            r.student_name, r.status, r.content, r.gifted_education
         FROM records r
         JOIN subjects s ON r.subject_id = s.id
         WHERE r.record_type = 'subject'
@@ -1648,30 +2064,96 @@ async def get_subject_records(
           AND r.semester = :semester
           AND r.grade = :grade
     """
-    
     params = {
         "subject_id": subject_id,
         "school_year": school_year,
         "semester": semester,
         "grade": grade
     }
-    
     if class_number:
         query += " AND r.class_number = :class_number"
         params["class_number"] = class_number
+    query += SUBJECT_RECORDS_ORDER_BY
     
-    query += " ORDER BY r.class_number, r.number_in_class"
+    def rows():
+        yield SUBJECT_RECORD_EXPORT_HEADERS
+        yield from db.execute(text(query), params, execution_options={"yield_per": EXPORT_YIELD_PER})
     
-    records = db.execute(text(query), params).fetchall()
+    path = write_workbook_file(rows(), title="세특", column_widths=SUBJECT_RECORD_EXPORT_WIDTHS)
+    scope = f"{grade}학년 {class_number}반" if class_number else f"{grade}학년"
+    return xlsx_file_response(path, f"세특_{school_year}_{semester}학기_{scope}_{subject.subject_name}.xlsx")
+
+
+@app.get("/api/teacher/activity-records/export")
+def export_activity_records(
+    subject_id: int,
+    grade: int,
+    class_number: int,
+    school_year: int = 2025,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    활동 기록 엑셀 익스포트 (import_activity_records 양식, 학급별)
     
-    return [dict(row._mapping) for row in records]
+    Args:
+        subject_id: 과목 ID (자율=6, 진로=7, 동아리=8)
+        grade: 학년
+        class_number: 반
+        school_year: 학년도
+    """
+    _require_export_role(current_user)
+    
+    subject = db.execute(
+        text("SELECT subject_name, subject_code FROM subjects WHERE id = :id"),
+        {"id": subject_id}
+    ).fetchone()
+    if not subject:
+        raise HTTPException(status_code=404, detail="과목을 찾을 수 없습니다")
+    
+    schema = ACTIVITY_IMPORT_SCHEMAS.get(subject.subject_code, _ACTIVITY_BASIC_SCHEMA)
+    layout = ACTIVITY_EXPORT_LAYOUTS.get(subject.subject_code, ACTIVITY_EXPORT_LAYOUTS['AUTO'])
+    columns = [name for name, _ in schema["columns"]]
+    pad = (None,) * (layout["start_col"] - 1)
+    
+    def rows():
+        yield (f"{school_year}학년도 {grade}학년 {class_number}반 {subject.subject_name}",)
+        for _ in range(layout["header_row"] - 2):
+            yield ()
+        yield pad + tuple(ACTIVITY_EXPORT_HEADERS[c] for c in columns)
+        yield from (
+            pad + tuple(row)
+            for row in db.execute(
+                text(f"""
+                    SELECT {", ".join(f"r.{c}" for c in columns)}
+                    FROM records r
+                    WHERE r.record_type = 'activity'
+                      AND r.subject_id = :subject_id 
+                      AND r.grade = :grade 
+                      AND r.class_number = :class_number
+                      AND r.school_year = :school_year
+                    ORDER BY r.number_in_class
+                """),
+                {
+                    "subject_id": subject_id,
+                    "grade": grade,
+                    "class_number": class_number,
+                    "school_year": school_year
+                },
+                execution_options={"yield_per": EXPORT_YIELD_PER}
+            )
+        )
+    
+    widths = pad + tuple(ACTIVITY_EXPORT_WIDTHS.get(c, 12) for c in columns)
+    path = write_workbook_file(rows(), title="활동", column_widths=widths)
+    return xlsx_file_response(path, f"{subject.subject_name}_{school_year}_{grade}학년_{class_number}반.xlsx")
 
 
 # ==================== 활동 과목 목록 조회 ====================
 
 @app.get("/api/teacher/activity-subjects")
 async def get_activity_subjects(
-    current_user = Depends(get_current_user),
+    current_user = Depends(get_token_claims),
     db: Session = Depends(get_db)
 ):
     """
@@ -1772,32 +2254,64 @@ async def bulk_delete_subjects(
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """과목 일괄 삭제 (admin only)"""
+    """
+    과목 일괄 삭제 (admin only)
+    
+    기록이 있는 과목은 남기고 나머지를 한 문장으로 삭제 (ID 개수와 무관하게 쿼리 1번, 트랜잭션 1번)
+    
+    Returns:
+        {"deleted": int, "deleted_ids": [], "blocked": [{"subject_id", "reason", "records_count"}], "errors": []}
+    """
     if current_user.role != 'admin':
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    deleted = 0
-    errors = []
+    try:
+        rows = db.execute(
+            text("""
+                WITH record_counts AS (
+                    SELECT subject_id, COUNT(*) AS records_count
+                    FROM records
+                    WHERE subject_id = ANY(:subject_ids)
+                    GROUP BY subject_id
+                ),
+                deleted AS (
+                    DELETE FROM subjects s
+                    WHERE s.id = ANY(:subject_ids)
+                    AND NOT EXISTS (SELECT 1 FROM record_counts rc WHERE rc.subject_id = s.id)
+                    RETURNING s.id
+                )
+                SELECT
+                    r.id,
+                    d.id IS NOT NULL AS deleted,
+                    COALESCE(rc.records_count, 0) AS records_count
+                FROM (SELECT DISTINCT unnest(CAST(:subject_ids AS INTEGER[])) AS id) r
+                LEFT JOIN deleted d ON d.id = r.id
+                LEFT JOIN record_counts rc ON rc.subject_id = r.id
+                ORDER BY r.id
+            """),
+            {"subject_ids": subject_ids}
+        ).fetchall()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     
-    for subject_id in subject_ids:
-        try:
-            records_count = db.execute(
-                text("SELECT COUNT(*) FROM records WHERE subject_id = :subject_id"),
-                {"subject_id": subject_id}
-            ).scalar()
-            
-            if records_count > 0:
-                errors.append(f"과목 ID {subject_id}: {records_count}개의 기록이 있어 삭제 불가")
-                continue
-            
-            db.execute(text("DELETE FROM subjects WHERE id = :id"), {"id": subject_id})
-            db.commit()
-            deleted += 1
-        except Exception as e:
-            db.rollback()
-            errors.append(f"과목 ID {subject_id}: {str(e)}")
+    deleted_ids = [row.id for row in rows if row.deleted]
+    blocked = [
+        {
+            "subject_id": row.id,
+            "reason": f"{row.records_count}개의 기록이 있어 삭제 불가" if row.records_count else "과목을 찾을 수 없습니다.",
+            "records_count": row.records_count
+        }
+        for row in rows if not row.deleted
+    ]
     
-    return {"deleted": deleted, "errors": errors}
+    return {
+        "deleted": len(deleted_ids),
+        "deleted_ids": deleted_ids,
+        "blocked": blocked,
+        "errors": [f"과목 ID {b['subject_id']}: {b['reason']}" for b in blocked]
+    }
 
 
 # ==================== 사용자 개별 삭제 API ====================
@@ -1821,6 +2335,8 @@ async def delete_user(
             {"user_id": user_id}
         )
         db.commit()
+        bump_token_version(db, user_id)
+        invalidate_user(user_id)
         
         if result.rowcount == 0:
             raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
@@ -1835,6 +2351,28 @@ async def delete_user(
 
 # ==================== 교사 역할 배정 API ====================
 
+def _validate_assignment_fields(
+    role_type: str,
+    grade: Optional[int],
+    class_number: Optional[int],
+    subject_id: Optional[int]
+) -> Optional[str]:
+    """역할별 필수 필드 검증 (생성/수정/엑셀 임포트 공통) → 에러 메시지, 문제 없으면 None"""
+    if role_type in ['homeroom_teacher', 'assistant_homeroom']:
+        if not grade or not class_number:
+            return "담임/부담임은 학년과 반이 필수입니다."
+    
+    if role_type == 'subject_teacher':
+        if not grade or not subject_id:
+            return "교과교사는 학년과 과목이 필수입니다."
+    
+    if role_type in ['grade_head', 'record_manager']:
+        if not grade:
+            return "학년부장/생기부관리자는 학년이 필수입니다."
+    
+    return None
+
+
 @app.get("/api/admin/teacher-assignments")
 async def get_all_teacher_assignments(
     school_year: int = 2025,
@@ -1874,17 +2412,11 @@ async def create_teacher_assignment(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     # 역할별 필수 필드 검증
-    if assignment.role_type in ['homeroom_teacher', 'assistant_homeroom']:
-        if not assignment.grade or not assignment.class_number:
-            raise HTTPException(status_code=400, detail="담임/부담임은 학년과 반이 필수입니다.")
-    
-    if assignment.role_type == 'subject_teacher':
-        if not assignment.grade or not assignment.subject_id:
-            raise HTTPException(status_code=400, detail="교과교사는 학년과 과목이 필수입니다.")
-    
-    if assignment.role_type in ['grade_head', 'record_manager']:
-        if not assignment.grade:
-            raise HTTPException(status_code=400, detail="학년부장/생기부관리자는 학년이 필수입니다.")
+    error = _validate_assignment_fields(
+        assignment.role_type, assignment.grade, assignment.class_number, assignment.subject_id
+    )
+    if error:
+        raise HTTPException(status_code=400, detail=error)
     
     try:
         result = db.execute(
@@ -1903,8 +2435,10 @@ async def create_teacher_assignment(
                 "school_year": assignment.school_year
             }
         )
+        created = dict(result.fetchone()._mapping)
+        refresh_teacher_access_scope(db, [assignment.teacher_user_id], assignment.school_year)
         db.commit()
-        return dict(result.fetchone()._mapping)
+        return created
     except Exception as e:
         db.rollback()
         if "unique" in str(e).lower():
@@ -1924,14 +2458,12 @@ async def update_teacher_assignment(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     # 역할별 필수 필드 검증
-    if assignment.role_type in ['homeroom_teacher', 'assistant_homeroom']:
-        if not assignment.grade or not assignment.class_number:
-            raise HTTPException(status_code=400, detail="담임/부담임은 학년과 반이 필수입니다.")
+    error = _validate_assignment_fields(
+        assignment.role_type, assignment.grade, assignment.class_number, assignment.subject_id
+    )
+    if error:
+        raise HTTPException(status_code=400, detail=error)
     
-    if assignment.role_type == 'subject_teacher':
-        if not assignment.grade or not assignment.subject_id:
-            raise HTTPException(status_code=400, detail="교과교사는 학년과 과목이 필수입니다.")
-
     try:
         # 기존 배정 확인
         existing = db.execute(
@@ -1965,8 +2497,15 @@ async def update_teacher_assignment(
                 "school_year": assignment.school_year
             }
         )
+        updated = dict(result.fetchone()._mapping)
+        # 교사나 학년도가 바뀌면 이전 교사의 범위도 다시 계산
+        refresh_teacher_access_scope(db, [existing.teacher_user_id], existing.school_year)
+        if (assignment.teacher_user_id, assignment.school_year) != (existing.teacher_user_id, existing.school_year):
+            refresh_teacher_access_scope(db, [assignment.teacher_user_id], assignment.school_year)
         db.commit()
-        return dict(result.fetchone()._mapping)
+        return updated
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         if "unique" in str(e).lower():
@@ -1984,15 +2523,17 @@ async def delete_teacher_assignment(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     try:
-        result = db.execute(
-            text("DELETE FROM teacher_assignments WHERE id = :id RETURNING id"),
+        deleted = db.execute(
+            text("DELETE FROM teacher_assignments WHERE id = :id RETURNING teacher_user_id, school_year"),
             {"id": assignment_id}
-        )
-        db.commit()
+        ).fetchone()
         
-        if result.rowcount == 0:
+        if not deleted:
             raise HTTPException(status_code=404, detail="배정을 찾을 수 없습니다.")
         
+        refresh_teacher_access_scope(db, [deleted.teacher_user_id], deleted.school_year)
+        db.commit()
+        
         return {"message": "역할 배정이 삭제되었습니다."}
     except HTTPException:
         raise
@@ -2003,6 +2544,19 @@ async def delete_teacher_assignment(
 
 # ==================== 교사 본인 역할 조회 API ====================
 
+MY_ASSIGNMENTS_QUERY = """
+    SELECT 
+        ta.*,
+        s.subject_name,
+        s.subject_code
+    FROM teacher_assignments ta
+    LEFT JOIN subjects s ON ta.subject_id = s.id
+    WHERE ta.teacher_user_id = :user_id
+      AND ta.school_year = :school_year
+    ORDER BY ta.role_type, ta.grade, ta.class_number
+"""
+
+
 @app.get("/api/teacher/my-assignments")
 async def get_my_assignments(
     school_year: int = 2025,
@@ -2014,17 +2568,7 @@ async def get_my_assignments(
         raise HTTPException(status_code=403, detail="교사만 접근 가능합니다.")
     
     result = db.execute(
-        text("""
-            SELECT 
-                ta.*,
-                s.subject_name,
-                s.subject_code
-            FROM teacher_assignments ta
-            LEFT JOIN subjects s ON ta.subject_id = s.id
-            WHERE ta.teacher_user_id = :user_id
-              AND ta.school_year = :school_year
-            ORDER BY ta.role_type, ta.grade, ta.class_number
-        """),
+        text(MY_ASSIGNMENTS_QUERY),
         {"user_id": current_user.user_id, "school_year": school_year}
     )
     
@@ -2034,7 +2578,7 @@ async def get_my_assignments(
 @app.get("/api/teacher/my-classes")
 async def get_my_classes(
     school_year: int = 2025,
-    current_user = Depends(get_current_user),
+    current_user = Depends(get_token_claims),
     db: Session = Depends(get_db)
 ):
     """교사의 담당 학급 목록 조회"""
@@ -2088,127 +2632,83 @@ async def get_my_subjects(
 
 # ==================== 권한 기반 기록 조회 API ====================
 
+ACCESSIBLE_RECORD_QUERY = (
+    "SELECT {columns}, s.subject_name, s.subject_code"
+    + sort_columns_sql(ACCESSIBLE_RECORD_SORT_KEYS)
+    + """
+    FROM records r
+    JOIN subjects s ON r.subject_id = s.id
+    WHERE r.school_year = :school_year
+"""
+)
+
+
+def _accessible_record_filters(
+    params: dict,
+    semester: Optional[int] = None,
+    grade: Optional[int] = None,
+    class_number: Optional[int] = None,
+    subject_id: Optional[int] = None,
+    record_type: Optional[str] = None,
+) -> str:
+    """accessible-records 선택 필터 → 덧붙일 WHERE 조건 (params도 함께 채움)"""
+    conditions = ""
+    if semester:
+        conditions += " AND r.semester = :semester"
+        params["semester"] = semester
+    if grade:
+        conditions += " AND r.grade = :grade"
+        params["grade"] = grade
+    if class_number:
+        conditions += " AND r.class_number = :class_number"
+        params["class_number"] = class_number
+    if subject_id:
+        conditions += " AND r.subject_id = :subject_id"
+        params["subject_id"] = subject_id
+    if record_type:
+        conditions += " AND r.record_type = :record_type"
+        params["record_type"] = record_type
+    return conditions
+
+
 @app.get("/api/teacher/accessible-records")
 async def get_accessible_records(
+    response: Response,
     school_year: int = 2025,
     semester: Optional[int] = None,
     grade: Optional[int] = None,
     class_number: Optional[int] = None,
     subject_id: Optional[int] = None,
     record_type: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    view: Optional[str] = None,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """교사의 권한에 따른 접근 가능한 기록 조회"""
+    """
+    교사의 권한에 따른 접근 가능한 기록 조회
+    - 키셋 페이지네이션: limit 기본 DEFAULT_PAGE_SIZE, 최대 MAX_PAGE_SIZE (다음 페이지 커서는 X-Next-Cursor 헤더)
+    - include_total=true면 X-Total-Count 헤더에 근사 전체 건수
+    - view=summary면 본문(content/remarks/gifted_education) 제외
+    """
+    columns = _record_columns(view)
     if current_user.role not in ['teacher', 'admin']:
         raise HTTPException(status_code=403, detail="교사만 접근 가능합니다.")
     
-    # Admin은 모든 기록 접근 가능
-    if current_user.role == 'admin':
-        query = """
-            SELECT r.*, s.subject_name, s.subject_code
-            FROM records r
-            JOIN subjects s ON r.subject_id = s.id
-            WHERE r.school_year = :school_year
-        """
-        params = {"school_year": school_year}
-        
-        if semester:
-            query += " AND r.semester = :semester"
-            params["semester"] = semester
-        if grade:
-            query += " AND r.grade = :grade"
-            params["grade"] = grade
-        if class_number:
-            query += " AND r.class_number = :class_number"
-            params["class_number"] = class_number
-        if subject_id:
-            query += " AND r.subject_id = :subject_id"
-            params["subject_id"] = subject_id
-        if record_type:
-            query += " AND r.record_type = :record_type"
-            params["record_type"] = record_type
-        
-        query += " ORDER BY r.grade, r.class_number, r.number_in_class"
-        
-        result = db.execute(text(query), params)
-        return [dict(row._mapping) for row in result.fetchall()]
-    
-    # 교사의 역할 조회
-    assignments = db.execute(
-        text("""
-            SELECT role_type, grade, class_number, subject_id
-            FROM teacher_assignments
-            WHERE teacher_user_id = :user_id
-              AND school_year = :school_year
-        """),
-        {"user_id": current_user.user_id, "school_year": school_year}
-    ).fetchall()
-    
-    if not assignments:
-        return []
-    
-    # 권한별 조건 구성
-    conditions = []
+    query = ACCESSIBLE_RECORD_QUERY.format(columns=columns)
     params = {"school_year": school_year}
     
-    for idx, a in enumerate(assignments):
-        role = a.role_type
-        a_grade = a.grade
-        a_class = a.class_number
-        a_subject = a.subject_id
-        
-        if role in ['grade_head', 'record_manager']:
-            conditions.append(f"(r.grade = :grade_{idx})")
-            params[f"grade_{idx}"] = a_grade
-            
-        elif role in ['homeroom_teacher', 'assistant_homeroom']:
-            conditions.append(f"(r.grade = :grade_{idx} AND r.class_number = :class_{idx})")
-            params[f"grade_{idx}"] = a_grade
-            params[f"class_{idx}"] = a_class
-            
-        elif role == 'subject_teacher':
-            if a_class:
-                conditions.append(f"(r.grade = :grade_{idx} AND r.class_number = :class_{idx} AND r.subject_id = :subject_{idx})")
-                params[f"class_{idx}"] = a_class
-            else:
-                conditions.append(f"(r.grade = :grade_{idx} AND r.subject_id = :subject_{idx})")
-            params[f"grade_{idx}"] = a_grade
-            params[f"subject_{idx}"] = a_subject
-    
-    if not conditions:
-        return []
-    
-    where_clause = " OR ".join(conditions)
-    
-    query = f"""
-        SELECT r.*, s.subject_name, s.subject_code
-        FROM records r
-        JOIN subjects s ON r.subject_id = s.id
-        WHERE r.school_year = :school_year
-          AND ({where_clause})
-    """
-    
-    if semester:
-        query += " AND r.semester = :semester"
-        params["semester"] = semester
-    if grade:
-        query += " AND r.grade = :grade_filter"
-        params["grade_filter"] = grade
-    if class_number:
-        query += " AND r.class_number = :class_filter"
-        params["class_filter"] = class_number
-    if subject_id:
-        query += " AND r.subject_id = :subject_filter"
-        params["subject_filter"] = subject_id
-    if record_type:
-        query += " AND r.record_type = :record_type"
-        params["record_type"] = record_type
+    # Admin은 모든 기록 접근 가능, 교사는 미리 계산된 접근 범위(teacher_access_scopes)와 semi-join
+    if current_user.role != 'admin':
+        query += f" AND {ACCESSIBLE_RECORD_CONDITION}"
+        params["scope_user_id"] = current_user.user_id
     
-    query += " ORDER BY r.grade, r.class_number, r.number_in_class"
+    query += _accessible_record_filters(params, semester, grade, class_number, subject_id, record_type)
     
-    result = db.execute(text(query), params)
-    return [dict(row._mapping) for row in result.fetchall()]
+    rows = await fetch_page(db, response, query, params, ACCESSIBLE_RECORD_SORT_KEYS, limit, cursor, include_total)
+    return fast_json_response([strip_sort_columns(row._mapping) for row in rows], response)
 
 
 # ==================== 역할 배정 엑셀 임포트 ====================
@@ -2217,77 +2717,207 @@ async def get_accessible_records(
 async def import_teacher_assignments(
     file: UploadFile = File(...),
     school_year: int = Form(2025),
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    background: bool = True,
+    dry_run: bool = False,
+    current_user = Depends(get_current_user)
 ):
-    """교사 역할 배정 엑셀 임포트"""
+    """
+    교사 역할 배정 엑셀 임포트
+    
+    기본은 202와 job_id를 바로 반환 (GET /api/jobs/{job_id}로 진행 상황 조회), background=false면 끝날 때까지 기다려 결과 반환
+    dry_run=true면 저장하지 않고 행별 insert/unchanged/error만 반환 (이미 있는 배정은 unchanged)
+    """
     if current_user.role != 'admin':
         raise HTTPException(status_code=403, detail="Admin access required")
     
     contents = await file.read()
-    wb = load_workbook(BytesIO(contents))
-    ws = wb.active
     
-    results = {"success": 0, "failed": 0, "errors": []}
-    
-    rows = list(ws.iter_rows(min_row=2, values_only=True))
+    return await run_import_job(
+        "teacher_assignments", current_user.user_id, background,
+        _preview_teacher_assignment_rows if dry_run else _import_teacher_assignment_rows,
+        contents, school_year
+    )
+
+
+TEACHER_ROLE_TYPES = ('homeroom_teacher', 'assistant_homeroom', 'subject_teacher', 'grade_head', 'record_manager')
+
+
+TEACHER_ASSIGNMENT_IMPORT_COLUMNS = ("teacher_user_id", "role_type", "grade", "class_number", "subject_id", "school_year")
+# 유니크 인덱스 idx_ta_unique와 같은 키 (NULL은 0으로 비교)
+TEACHER_ASSIGNMENT_KEY_COLUMNS = ("teacher_user_id", "role_type", "grade", "class_number", "subject_id")
+
+
+def _teacher_assignment_key(values: dict) -> tuple:
+    return (
+        values["teacher_user_id"], values["role_type"],
+        values["grade"] or 0, values["class_number"] or 0, values["subject_id"] or 0
+    )
+
+
+def _parse_teacher_assignment_rows(db: Session, progress: JobProgress, contents: bytes, school_year: int):
+    """
+    역할 배정 엑셀 행 파싱 + 검증 (dry_run/실제 임포트 공통)
+    - 과목코드와 교사ID는 각각 쿼리 1번으로 조회하고 행별 검증은 메모리에서
     
-    for idx, row in enumerate(rows, start=2):
+    Returns:
+        (유효 행 [(행 번호, 컬럼 값)], 오류 [(행 번호, 에러 메시지)])
+    """
+    parsed = []
+    errors = []
+    for idx, row in iter_workbook_rows(contents, min_row=2):
         try:
             if not any(row):
                 continue
             
-            teacher_id = row[0] if len(row) > 0 else None
-            role_type = row[1] if len(row) > 1 else None
-            grade = row[2] if len(row) > 2 else None
-            class_number = row[3] if len(row) > 3 else None
-            subject_code = row[4] if len(row) > 4 else None
+            teacher_id, role_type, grade, class_number, subject_code = row_values(row, 1, 5)
             
             if not teacher_id or not role_type:
-                results["errors"].append(f"행 {idx}: 교사ID와 역할은 필수입니다.")
-                results["failed"] += 1
+                errors.append((idx, f"행 {idx}: 교사ID와 역할은 필수입니다."))
                 continue
             
-            # 과목 ID 조회
-            subject_id = None
-            if subject_code:
-                subject = db.execute(
-                    text("SELECT id FROM subjects WHERE subject_code = :code"),
-                    {"code": str(subject_code).strip()}
-                ).fetchone()
-                if subject:
-                    subject_id = subject.id
-            
-            grade = int(grade) if grade else None
-            class_number = int(class_number) if class_number else None
-            
-            db.execute(
-                text("""
-                    INSERT INTO teacher_assignments 
-                    (teacher_user_id, role_type, grade, class_number, subject_id, school_year)
-                    VALUES (:teacher_user_id, :role_type, :grade, :class_number, :subject_id, :school_year)
-                    ON CONFLICT DO NOTHING
-                """),
-                {
-                    "teacher_user_id": str(teacher_id).strip(),
-                    "role_type": str(role_type).strip(),
-                    "grade": grade,
-                    "class_number": class_number,
-                    "subject_id": subject_id,
-                    "school_year": school_year
-                }
-            )
-            db.commit()
-            results["success"] += 1
-            
+            parsed.append((idx, {
+                "teacher_user_id": str(teacher_id).strip(),
+                "role_type": str(role_type).strip(),
+                "grade": int(grade) if grade else None,
+                "class_number": int(class_number) if class_number else None,
+                "subject_code": str(subject_code).strip() if subject_code else None,
+            }))
         except Exception as e:
-            db.rollback()
-            results["errors"].append(f"행 {idx}: {str(e)}")
-            results["failed"] += 1
+            errors.append((idx, f"행 {idx}: {str(e)}"))
+        finally:
+            progress.tick(0, len(errors))
+    
+    subject_ids = {
+        s.subject_code: s.id
+        for s in db.execute(
+            text("SELECT id, subject_code FROM subjects WHERE subject_code = ANY(:codes)"),
+            {"codes": list({v["subject_code"] for _, v in parsed if v["subject_code"]})}
+        ).fetchall()
+    }
+    known_teachers = {
+        u.user_id
+        for u in db.execute(
+            text("SELECT user_id FROM users WHERE user_id = ANY(:ids)"),
+            {"ids": list({v["teacher_user_id"] for _, v in parsed})}
+        ).fetchall()
+    }
+    
+    valid_rows = []
+    for idx, values in parsed:
+        if values["teacher_user_id"] not in known_teachers:
+            errors.append((idx, f"행 {idx}: 존재하지 않는 교사ID입니다 ({values['teacher_user_id']})"))
+            continue
+        if values["role_type"] not in TEACHER_ROLE_TYPES:
+            errors.append((idx, f"행 {idx}: 알 수 없는 역할입니다 ({values['role_type']})"))
+            continue
+        subject_code = values.pop("subject_code")
+        if subject_code and subject_code not in subject_ids:
+            errors.append((idx, f"행 {idx}: 존재하지 않는 과목코드입니다 ({subject_code})"))
+            continue
+        values["subject_id"] = subject_ids.get(subject_code)
+        error = _validate_assignment_fields(
+            values["role_type"], values["grade"], values["class_number"], values["subject_id"]
+        )
+        if error:
+            errors.append((idx, f"행 {idx}: {error}"))
+            continue
+        values["school_year"] = school_year
+        valid_rows.append((idx, values))
+    
+    return valid_rows, errors
+
+
+@import_job_handler
+def _preview_teacher_assignment_rows(db: Session, progress: JobProgress, contents: bytes, school_year: int) -> dict:
+    """import_teacher_assignments dry_run (과목/교사/기존 배정은 각각 쿼리 1번으로 조회)"""
+    valid_rows, errors = _parse_teacher_assignment_rows(db, progress, contents, school_year)
+    
+    existing = {
+        tuple(a)
+        for a in db.execute(
+            text("""
+                SELECT teacher_user_id, role_type, COALESCE(grade, 0), COALESCE(class_number, 0), COALESCE(subject_id, 0)
+                FROM teacher_assignments
+                WHERE school_year = :school_year AND teacher_user_id = ANY(:ids)
+            """),
+            {"school_year": school_year, "ids": list({v["teacher_user_id"] for _, v in valid_rows})}
+        ).fetchall()
+    }
+    
+    preview = []
+    seen = set()
+    for idx, values in valid_rows:
+        key = _teacher_assignment_key(values)
+        # ON CONFLICT DO NOTHING이므로 파일 안 중복은 앞 행이 남음
+        if key in seen:
+            action = "duplicate"
+        else:
+            action = "unchanged" if key in existing else "insert"
+        seen.add(key)
+        preview.append({"row": idx, "action": action, "changes": {}})
+    
+    return _dry_run_results(preview, errors)
+
+
+@import_job_handler
+def _import_teacher_assignment_rows(db: Session, progress: JobProgress, contents: bytes, school_year: int) -> dict:
+    """import_teacher_assignments 작업 본문 (임포트 워커 프로세스에서 실행)"""
+    results = {"success": 0, "failed": 0, "errors": []}
+    
+    # 1단계: 검증 (DB 쓰기 없음)
+    valid_rows, invalid_rows = _parse_teacher_assignment_rows(db, progress, contents, school_year)
+    
+    # 2단계: 다건 INSERT ... ON CONFLICT DO NOTHING (이미 있는 배정은 그대로 성공 처리)
+    inserted = bulk_upsert(
+        db,
+        "teacher_assignments",
+        TEACHER_ASSIGNMENT_IMPORT_COLUMNS,
+        valid_rows,
+        conflict_target="",
+        conflict_columns=TEACHER_ASSIGNMENT_KEY_COLUMNS,
+        update_columns=(),
+        log_tag="Import Teacher Assignments",
+    )
+    
+    # 접근 범위는 임포트된 교사들에 대해 한 번에 갱신
+    failed_rows = {idx for idx, _ in inserted.errors}
+    imported_teachers = {v["teacher_user_id"] for idx, v in valid_rows if idx not in failed_rows}
+    if imported_teachers:
+        refresh_teacher_access_scope(db, imported_teachers, school_year)
+    db.commit()
+    
+    invalid_rows.extend((idx, f"행 {idx}: {message}") for idx, message in inserted.errors)
+    invalid_rows.sort(key=lambda e: e[0])
+    results["success"] = inserted.success
+    results["failed"] = len(invalid_rows)
+    results["errors"] = [message for _, message in invalid_rows]
+    progress.tick(results["success"], results["failed"], rows=0)
     
     return results
 
 
+# ==================== 임포트 작업 조회 ====================
+
+@app.get("/api/jobs/{job_id}")
+def get_import_job(
+    job_id: str,
+    current_user = Depends(get_current_user)
+):
+    """
+    임포트 작업 상태 조회 (임포트 API가 반환한 job_id)
+    
+    Returns:
+        {"job_id", "kind", "status": queued|running|succeeded|failed,
+         "rows_processed", "success", "failed", "errors", "error", "result", ...}
+    """
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    if current_user.role != 'admin' and job["created_by"] != current_user.user_id:
+        raise HTTPException(status_code=403, detail="Permission denied")
+    return job
+
+
 # ==================== 역할 배정 엑셀 템플릿 ====================
 
 @app.get("/api/admin/download-template/teacher-assignments")
@@ -0,0 +1,35 @@
+"""
+Alembic 실행 환경
+- 스키마는 init.sql(신규 설치)과 raw SQL 마이그레이션(기존 DB)으로 관리하므로 autogenerate 대상 메타데이터는 없음
+- 접속 정보는 앱과 같은 DATABASE_URL 환경변수 사용
+"""
+import os
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+config = context.config
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    raise RuntimeError("DATABASE_URL environment variable not set")
+
+
+def run_migrations_offline() -> None:
+    context.configure(url=DATABASE_URL, target_metadata=None, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    engine = create_engine(DATABASE_URL, poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=None)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
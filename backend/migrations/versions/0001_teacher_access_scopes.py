@@ -0,0 +1,58 @@
+"""교사 접근 범위 테이블 (teacher_access_scopes) 생성 및 백필
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # init.sql로 새로 설치한 DB에도 적용할 수 있도록 IF NOT EXISTS / ON CONFLICT 사용
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS teacher_access_scopes (
+            id SERIAL PRIMARY KEY,
+            teacher_user_id VARCHAR(20) NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+            school_year INTEGER NOT NULL,
+            grade INTEGER NOT NULL,
+            class_number INTEGER,
+            subject_id INTEGER REFERENCES subjects(id) ON DELETE CASCADE
+        )
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_tas_unique
+        ON teacher_access_scopes(
+            teacher_user_id,
+            school_year,
+            grade,
+            COALESCE(class_number, 0),
+            COALESCE(subject_id, 0)
+        )
+    """)
+    op.execute("""
+        INSERT INTO teacher_access_scopes (teacher_user_id, school_year, grade, class_number, subject_id)
+        SELECT DISTINCT
+            teacher_user_id,
+            school_year,
+            grade,
+            CASE WHEN role_type IN ('grade_head', 'record_manager') THEN NULL ELSE class_number END,
+            CASE WHEN role_type = 'subject_teacher' THEN subject_id ELSE NULL END
+        FROM teacher_assignments
+        WHERE school_year IS NOT NULL
+          AND grade IS NOT NULL
+          AND (
+              role_type IN ('grade_head', 'record_manager')
+              OR (role_type IN ('homeroom_teacher', 'assistant_homeroom') AND class_number IS NOT NULL)
+              OR (role_type = 'subject_teacher' AND subject_id IS NOT NULL)
+          )
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS teacher_access_scopes")
@@ -0,0 +1,49 @@
+"""실제 조회 패턴에 맞춘 복합/부분 인덱스
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+
+- accessible-records (관리자 필터): school_year, grade, class_number, subject_id, record_type
+- accessible-records (교사): teacher_access_scopes에서 출발하는 범위 조인 (COALESCE(class_number, 0) 식 인덱스)
+- subject-records: record_type='subject' 부분 인덱스, 반/번호 순서까지 포함해 정렬 생략
+- import_subject_records: 과목명으로 과목 조회
+- my-assignments / my-classes / my-subjects: (teacher_user_id, school_year)
+
+activity-records는 기존 idx_records_activity_unique
+(school_year, subject_id, grade, class_number, number_in_class) WHERE record_type='activity'로 충분하다.
+
+운영 중 쓰기를 막지 않도록 CONCURRENTLY로 생성 (트랜잭션 밖에서 실행)
+"""
+from alembic import op
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("idx_records_access_path",
+     "records (school_year, grade, class_number, subject_id, record_type)"),
+    ("idx_records_access_scope",
+     "records (school_year, grade, (COALESCE(class_number, 0)), subject_id)"),
+    ("idx_records_subject_class_order",
+     "records (subject_id, school_year, semester, grade, class_number, number_in_class) "
+     "WHERE record_type = 'subject'"),
+    ("idx_subjects_name",
+     "subjects (subject_name)"),
+    ("idx_ta_teacher_year",
+     "teacher_assignments (teacher_user_id, school_year)"),
+)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
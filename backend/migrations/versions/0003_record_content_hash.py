@@ -0,0 +1,24 @@
+"""records.content_hash: 엑셀 임포트 값의 해시
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+
+같은 NEIS 파일을 다시 올렸을 때 바뀐 행만 쓰도록 마지막 임포트 값의 해시를 저장한다.
+기존 행은 NULL로 두어 다음 임포트에서 한 번 다시 쓰인다.
+NULL 기본값 컬럼 추가라 테이블 재작성 없이 바로 끝난다.
+"""
+from alembic import op
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE records ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE records DROP COLUMN IF EXISTS content_hash")
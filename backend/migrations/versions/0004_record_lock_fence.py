@@ -0,0 +1,24 @@
+"""records.lock_fence: 마지막 저장에 쓰인 편집 잠금 fencing token
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+
+저장 UPDATE가 이 값보다 작은 token이면 행을 고치지 않도록 해
+Redis 검사 이후 잠금이 만료/재획득되어도 오래된 세션의 저장이 덮어쓰지 못하게 한다.
+NULL 기본값 컬럼 추가라 테이블 재작성 없이 바로 끝난다.
+"""
+from alembic import op
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE records ADD COLUMN IF NOT EXISTS lock_fence BIGINT")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE records DROP COLUMN IF EXISTS lock_fence")
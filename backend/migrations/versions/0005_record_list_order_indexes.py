@@ -0,0 +1,44 @@
+"""기록 목록 키셋 페이지네이션 정렬 인덱스
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16
+
+/api/records와 /api/teacher/accessible-records는
+(COALESCE(grade), COALESCE(class_number), COALESCE(number_in_class), subject_id, id) 순으로 정렬하고
+커서 이후 행을 같은 식의 행 비교로 거른다 (main.RECORD_LIST_SORT_KEYS).
+식 그대로의 인덱스를 두어 정렬 노드 없이 커서 위치부터 LIMIT만큼만 읽게 한다.
+
+- idx_records_list_order: 학년도 조건이 없는 /api/records
+- idx_records_year_list_order: school_year = :school_year인 accessible-records
+
+운영 중 쓰기를 막지 않도록 CONCURRENTLY로 생성 (트랜잭션 밖에서 실행)
+"""
+from alembic import op
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+_ORDER = (
+    "(COALESCE(grade, 2147483647)), (COALESCE(class_number, 2147483647)), "
+    "(COALESCE(number_in_class, 2147483647)), subject_id, id"
+)
+
+INDEXES = (
+    ("idx_records_list_order", f"records ({_ORDER})"),
+    ("idx_records_year_list_order", f"records (school_year, {_ORDER})"),
+)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,25 @@
+"""users.token_version: 클레임 토큰 무효화 버전
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16
+
+클레임 토큰의 "ver"와 비교하는 버전의 원본을 Redis 카운터에서 users 행으로 옮긴다.
+Redis(allkeys-lru, 볼륨 없음)에서 키가 축출되거나 재시작돼도 0으로 되돌아가지 않아
+역할 변경/삭제 전에 발급된 토큰이 다시 유효해지지 않는다.
+상수 기본값 컬럼 추가라 테이블 재작성 없이 바로 끝난다.
+"""
+from alembic import op
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE users DROP COLUMN IF EXISTS token_version")
@@ -0,0 +1,37 @@
+"""records 학년/반/번호 백필 (목록 정렬 기준 컬럼)
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16
+
+/api/records는 records의 grade/class_number/number_in_class로 정렬한다 (main.RECORD_LIST_SORT_KEYS).
+이전 create_record는 이 컬럼들을 비워 두었으므로 학생 정보에서 채워
+해당 기록이 목록 맨 뒤로 밀리지 않게 한다.
+세 컬럼이 모두 비어 있는 행만 고친다 (엑셀 임포트 값은 건드리지 않음).
+"""
+from alembic import op
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        UPDATE records r
+        SET grade = u.grade,
+            class_number = u.class_number,
+            number_in_class = u.number_in_class,
+            student_name = COALESCE(r.student_name, u.full_name),
+            student_number = COALESCE(r.student_number, u.student_number)
+        FROM users u
+        WHERE r.student_user_id = u.user_id
+          AND r.grade IS NULL AND r.class_number IS NULL AND r.number_in_class IS NULL
+          AND (u.grade IS NOT NULL OR u.class_number IS NOT NULL OR u.number_in_class IS NOT NULL)
+    """)
+
+
+def downgrade() -> None:
+    # 백필 전 값(NULL)과 원래 값이 같은 행을 구분할 수 없으므로 되돌리지 않음
+    pass
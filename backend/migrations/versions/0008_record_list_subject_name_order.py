@@ -0,0 +1,65 @@
+"""기록 목록 정렬에 과목명 복원 (records.subject_name 백필 + 정렬 인덱스 교체)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-16
+
+기존 /api/records 정렬은 학년, 반, 번호, 과목명이었다.
+키셋 페이지네이션은 조인 테이블 컬럼으로 인덱스 정렬을 못 하므로
+과목명을 records.subject_name(엑셀 임포트가 이미 채우는 컬럼)으로 정렬한다 (main.RECORD_LIST_SORT_KEYS).
+
+- 비어 있는 records.subject_name/subject_code를 subjects에서 백필
+- 0005의 subject_id 기준 인덱스를 과목명 기준으로 교체
+  (NULL 과목명은 맨 뒤: CAST(subject_name IS NULL AS INTEGER), COALESCE(subject_name, ''))
+
+운영 중 쓰기를 막지 않도록 인덱스는 CONCURRENTLY로 생성/삭제 (트랜잭션 밖에서 실행)
+"""
+from alembic import op
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+_ORDER = (
+    "(COALESCE(grade, 2147483647)), (COALESCE(class_number, 2147483647)), "
+    "(COALESCE(number_in_class, 2147483647)), "
+    "(CAST(subject_name IS NULL AS INTEGER)), (COALESCE(subject_name, '')), id"
+)
+_OLD_ORDER = (
+    "(COALESCE(grade, 2147483647)), (COALESCE(class_number, 2147483647)), "
+    "(COALESCE(number_in_class, 2147483647)), subject_id, id"
+)
+
+INDEXES = (
+    ("idx_records_list_order_name", f"records ({_ORDER})"),
+    ("idx_records_year_list_order_name", f"records (school_year, {_ORDER})"),
+)
+OLD_INDEXES = (
+    ("idx_records_list_order", f"records ({_OLD_ORDER})"),
+    ("idx_records_year_list_order", f"records (school_year, {_OLD_ORDER})"),
+)
+
+
+def upgrade() -> None:
+    op.execute("""
+        UPDATE records r
+        SET subject_name = s.subject_name,
+            subject_code = COALESCE(r.subject_code, s.subject_code)
+        FROM subjects s
+        WHERE r.subject_id = s.id
+          AND r.subject_name IS NULL
+    """)
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+        for name, _ in OLD_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, definition in OLD_INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,162 @@
+"""
+키셋(커서) 페이지네이션
+- OFFSET 없이 직전 페이지 마지막 행의 정렬 키 다음부터 조회 → 뒤 페이지도 첫 페이지와 같은 비용
+- 커서는 정렬 키 값을 담은 불투명 문자열 (base64url JSON)
+- NULL은 COALESCE로 정렬/비교 양쪽에서 같은 값으로 치환해 행 비교(row comparison)가 안정적
+  (같은 식의 인덱스를 두면 커서 비교가 Index Cond가 되고 정렬 노드 없이 LIMIT에서 멈춤)
+- 마지막 정렬 키는 항상 유일한 id → 같은 학생/과목이 여러 행이어도 누락/중복 없음
+"""
+import os
+import json
+import base64
+import binascii
+from typing import Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import text
+
+# ==================== 환경 설정 ====================
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "200"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+# 정수 정렬 키의 NULL 치환값 (ORDER BY 기본값처럼 NULL이 맨 뒤로 가도록 최댓값)
+INT_NULL_SENTINEL = 2147483647
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+_SORT_COLUMN_PREFIX = "_sort_"
+
+
+def int_key(expr: str) -> str:
+    return f"COALESCE({expr}, {INT_NULL_SENTINEL})"
+
+
+def text_keys(expr: str) -> Tuple[str, str]:
+    """NULL 가능 문자열 정렬 키 → (NULL 여부, 값) 두 키 (ORDER BY 기본값처럼 NULL이 맨 뒤로 가도록)"""
+    return f"CAST({expr} IS NULL AS INTEGER)", f"COALESCE({expr}, '')"
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """커서 → 정렬 키 값 목록 (형식이 맞지 않으면 400)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError):
+        values = None
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(isinstance(v, (int, str)) and not isinstance(v, bool) for v in values)
+    ):
+        raise HTTPException(status_code=400, detail="잘못된 페이지 커서입니다.")
+    return values
+
+
+def sort_columns_sql(sort_keys: Sequence[str]) -> str:
+    """SELECT 절에 덧붙일 정렬 키 컬럼 (다음 커서 생성용)"""
+    return "".join(f", {expr} AS {_SORT_COLUMN_PREFIX}{i}" for i, expr in enumerate(sort_keys))
+
+
+def keyset_condition(sort_keys: Sequence[str], cursor: Optional[str], params: dict) -> str:
+    """커서 이후 행만 남기는 WHERE 조건 (커서가 없으면 빈 문자열)"""
+    if not cursor:
+        return ""
+    values = decode_cursor(cursor, len(sort_keys))
+    placeholders = []
+    for i, value in enumerate(values):
+        params[f"{_SORT_COLUMN_PREFIX}{i}"] = value
+        placeholders.append(f":{_SORT_COLUMN_PREFIX}{i}")
+    return f" AND ({', '.join(sort_keys)}) > ({', '.join(placeholders)})"
+
+
+def order_by_sql(sort_keys: Sequence[str]) -> str:
+    return " ORDER BY " + ", ".join(sort_keys)
+
+
+def page_query(query: str, params: dict, sort_keys: Sequence[str], cursor: Optional[str], page_size: int) -> Tuple[str, dict]:
+    """한 페이지 조회 SQL (커서 조건 + ORDER BY + LIMIT page_size + 1, 다음 페이지 유무 확인용 1행 추가)"""
+    params = dict(params)
+    query += keyset_condition(sort_keys, cursor, params)
+    query += order_by_sql(sort_keys) + " LIMIT :_page_limit"
+    params["_page_limit"] = page_size + 1
+    return query, params
+
+
+def split_page(rows: list, limit: int, sort_key_count: int) -> Tuple[list, Optional[str]]:
+    """limit + 1 행을 조회한 결과 → (이번 페이지 행, 다음 커서)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]._mapping
+    next_cursor = encode_cursor([last[f"{_SORT_COLUMN_PREFIX}{i}"] for i in range(sort_key_count)])
+    return rows, next_cursor
+
+
+def strip_sort_columns(mapping) -> dict:
+    return {k: v for k, v in mapping.items() if not k.startswith(_SORT_COLUMN_PREFIX)}
+
+
+async def estimate_count(db, query: str, params: dict) -> Optional[int]:
+    """
+    플래너 추정 행 수 (COUNT(*) 전체 스캔 대신 EXPLAIN 사용, 근사값)
+    통계가 없거나 실패하면 None
+    """
+    try:
+        # 실패해도 바깥 트랜잭션이 aborted 상태가 되지 않도록 savepoint 안에서 실행
+        async with db.begin_nested():
+            result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {query}"), params)
+            plan = result.scalar()
+    except Exception as e:
+        print(f"[Pagination] 행 수 추정 실패: {e}")
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+def set_page_headers(response: Response, next_cursor: Optional[str], total: Optional[int] = None):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
+
+
+async def fetch_page(
+    db,
+    response: Response,
+    query: str,
+    params: dict,
+    sort_keys: Sequence[str],
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+) -> list:
+    """
+    키셋 페이지 조회
+    - query: 필터까지 적용된 SELECT (sort_columns_sql 포함, ORDER BY/LIMIT 제외, WHERE 절 필수)
+    - limit이 없으면 DEFAULT_PAGE_SIZE, 있으면 MAX_PAGE_SIZE까지 (전체 행을 한 번에 반환하지 않음)
+    - 다음 페이지가 있으면 X-Next-Cursor, include_total이면 X-Total-Count(근사값) 헤더 설정
+    """
+    page_size = clamp_page_size(limit)
+    total = await estimate_count(db, query, params) if include_total else None
+
+    query, params = page_query(query, params, sort_keys, cursor, page_size)
+    rows = (await db.execute(text(query), params)).fetchall()
+    rows, next_cursor = split_page(rows, page_size, len(sort_keys))
+    set_page_headers(response, next_cursor, total)
+    return rows
@@ -0,0 +1,183 @@
+"""
+비밀번호 해싱/검증 모듈
+- bcrypt 연산은 CPU를 오래 점유하므로 이벤트 루프에서 직접 실행하지 않음
+- 전용 스레드 풀에서 실행 (bcrypt는 해싱 중 GIL을 해제함)
+- 대기 작업 수 상한을 넘으면 503으로 즉시 거절
+- 대량 임포트용 해싱은 별도 풀에서 모든 코어를 사용
+"""
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional, Tuple
+
+import bcrypt
+from fastapi import HTTPException, status
+
+# ==================== 환경 설정 ====================
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+PASSWORD_POOL_MAX_PENDING = int(os.getenv("PASSWORD_POOL_MAX_PENDING", "64"))
+BULK_HASH_WORKERS = int(os.getenv("BULK_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+BCRYPT_ROUNDS = 12
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_POOL_WORKERS, thread_name_prefix="password")
+_bulk_executor = ThreadPoolExecutor(max_workers=BULK_HASH_WORKERS, thread_name_prefix="password-bulk")
+_pending_lock = threading.Lock()
+_pending = 0
+_completed = 0
+_rejected = 0
+
+
+# ==================== 동기 함수 ====================
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        if not plain_password or not hashed_password:
+            return False
+        # 입력값 검증
+        return bcrypt.checkpw(
+            plain_password.encode('utf-8'),
+            hashed_password.encode('utf-8')
+        )
+    except Exception as e:
+        print(f"verify_password error: {e}")
+        return False
+
+
+def get_password_hash(password: str) -> str:
+    try:
+        if not password:
+            raise ValueError("Password cannot be empty")
+
+        password = password.strip()
+
+        if len(password.encode('utf-8')) > 72:
+            raise ValueError("Password too long (max 72 bytes)")
+
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+        return hashed.decode('utf-8')
+    except Exception as e:
+        print(f"get_password_hash error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Password hashing failed: {str(e)}"
+        )
+
+
+# ==================== 스레드 풀 실행 ====================
+async def _run_in_pool(func, *args):
+    global _pending, _completed, _rejected
+    with _pending_lock:
+        if _pending >= PASSWORD_POOL_MAX_PENDING:
+            _rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="로그인 요청이 많습니다. 잠시 후 다시 시도하세요.",
+                headers={"Retry-After": "1"},
+            )
+        _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, func, *args)
+    finally:
+        with _pending_lock:
+            _pending -= 1
+            _completed += 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """비밀번호 검증 (스레드 풀에서 실행)"""
+    return await _run_in_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """비밀번호 해싱 (스레드 풀에서 실행)"""
+    return await _run_in_pool(get_password_hash, password)
+
+
+def get_password_pool_stats() -> dict:
+    """비밀번호 풀 상태 (워커 단위)"""
+    with _pending_lock:
+        pending = _pending
+        completed = _completed
+        rejected = _rejected
+    return {
+        "workers": PASSWORD_POOL_WORKERS,
+        "max_pending": PASSWORD_POOL_MAX_PENDING,
+        "running": min(pending, PASSWORD_POOL_WORKERS),
+        "queue_depth": max(0, pending - PASSWORD_POOL_WORKERS),
+        "completed": completed,
+        "rejected": rejected,
+    }
+
+
+# ==================== 대량 해싱 ====================
+def _log_progress(done: int, total: int):
+    print(f"[Password Hash] {done}/{total}")
+
+
+def hash_passwords_bulk(
+    passwords: List[str],
+    progress: Optional[Callable[[int, int], None]] = None,
+    rounds: int = BCRYPT_ROUNDS,
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    비밀번호 목록을 병렬로 해싱
+
+    같은 비밀번호(예: 기본 비밀번호)는 검증/인코딩을 한 번만 하고,
+    해시는 행마다 별도 salt로 생성한다.
+    앞뒤 공백은 get_password_hash와 같이 제거 (엑셀 셀 값 등 호출 경로와 무관하게 같은 해시)
+
+    Returns:
+        입력 순서대로 (hash, error) 목록
+    """
+    passwords = [(password or "").strip() for password in passwords]
+    total = len(passwords)
+    results: List[Tuple[Optional[str], Optional[str]]] = [(None, None)] * total
+    progress = progress or _log_progress
+    report_every = max(1, total // 10)
+
+    encoded = {}
+    for password in set(passwords):
+        if not password:
+            encoded[password] = ValueError("Password cannot be empty")
+            continue
+        raw = password.encode('utf-8')
+        if len(raw) > 72:
+            encoded[password] = ValueError("Password too long (max 72 bytes)")
+            continue
+        encoded[password] = raw
+
+    futures = {}
+    for idx, password in enumerate(passwords):
+        raw = encoded[password]
+        if isinstance(raw, Exception):
+            results[idx] = (None, str(raw))
+            continue
+        futures[_bulk_executor.submit(bcrypt.hashpw, raw, bcrypt.gensalt(rounds=rounds))] = idx
+
+    done = total - len(futures)
+    for future in as_completed(futures):
+        idx = futures[future]
+        try:
+            results[idx] = (future.result().decode('utf-8'), None)
+        except Exception as e:
+            results[idx] = (None, str(e))
+        done += 1
+        if done % report_every == 0 or done == total:
+            progress(done, total)
+
+    return results
+
+
+async def hash_passwords_bulk_async(
+    passwords: List[str],
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    """대량 해싱 (이벤트 루프를 막지 않도록 별도 스레드에서 대기)"""
+    started = time.perf_counter()
+    results = await asyncio.to_thread(hash_passwords_bulk, passwords, progress)
+    print(f"[Password Hash] {len(passwords)}건 해싱 완료 ({time.perf_counter() - started:.1f}s, workers={BULK_HASH_WORKERS})")
+    return results
@@ -0,0 +1,244 @@
+"""
+레코드 편집 잠금 (비동기 Redis)
+- 이벤트 루프를 막지 않도록 redis.asyncio 풀 사용
+- 모든 잠금 연산은 Lua 스크립트로 한 번의 왕복에 원자적으로 처리
+- 잠금 획득 시 레코드별로 단조 증가하는 fencing token 발급
+  (잠금 값 형식: "{token}:{user_id}")
+- token 카운터는 Redis에만 있으므로 발급 전 DB의 records.lock_fence로 하한을 맞춤
+  (Redis 재시작/축출로 카운터가 사라져도 이미 저장된 token보다 작은 값을 발급하지 않음)
+- Redis 장애 시 잠금 관련 요청만 503으로 실패
+"""
+import logging
+from typing import Dict, Iterable, Optional
+
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+
+from database import async_redis_client
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY_PREFIX = "record_lock:"
+# 목록 조회 시 MGET 한 번에 묶는 키 수 (너무 큰 단일 명령으로 Redis를 막지 않도록)
+LOCK_LOOKUP_CHUNK = 1000
+# 레코드별 fencing token 카운터 (hash 하나에 모아 키 수를 늘리지 않음)
+FENCE_HASH_KEY = "record_lock_fence"
+
+_LUA_PARSE = """
+local function parse(value)
+    local sep = string.find(value, ':', 1, true)
+    if sep then
+        return string.sub(value, 1, sep - 1), string.sub(value, sep + 1)
+    end
+    return '', value
+end
+"""
+
+# KEYS[1]=잠금 키, KEYS[2]=fence hash / ARGV[1]=record_id, ARGV[2]=user_id, ARGV[3]=ttl(ms),
+# ARGV[4]=DB에 저장된 마지막 token (records.lock_fence, 없으면 0)
+# 반환: {1, 잠금값} 획득(재획득 포함) / {0, 잠금값} 다른 사용자가 보유
+_ACQUIRE_SCRIPT = async_redis_client.register_script(_LUA_PARSE + """
+local current = redis.call('GET', KEYS[1])
+if current then
+    local token, owner = parse(current)
+    if owner ~= ARGV[2] then
+        return {0, current}
+    end
+    if token ~= '' then
+        redis.call('PEXPIRE', KEYS[1], ARGV[3])
+        return {1, current}
+    end
+end
+local issued = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+if issued < tonumber(ARGV[4]) then
+    redis.call('HSET', KEYS[2], ARGV[1], ARGV[4])
+end
+local token = redis.call('HINCRBY', KEYS[2], ARGV[1], 1)
+local value = token .. ':' .. ARGV[2]
+redis.call('SET', KEYS[1], value, 'PX', ARGV[3])
+return {1, value}
+""")
+
+# KEYS[1]=잠금 키 / ARGV[1]=user_id, ARGV[2]=token('' 이면 검사 안 함), ARGV[3]=ttl(ms, 0이면 삭제)
+# 반환: 1 성공 / 0 보유자가 아님
+_RELEASE_OR_EXTEND_SCRIPT = async_redis_client.register_script(_LUA_PARSE + """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    return 0
+end
+local token, owner = parse(current)
+if owner ~= ARGV[1] or (ARGV[2] ~= '' and token ~= ARGV[2]) then
+    return 0
+end
+if ARGV[3] == '0' then
+    redis.call('DEL', KEYS[1])
+else
+    redis.call('PEXPIRE', KEYS[1], ARGV[3])
+end
+return 1
+""")
+
+# KEYS[1]=잠금 키, KEYS[2]=fence hash / ARGV[1]=record_id, ARGV[2]=user_id, ARGV[3]=token('' 이면 검사 안 함)
+# 반환: {'ok'} / {'locked', 보유자} / {'stale', 최신 token}
+_CHECK_FENCE_SCRIPT = async_redis_client.register_script(_LUA_PARSE + """
+local current = redis.call('GET', KEYS[1])
+if current then
+    local token, owner = parse(current)
+    if owner ~= ARGV[2] then
+        return {'locked', owner}
+    end
+    if ARGV[3] ~= '' and token ~= ARGV[3] then
+        return {'stale', token}
+    end
+    return {'ok'}
+end
+if ARGV[3] ~= '' then
+    local latest = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+    if tonumber(ARGV[3]) < latest then
+        return {'stale', tostring(latest)}
+    end
+end
+return {'ok'}
+""")
+
+
+def _lock_key(record_id: int) -> str:
+    return f"{LOCK_KEY_PREFIX}{record_id}"
+
+
+def _parse_lock_value(value: Optional[str]):
+    """잠금 값 → (token, owner)"""
+    if not value:
+        return None, None
+    token, sep, owner = value.partition(":")
+    if not sep:
+        return None, value
+    return int(token), owner
+
+
+def _lock_unavailable(e: Exception) -> HTTPException:
+    logger.warning("[Record Lock] Redis 오류: %s", e)
+    return HTTPException(status_code=503, detail="잠금 서버에 연결할 수 없습니다. 잠시 후 다시 시도하세요.")
+
+
+async def acquire_lock(
+    record_id: int, user_id: str, duration_minutes: int = 30, stored_fence: Optional[int] = None
+) -> Optional[int]:
+    """
+    Acquire edit lock for a record
+
+    Args:
+        stored_fence: 레코드에 저장된 마지막 token (records.lock_fence) — 새 token은 항상 이보다 큼
+
+    Returns:
+        fencing token (획득 실패 시 None)
+    """
+    try:
+        acquired, value = await _ACQUIRE_SCRIPT(
+            keys=[_lock_key(record_id), FENCE_HASH_KEY],
+            args=[record_id, user_id, duration_minutes * 60 * 1000, stored_fence or 0],
+        )
+    except RedisError as e:
+        raise _lock_unavailable(e)
+    if not acquired:
+        return None
+    token, _ = _parse_lock_value(value)
+    return token
+
+
+async def release_lock(record_id: int, user_id: str, token: Optional[int] = None) -> bool:
+    """Release edit lock for a record (보유자만, token이 있으면 token도 일치해야 함)"""
+    try:
+        released = await _RELEASE_OR_EXTEND_SCRIPT(
+            keys=[_lock_key(record_id)],
+            args=[user_id, "" if token is None else token, 0],
+        )
+    except RedisError as e:
+        raise _lock_unavailable(e)
+    return bool(released)
+
+
+async def release_lock_after_save(record_id: int, user_id: str, token: Optional[int] = None):
+    """
+    저장 커밋 후 잠금 해제
+    - 저장은 이미 반영됐으므로 Redis 장애로 실패해도 예외를 올리지 않고 경고만 남김 (잠금은 TTL로 만료)
+    """
+    try:
+        await release_lock(record_id, user_id, token)
+    except HTTPException as e:
+        logger.warning("[Record Lock] 레코드 %s 저장 후 잠금 해제 실패 (TTL로 만료 예정): %s", record_id, e.detail)
+
+
+async def get_lock_owner(record_id: int) -> Optional[str]:
+    """Get the current lock owner for a record"""
+    try:
+        value = await async_redis_client.get(_lock_key(record_id))
+    except RedisError as e:
+        raise _lock_unavailable(e)
+    return _parse_lock_value(value)[1]
+
+
+async def get_lock_owners(record_ids: Iterable[int]) -> Dict[int, str]:
+    """
+    여러 레코드의 잠금 보유자를 한 번에 조회 (목록 API용)
+    - MGET 청크들을 파이프라인 하나로 보내 왕복 1회
+    - 잠긴 레코드만 {record_id: owner}로 반환
+    - Redis 장애 시 목록 자체는 보여줄 수 있도록 빈 dict 반환
+    """
+    ids = list(dict.fromkeys(record_ids))
+    if not ids:
+        return {}
+
+    chunks = [ids[i:i + LOCK_LOOKUP_CHUNK] for i in range(0, len(ids), LOCK_LOOKUP_CHUNK)]
+    try:
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            for chunk in chunks:
+                pipe.mget([_lock_key(record_id) for record_id in chunk])
+            results = await pipe.execute()
+    except RedisError as e:
+        logger.warning("[Record Lock] 잠금 상태 일괄 조회 실패: %s", e)
+        return {}
+
+    owners = {}
+    for chunk, values in zip(chunks, results):
+        for record_id, value in zip(chunk, values):
+            owner = _parse_lock_value(value)[1]
+            if owner is not None:
+                owners[record_id] = owner
+    return owners
+
+
+async def extend_lock(record_id: int, user_id: str, duration_minutes: int = 30, token: Optional[int] = None) -> bool:
+    """Extend lock duration"""
+    try:
+        extended = await _RELEASE_OR_EXTEND_SCRIPT(
+            keys=[_lock_key(record_id)],
+            args=[user_id, "" if token is None else token, duration_minutes * 60 * 1000],
+        )
+    except RedisError as e:
+        raise _lock_unavailable(e)
+    return bool(extended)
+
+
+async def check_write_fence(record_id: int, user_id: str, token: Optional[int] = None):
+    """
+    저장 전 잠금/fencing token 검사
+    - 다른 사용자가 잠금 보유 → 423
+    - 더 새로운 token이 발급된 뒤의 오래된 token → 409
+    """
+    try:
+        result = await _CHECK_FENCE_SCRIPT(
+            keys=[_lock_key(record_id), FENCE_HASH_KEY],
+            args=[record_id, user_id, "" if token is None else token],
+        )
+    except RedisError as e:
+        raise _lock_unavailable(e)
+
+    status = result[0]
+    if status == "locked":
+        raise HTTPException(status_code=423, detail=f"Record is locked by {result[1]}")
+    if status == "stale":
+        raise HTTPException(
+            status_code=409,
+            detail=f"편집 잠금이 만료되었거나 다른 세션에서 다시 획득되었습니다 (latest token {result[1]}). 잠금을 다시 획득하세요."
+        )
@@ -0,0 +1,60 @@
+"""
+스키마 자가 복구 (워커 시작 시 호출)
+- alembic upgrade head를 아직 실행하지 않은 기존 DB에서도 코드가 쓰는 컬럼이 있도록 추가
+- 없는 컬럼만 ALTER (ADD COLUMN IF NOT EXISTS도 테이블 잠금을 잡으므로 먼저 확인)
+- NULL/상수 기본값 컬럼 추가만 다룸 (테이블 재작성 없음), 인덱스·백필은 마이그레이션 몫
+- 권한 부족 등으로 추가하지 못하면 RuntimeError → 워커가 뜨지 않고 마이그레이션 안내
+"""
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# (테이블, 컬럼, 정의) — migrations/versions와 init.sql에 같은 정의가 있음
+REQUIRED_COLUMNS = (
+    ("records", "content_hash", "VARCHAR(64)"),  # 0003
+    ("records", "lock_fence", "BIGINT"),  # 0004
+    ("users", "token_version", "INTEGER NOT NULL DEFAULT 0"),  # 0006
+)
+
+# 여러 워커가 동시에 시작해도 ALTER는 한 번만 (pg_advisory_xact_lock 키)
+_SCHEMA_LOCK_ID = 7301302
+
+
+def _missing_columns(db: Session) -> List[tuple]:
+    existing = {
+        (row.table_name, row.column_name)
+        for row in db.execute(
+            text("""
+                SELECT table_name, column_name
+                FROM information_schema.columns
+                WHERE table_schema = current_schema()
+                  AND table_name = ANY(:tables)
+            """),
+            {"tables": sorted({table for table, _, _ in REQUIRED_COLUMNS})}
+        )
+    }
+    return [c for c in REQUIRED_COLUMNS if (c[0], c[1]) not in existing]
+
+
+def ensure_required_columns(db: Session) -> List[str]:
+    """
+    빠진 컬럼 추가 (commit은 호출자)
+
+    Returns:
+        추가한 "테이블.컬럼" 목록
+    """
+    if not _missing_columns(db):
+        return []
+    db.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": _SCHEMA_LOCK_ID})
+    added = []
+    try:
+        # 락을 기다리는 동안 다른 워커가 추가했을 수 있음
+        for table, column, definition in _missing_columns(db):
+            db.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {definition}"))
+            added.append(f"{table}.{column}")
+    except Exception as e:
+        raise RuntimeError(
+            f"DB 스키마가 오래되었습니다 ({e}). 'alembic upgrade head'를 실행한 뒤 다시 시작하세요."
+        ) from e
+    return added
@@ -0,0 +1,345 @@
+"""
+주요 조회 쿼리 실행 계획 점검 (인덱스 회귀 검사)
+
+사용법 (backend 디렉터리 또는 컨테이너 /app에서, DATABASE_URL 필요):
+    python scripts/check_query_plans.py
+    python scripts/check_query_plans.py --students-per-class 30 --verbose
+
+동작:
+1. 하나의 트랜잭션 안에서 학년도 2099로 학생/교사/기록/배정 데이터를 생성
+2. ANALYZE 후 엔드포인트별 쿼리를 EXPLAIN (FORMAT JSON)
+   - SQL은 main.py의 쿼리 상수/필터 함수/정렬 키와 pagination.page_query로 조립
+     → 엔드포인트 쿼리를 바꾸면 별도 수정 없이 바뀐 쿼리가 점검됨
+3. 실패 조건 (종료 코드 1)
+   - 검사 대상 테이블에 Seq Scan
+   - 키셋 페이지 점검에서 records 위에 Sort 노드
+     (걸러진 행 전체를 정렬한 뒤 LIMIT → 인덱스 순서로 읽다 멈추지 못함)
+4. 마지막에 ROLLBACK 후 같은 테이블을 다시 ANALYZE → 운영 DB에 실행해도 데이터가 남지 않음
+   (ANALYZE가 갱신하는 pg_class.reltuples/relpages는 ROLLBACK으로 되돌아가지 않으므로
+    실제 데이터로 통계를 다시 계산해 플래너가 가짜 데이터 기준 통계를 쓰지 않게 함)
+
+인덱스를 추가/변경하거나 새 목록 엔드포인트를 만들면 CHECKS에 항목을 추가한다.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "query-plan-check")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from access_scope import ACCESSIBLE_RECORD_CONDITION, refresh_teacher_access_scope  # noqa: E402
+from pagination import DEFAULT_PAGE_SIZE, encode_cursor, page_query  # noqa: E402
+from main import (  # noqa: E402
+    ACCESSIBLE_RECORD_QUERY, ACCESSIBLE_RECORD_SORT_KEYS, ACTIVITY_RECORDS_QUERY, MY_ASSIGNMENTS_QUERY,
+    RECORD_LIST_QUERY, RECORD_LIST_SORT_KEYS, SUBJECT_RECORDS_ORDER_BY, SUBJECT_RECORDS_QUERY,
+    _accessible_record_filters, _record_columns, _record_list_filters,
+)
+
+SCHOOL_YEAR = 2099
+PREFIX = "qp_"
+GRADES = 3
+CLASSES_PER_GRADE = 12
+SUBJECT_COUNT = 10
+# 작은 테이블은 Seq Scan이 정상이므로 인덱스 선택이 의미 있을 만큼 채움
+FILLER_SUBJECTS = 3000
+ASSIGNMENT_HISTORY_YEARS = 10
+# 검사 데이터를 넣은 뒤 ANALYZE하는 테이블 (ROLLBACK 후 실제 데이터로 다시 ANALYZE)
+ANALYZED_TABLES = ("users", "subjects", "records", "teacher_assignments", "teacher_access_scopes")
+
+
+def _mid_cursor(ctx) -> str:
+    """목록 중간(2학년 6반 15번)부터 시작하는 커서 → 두 번째 이후 페이지 쿼리 모양"""
+    return encode_cursor([2, 6, 15, 0, "", 0])
+
+
+def _listing(query: str, params: dict, sort_keys, ctx, paged: bool):
+    """fetch_page와 같은 모양: 첫 페이지(커서 없음) 또는 중간 커서 이후 페이지, 둘 다 LIMIT"""
+    cursor = _mid_cursor(ctx) if paged else None
+    return page_query(query, params, sort_keys, cursor, DEFAULT_PAGE_SIZE)
+
+
+def _records(ctx, paged: bool = False, **filters):
+    """/api/records"""
+    params = {}
+    query = RECORD_LIST_QUERY.format(columns=_record_columns(None))
+    query += _record_list_filters(params, **filters)
+    return _listing(query, params, RECORD_LIST_SORT_KEYS, ctx, paged)
+
+
+def _accessible(ctx, scope_user_id=None, paged: bool = False, **filters):
+    """/api/teacher/accessible-records (scope_user_id 없으면 관리자)"""
+    params = {"school_year": SCHOOL_YEAR}
+    query = ACCESSIBLE_RECORD_QUERY.format(columns=_record_columns(None))
+    if scope_user_id:
+        query += f" AND {ACCESSIBLE_RECORD_CONDITION}"
+        params["scope_user_id"] = scope_user_id
+    query += _accessible_record_filters(params, **filters)
+    return _listing(query, params, ACCESSIBLE_RECORD_SORT_KEYS, ctx, paged)
+
+
+def _subject_records(ctx, semester: int, grade: int, class_number=None):
+    """/api/teacher/subject-records"""
+    params = {"subject_id": ctx["subject_ids"][1], "school_year": SCHOOL_YEAR, "semester": semester, "grade": grade}
+    query = SUBJECT_RECORDS_QUERY.format(columns=_record_columns(None))
+    if class_number:
+        query += " AND r.class_number = :class_number"
+        params["class_number"] = class_number
+    return query + SUBJECT_RECORDS_ORDER_BY, params
+
+
+# (이름, (SQL, 파라미터) 생성 함수, Seq Scan이 나오면 안 되는 테이블, records 위 Sort 금지 여부)
+# Sort 금지는 범위가 학교 전체로 커지는 키셋 페이지 경로에만 적용
+# (학생별/교사 범위/학급 조회는 걸러진 행이 적어 정렬 비용이 범위 크기로 제한됨)
+CHECKS = [
+    (
+        "accessible-records (담임 범위)",
+        lambda ctx: _accessible(ctx, scope_user_id=ctx["homeroom_teacher"]),
+        {"records"},
+        False,
+    ),
+    (
+        "accessible-records (교과 범위 + record_type)",
+        lambda ctx: _accessible(ctx, scope_user_id=ctx["subject_teacher"], record_type="subject"),
+        {"records"},
+        False,
+    ),
+    (
+        "accessible-records (담임 범위, 키셋 페이지)",
+        lambda ctx: _accessible(ctx, scope_user_id=ctx["homeroom_teacher"], paged=True),
+        {"records"},
+        False,
+    ),
+    (
+        "accessible-records (관리자 필터)",
+        lambda ctx: _accessible(ctx, grade=2, class_number=3, subject_id=ctx["subject_ids"][0],
+                                record_type="subject"),
+        {"records"},
+        False,
+    ),
+    (
+        "accessible-records (관리자 전체, 키셋 페이지)",
+        lambda ctx: _accessible(ctx, paged=True),
+        {"records"},
+        True,
+    ),
+    (
+        "accessible-records (관리자 학기, 키셋 페이지)",
+        lambda ctx: _accessible(ctx, paged=True, semester=1),
+        {"records"},
+        True,
+    ),
+    (
+        "subject-records (학급)",
+        lambda ctx: _subject_records(ctx, semester=1, grade=2, class_number=4),
+        {"records"},
+        False,
+    ),
+    (
+        "subject-records (학년 전체)",
+        lambda ctx: _subject_records(ctx, semester=2, grade=1),
+        {"records"},
+        False,
+    ),
+    (
+        "activity-records",
+        lambda ctx: (
+            ACTIVITY_RECORDS_QUERY.format(columns=_record_columns(None)),
+            {"subject_id": ctx["activity_subject_id"], "grade": 3, "class_number": 7, "school_year": SCHOOL_YEAR},
+        ),
+        {"records"},
+        False,
+    ),
+    (
+        "records (학생별)",
+        lambda ctx: _records(ctx, student_user_id=ctx["student"]),
+        {"records", "users"},
+        False,
+    ),
+    (
+        "records (전체, 키셋 페이지)",
+        lambda ctx: _records(ctx, paged=True),
+        {"records"},
+        True,
+    ),
+    (
+        "my-assignments",
+        lambda ctx: (MY_ASSIGNMENTS_QUERY, {"user_id": ctx["subject_teacher"], "school_year": SCHOOL_YEAR}),
+        {"teacher_assignments"},
+        False,
+    ),
+]
+
+
+def _seed(conn, students_per_class: int) -> dict:
+    """검사용 데이터 생성 (호출한 트랜잭션 안에서만 유효)"""
+    subject_ids = [
+        row.id for row in conn.execute(
+            text("""
+                INSERT INTO subjects (subject_name, subject_code, description)
+                SELECT :prefix || '과목_' || n, :prefix || 'S' || n, 'plan check'
+                FROM generate_series(1, :count) AS n
+                RETURNING id
+            """),
+            {"prefix": PREFIX, "count": SUBJECT_COUNT + FILLER_SUBJECTS}
+        )
+    ]
+    course_ids = subject_ids[:SUBJECT_COUNT]
+    activity_subject_id = subject_ids[SUBJECT_COUNT]
+
+    conn.execute(
+        text("""
+            INSERT INTO users (user_id, password_hash, full_name, role, grade, class_number, number_in_class)
+            SELECT :prefix || g || '_' || c || '_' || n, 'x', '학생' || n, 'student', g, c, n
+            FROM generate_series(1, :grades) AS g,
+                 generate_series(1, :classes) AS c,
+                 generate_series(1, :students) AS n
+        """),
+        {"prefix": PREFIX, "grades": GRADES, "classes": CLASSES_PER_GRADE, "students": students_per_class}
+    )
+    conn.execute(
+        text("""
+            INSERT INTO users (user_id, password_hash, full_name, role)
+            SELECT :prefix || 'T' || n, 'x', '교사' || n, 'teacher'
+            FROM generate_series(1, :count) AS n
+        """),
+        {"prefix": PREFIX, "count": GRADES * CLASSES_PER_GRADE * 4}
+    )
+
+    conn.execute(
+        text("""
+            INSERT INTO records
+            (student_user_id, subject_id, record_type, school_year, semester, grade, class_number,
+             number_in_class, student_number, content)
+            SELECT u.user_id, s.id, 'subject', :school_year, sem, u.grade, u.class_number,
+                   u.number_in_class, u.user_id, repeat('세특 ', 300)
+            FROM users u
+            CROSS JOIN unnest(CAST(:subject_ids AS INTEGER[])) AS s(id)
+            CROSS JOIN generate_series(1, 2) AS sem
+            WHERE u.user_id LIKE :pattern AND u.role = 'student'
+        """),
+        {"school_year": SCHOOL_YEAR, "subject_ids": course_ids, "pattern": f"{PREFIX}%"}
+    )
+    conn.execute(
+        text("""
+            INSERT INTO records
+            (student_user_id, subject_id, record_type, school_year, grade, class_number, number_in_class, remarks)
+            SELECT u.user_id, :subject_id, 'activity', :school_year, u.grade, u.class_number,
+                   u.number_in_class, repeat('활동 ', 200)
+            FROM users u
+            WHERE u.user_id LIKE :pattern AND u.role = 'student'
+        """),
+        {"school_year": SCHOOL_YEAR, "subject_id": activity_subject_id, "pattern": f"{PREFIX}%"}
+    )
+
+    # 교사 역할: 학급마다 담임 1명, 교과교사 3명(학급 지정), 지난 학년도 배정 이력 포함
+    conn.execute(
+        text("""
+            INSERT INTO teacher_assignments (teacher_user_id, role_type, grade, class_number, subject_id, school_year)
+            SELECT :prefix || 'T' || (((g - 1) * :classes + c - 1) * 4 + k + 1),
+                   CASE WHEN k = 0 THEN 'homeroom_teacher' ELSE 'subject_teacher' END,
+                   g, c,
+                   CASE WHEN k = 0 THEN NULL ELSE (CAST(:subject_ids AS INTEGER[]))[k] END,
+                   y
+            FROM generate_series(1, :grades) AS g,
+                 generate_series(1, :classes) AS c,
+                 generate_series(0, 3) AS k,
+                 generate_series(:school_year - :history + 1, :school_year) AS y
+        """),
+        {"prefix": PREFIX, "classes": CLASSES_PER_GRADE, "grades": GRADES,
+         "subject_ids": course_ids, "school_year": SCHOOL_YEAR, "history": ASSIGNMENT_HISTORY_YEARS}
+    )
+    teachers = [f"{PREFIX}T{n}" for n in range(1, GRADES * CLASSES_PER_GRADE * 4 + 1)]
+    refresh_teacher_access_scope(conn, teachers, SCHOOL_YEAR)
+
+    for table in ANALYZED_TABLES:
+        conn.execute(text(f"ANALYZE {table}"))
+
+    return {
+        "subject_ids": course_ids,
+        "activity_subject_id": activity_subject_id,
+        "homeroom_teacher": f"{PREFIX}T1",
+        "subject_teacher": f"{PREFIX}T2",
+        "student": f"{PREFIX}2_3_5",
+    }
+
+
+def _walk(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def _explain(conn, sql: str, params: dict) -> dict:
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def _record_sorts(nodes) -> list:
+    """records를 읽는 하위 트리 위의 Sort 노드 (Incremental Sort는 앞 키가 이미 정렬돼 있어 제외)"""
+    return [
+        n for n in nodes
+        if n["Node Type"] == "Sort"
+        and any(child.get("Relation Name") == "records" for child in _walk(n))
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students-per-class", type=int, default=30)
+    parser.add_argument("--verbose", action="store_true", help="실행 계획 노드 출력")
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        print("DATABASE_URL environment variable not set")
+        return 2
+
+    engine = create_engine(database_url)
+    failures = 0
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            ctx = _seed(conn, args.students_per_class)
+            for name, build, checked_tables, index_ordered in CHECKS:
+                sql, params = build(ctx)
+                plan = _explain(conn, sql, params)
+                nodes = list(_walk(plan))
+                problems = []
+                seq_scans = sorted({
+                    n["Relation Name"] for n in nodes
+                    if n["Node Type"] == "Seq Scan" and n.get("Relation Name") in checked_tables
+                })
+                if seq_scans:
+                    problems.append(f"Seq Scan on {', '.join(seq_scans)}")
+                if index_ordered:
+                    sorts = _record_sorts(nodes)
+                    if sorts:
+                        problems.append(f"Sort over records (rows={sorts[0]['Plans'][0].get('Plan Rows')})")
+                indexes = sorted({n["Index Name"] for n in nodes if n.get("Index Name")})
+                if problems:
+                    failures += 1
+                    print(f"[FAIL] {name}: {'; '.join(problems)}")
+                else:
+                    print(f"[ OK ] {name}: {', '.join(indexes) or '-'}")
+                if args.verbose or problems:
+                    for n in nodes:
+                        target = n.get("Index Name") or n.get("Relation Name") or ""
+                        print(f"         {n['Node Type']} {target} (rows={n.get('Plan Rows')})")
+        finally:
+            transaction.rollback()
+            with conn.begin():
+                for table in ANALYZED_TABLES:
+                    conn.execute(text(f"ANALYZE {table}"))
+    engine.dispose()
+
+    print(f"{len(CHECKS) - failures}/{len(CHECKS)} passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
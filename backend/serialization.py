@@ -0,0 +1,41 @@
+"""
+대용량 목록 응답 직렬화
+- DB에서 읽은 행은 이미 스키마가 보장되므로 response_model 재검증을 건너뜀
+  (엔드포인트가 Response를 직접 반환하면 FastAPI는 검증/jsonable_encoder를 생략)
+- orjson(C 구현)으로 바로 bytes 생성
+- DECIMAL(hours 등)은 기존 jsonable_encoder와 같은 숫자 표현으로 변환
+"""
+from decimal import Decimal
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+# 엔드포인트에서 주입받은 Response에 설정한 헤더 중 그대로 옮기지 않을 것
+_SKIP_HEADERS = {"content-length", "content-type"}
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        # fastapi.encoders.decimal_encoder와 동일 규칙
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson 기반 JSON 응답 (datetime은 isoformat과 같은 RFC 3339 문자열)"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def fast_json_response(content: Any, response: Optional[Response] = None) -> FastJSONResponse:
+    """
+    신뢰할 수 있는 DB 행(dict 목록)을 검증 없이 바로 직렬화
+    - response: 엔드포인트에 주입된 Response (페이지 커서 등 헤더를 옮겨 담음)
+    """
+    headers = None
+    if response is not None:
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _SKIP_HEADERS}
+    return FastJSONResponse(content, headers=headers)
@@ -0,0 +1,162 @@
+"""
+인증 사용자 캐시
+- 1차: 워커 프로세스 내 TTL/LRU 캐시
+- 2차: Redis 공유 캐시 (모든 uvicorn 워커가 공유)
+- 사용자 정보가 바뀌면 invalidate_user()로 무효화
+"""
+import os
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Optional
+
+import redis
+
+from database import redis_client
+
+# ==================== 환경 설정 ====================
+# 워커 내 캐시는 다른 워커의 무효화를 받지 못하므로 TTL을 짧게 유지
+USER_CACHE_LOCAL_TTL = float(os.getenv("USER_CACHE_LOCAL_TTL", "5"))
+USER_CACHE_LOCAL_MAXSIZE = int(os.getenv("USER_CACHE_LOCAL_MAXSIZE", "2048"))
+USER_CACHE_REDIS_TTL = int(os.getenv("USER_CACHE_REDIS_TTL", "300"))
+
+USER_CACHE_KEY_PREFIX = "user_cache:"
+
+# 캐시에 저장하는 컬럼 (password_hash는 저장하지 않음)
+CACHED_USER_FIELDS = (
+    "id", "user_id", "full_name", "role", "student_number",
+    "grade", "class_number", "number_in_class", "token_version", "created_at", "updated_at",
+)
+_DATETIME_FIELDS = ("created_at", "updated_at")
+
+_local_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_local_lock = threading.Lock()
+_stats = {
+    "local_hits": 0,
+    "redis_hits": 0,
+    "misses": 0,
+    "invalidations": 0,
+    "redis_errors": 0,
+}
+
+
+class CachedUser(SimpleNamespace):
+    """캐시에서 복원한 사용자 (Row와 동일하게 속성으로 접근)"""
+
+
+def _count(stat: str):
+    with _local_lock:
+        _stats[stat] += 1
+
+
+def _redis_key(user_id: str) -> str:
+    return f"{USER_CACHE_KEY_PREFIX}{user_id}"
+
+
+def _to_payload(row) -> dict:
+    mapping = row._mapping
+    return {field: mapping.get(field) for field in CACHED_USER_FIELDS}
+
+
+def _encode(payload: dict) -> str:
+    data = dict(payload)
+    for field in _DATETIME_FIELDS:
+        if isinstance(data.get(field), datetime):
+            data[field] = data[field].isoformat()
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _decode(raw: str) -> dict:
+    data = json.loads(raw)
+    for field in _DATETIME_FIELDS:
+        if data.get(field):
+            data[field] = datetime.fromisoformat(data[field])
+    return data
+
+
+def _local_get(user_id: str) -> Optional[dict]:
+    with _local_lock:
+        entry = _local_cache.get(user_id)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at < time.monotonic():
+            del _local_cache[user_id]
+            return None
+        _local_cache.move_to_end(user_id)
+        return payload
+
+
+def _local_set(user_id: str, payload: dict):
+    with _local_lock:
+        _local_cache[user_id] = (time.monotonic() + USER_CACHE_LOCAL_TTL, payload)
+        _local_cache.move_to_end(user_id)
+        while len(_local_cache) > USER_CACHE_LOCAL_MAXSIZE:
+            _local_cache.popitem(last=False)
+
+
+def get_cached_user(user_id: str) -> Optional[CachedUser]:
+    """캐시에서 사용자 조회 (없으면 None)"""
+    payload = _local_get(user_id)
+    if payload is not None:
+        _count("local_hits")
+        return CachedUser(**payload)
+
+    try:
+        raw = redis_client.get(_redis_key(user_id))
+    except redis.RedisError as e:
+        print(f"[User Cache] Redis 조회 실패: {e}")
+        _count("redis_errors")
+        raw = None
+
+    if raw:
+        payload = _decode(raw)
+        _local_set(user_id, payload)
+        _count("redis_hits")
+        return CachedUser(**payload)
+
+    _count("misses")
+    return None
+
+
+def cache_user(row) -> CachedUser:
+    """DB에서 읽은 사용자 Row를 두 계층 캐시에 저장"""
+    payload = _to_payload(row)
+    user_id = payload["user_id"]
+    _local_set(user_id, payload)
+    try:
+        redis_client.setex(_redis_key(user_id), USER_CACHE_REDIS_TTL, _encode(payload))
+    except redis.RedisError as e:
+        print(f"[User Cache] Redis 저장 실패: {e}")
+        _count("redis_errors")
+    return CachedUser(**payload)
+
+
+def invalidate_user(*user_ids: str):
+    """사용자 캐시 무효화 (users 행을 변경한 뒤 호출)"""
+    user_ids = [str(u) for u in user_ids if u]
+    if not user_ids:
+        return
+    with _local_lock:
+        for user_id in user_ids:
+            _local_cache.pop(user_id, None)
+        _stats["invalidations"] += len(user_ids)
+    try:
+        redis_client.delete(*[_redis_key(u) for u in user_ids])
+    except redis.RedisError as e:
+        print(f"[User Cache] Redis 무효화 실패: {e}")
+        _count("redis_errors")
+
+
+def get_user_cache_stats() -> dict:
+    """캐시 적중/실패 카운터 (워커 단위)"""
+    with _local_lock:
+        stats = dict(_stats)
+        stats["local_size"] = len(_local_cache)
+    lookups = stats["local_hits"] + stats["redis_hits"] + stats["misses"]
+    stats["hit_ratio"] = round((stats["local_hits"] + stats["redis_hits"]) / lookups, 4) if lookups else None
+    stats["worker_pid"] = os.getpid()
+    return stats
@@ -26,6 +26,7 @@ export default function RecordEditor({ record, onClose }: RecordEditorProps) {
   const [previewMode, setPreviewMode] = useState(false);
   
   const lockIntervalRef = useRef<NodeJS.Timeout>();
+  const lockTokenRef = useRef<number | null>(null);
   const isTeacherOrAdmin = user?.role === 'teacher' || user?.role === 'admin';
   const canEdit = isTeacherOrAdmin || record.is_editable_by_student;
 
@@ -35,8 +36,9 @@ export default function RecordEditor({ record, onClose }: RecordEditorProps) {
       if (lockIntervalRef.current) {
         clearInterval(lockIntervalRef.current);
       }
-      if (isLocked) {
-        recordApi.unlock(record.id).catch(console.error);
+      // 마운트 시점의 isLocked는 항상 false이므로 token 유무로 판단
+      if (lockTokenRef.current !== null) {
+        recordApi.unlock(record.id, lockTokenRef.current).catch(console.error);
       }
     };
   }, []);
@@ -61,7 +63,8 @@ export default function RecordEditor({ record, onClose }: RecordEditorProps) {
     }
 
     try {
-      await recordApi.lock(record.id);
+      const { fencing_token } = await recordApi.lock(record.id);
+      lockTokenRef.current = fencing_token;
       setIsLocked(true);
       setError('');
       
@@ -93,9 +96,11 @@ export default function RecordEditor({ record, onClose }: RecordEditorProps) {
     setSuccess('');
 
     try {
-      await recordApi.update(record.id, { content });
+      await recordApi.update(record.id, { content, lock_token: lockTokenRef.current });
       setSuccess('저장되었습니다.');
       setIsLocked(false);
+      // 저장 시 서버가 잠금을 해제함
+      lockTokenRef.current = null;
       
       if (lockIntervalRef.current) {
         clearInterval(lockIntervalRef.current);
@@ -1,7 +1,7 @@
 import { useState, useEffect, ReactNode } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuthStore } from '../store';
-import { adminApi, subjectApi } from '../utils/api';
+import { adminApi, subjectApi, jobApi, JobWaitError } from '../utils/api';
 import type { User, Subject, TeacherAssignment, TeacherRoleType } from '../types';
 import { ROLE_TYPE_LABELS } from '../types';
 import SubjectAssignmentManager from '../components/SubjectAssignmentManager';
@@ -96,6 +96,7 @@ function ExcelImportSection({ type, onImportComplete }: ExcelImportSectionProps)
   const [file, setFile] = useState<File | null>(null);
   const [importing, setImporting] = useState(false);
   const [result, setResult] = useState<any>(null);
+  const [progress, setProgress] = useState<number | null>(null);
   const [schoolYear, setSchoolYear] = useState(2025);
 
   const typeNames: Record<string, string> = {
@@ -149,18 +150,27 @@ function ExcelImportSection({ type, onImportComplete }: ExcelImportSectionProps)
         body: formData
       });
 
-      if (response.ok) {
-        const data = await response.json();
-        setResult(data);
-        if (data.success > 0) onImportComplete();
-      } else {
-        alert('임포트 실패');
+      if (!response.ok) {
+        const data = await response.json().catch(() => null);
+        alert(data?.detail || '임포트 실패');
+        return;
+      }
+
+      // 임포트는 작업으로 실행됨 → job_id로 끝날 때까지 진행 상황 조회
+      const { job_id } = await response.json();
+      const job = await jobApi.waitFor(job_id, (j) => setProgress(j.rows_processed));
+      if (job.status === 'failed') {
+        alert(job.error || '임포트 실패');
+        return;
       }
+      setResult(job.result);
+      if (job.result?.success > 0) onImportComplete();
     } catch (error) {
       console.error(error);
-      alert('오류가 발생했습니다.');
+      alert(error instanceof JobWaitError ? error.message : '오류가 발생했습니다.');
     } finally {
       setImporting(false);
+      setProgress(null);
     }
   };
 
@@ -199,7 +209,7 @@ function ExcelImportSection({ type, onImportComplete }: ExcelImportSectionProps)
           disabled={!file || importing}
           className="px-4 py-2 bg-green-600 text-white rounded-md hover:bg-green-700 disabled:opacity-50"
         >
-          {importing ? '임포트 중...' : '임포트 실행'}
+          {importing ? (progress ? `임포트 중... (${progress}행 처리)` : '임포트 중...') : '임포트 실행'}
         </button>
 
         {result && (
@@ -711,8 +721,13 @@ export default function AdminPage() {
     if (!confirm(`선택한 ${selectedUsers.size}명의 사용자를 삭제하시겠습니까?`)) return;
 
     try {
-      await adminApi.bulkDeleteUsers(Array.from(selectedUsers));
-      setSuccess(`${selectedUsers.size}명의 사용자가 삭제되었습니다.`);
+      const result = await adminApi.bulkDeleteUsers(Array.from(selectedUsers));
+      if (result.errors.length > 0) {
+        setError(`일부 사용자 삭제 실패: ${result.errors.join(', ')}`);
+      }
+      if (result.deleted > 0) {
+        setSuccess(`${result.deleted}명의 사용자가 삭제되었습니다.`);
+      }
       setSelectedUsers(new Set());
       loadData();
     } catch (err: any) {
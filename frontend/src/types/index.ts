@@ -164,4 +164,19 @@ export interface TeacherAssignmentCreate {
   class_number?: number | null;
   subject_id?: number | null;
   school_year: number;
-}
\ No newline at end of file
+}
+// ==================== 임포트 작업 ====================
+
+export type ImportJobStatus = 'queued' | 'running' | 'succeeded' | 'failed';
+
+export interface ImportJob {
+  job_id: string;
+  kind: string;
+  status: ImportJobStatus;
+  rows_processed: number;
+  success: number;
+  failed: number;
+  errors: string[];
+  error?: string | null;
+  result?: any;
+}
@@ -2,7 +2,7 @@ import axios from 'axios';
 import type { 
   LoginResponse, User, Subject, Record, RecordWithDetails, 
   Comment, RecordVersion, TeacherAssignment, TeacherAssignmentCreate,
-  MyClass, MySubject
+  MyClass, MySubject, ImportJob
 } from '../types';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || '/api';
@@ -40,6 +40,22 @@ api.interceptors.response.use(
   }
 );
 
+// 키셋 페이지 목록 전체 조회 (다음 페이지 커서는 X-Next-Cursor 헤더, 없으면 마지막 페이지)
+const LIST_PAGE_SIZE = 500;
+
+async function getAllPages<T>(url: string, params?: object): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const response = await api.get<T[]>(url, {
+      params: { ...params, limit: LIST_PAGE_SIZE, cursor },
+    });
+    items.push(...response.data);
+    cursor = (response.headers['x-next-cursor'] as string | undefined) || undefined;
+  } while (cursor);
+  return items;
+}
+
 // Activity tracking
 let lastActivityTime = Date.now();
 let activityCheckInterval: ReturnType<typeof setInterval> | null = null;
@@ -159,8 +175,7 @@ export const recordApi = {
     grade?: number;
     class_number?: number;
   }): Promise<RecordWithDetails[]> => {
-    const response = await api.get<RecordWithDetails[]>('/records', { params });
-    return response.data;
+    return getAllPages<RecordWithDetails>('/records', params);
   },
   
   getById: async (id: number): Promise<RecordWithDetails> => {
@@ -173,7 +188,7 @@ export const recordApi = {
     return response.data;
   },
   
-  update: async (id: number, data: { content: string }): Promise<Record> => {
+  update: async (id: number, data: { content: string; lock_token?: number | null }): Promise<Record> => {
     const response = await api.put<Record>(`/records/${id}`, data);
     return response.data;
   },
@@ -182,12 +197,13 @@ export const recordApi = {
     await api.put(`/records/${id}/permissions`, null, { params: { is_editable: isEditable } });
   },
   
-  lock: async (id: number): Promise<void> => {
-    await api.post(`/records/${id}/lock`);
+  lock: async (id: number): Promise<{ fencing_token: number }> => {
+    const response = await api.post<{ fencing_token: number }>(`/records/${id}/lock`);
+    return response.data;
   },
   
-  unlock: async (id: number): Promise<void> => {
-    await api.delete(`/records/${id}/lock`);
+  unlock: async (id: number, lockToken?: number | null): Promise<void> => {
+    await api.delete(`/records/${id}/lock`, { params: { lock_token: lockToken ?? undefined } });
   },
   
   extendLock: async (id: number): Promise<void> => {
@@ -250,7 +266,7 @@ export const adminApi = {
     return response.data;
   },
 
-  bulkDeleteUsers: async (userIds: string[]): Promise<{ message: string }> => {
+  bulkDeleteUsers: async (userIds: string[]): Promise<{ message: string; deleted: number; errors: string[] }> => {
     const response = await api.post('/admin/users/bulk-delete', userIds);
     return response.data;
   },
@@ -273,6 +289,48 @@ export const adminApi = {
   },
 };
 
+// 임포트 작업 APIs (임포트 API는 202와 job_id를 바로 반환)
+export class JobWaitError extends Error {}
+
+const JOB_WAIT_MAX_MS = 30 * 60 * 1000;
+const JOB_WAIT_MAX_ERRORS = 5;
+
+export const jobApi = {
+  get: async (jobId: string): Promise<ImportJob> => {
+    const response = await api.get<ImportJob>(`/jobs/${jobId}`);
+    return response.data;
+  },
+
+  // 끝날 때까지 주기적으로 조회 (onProgress로 진행 상황 전달)
+  // 최대 maxWaitMs까지, 조회가 연속 JOB_WAIT_MAX_ERRORS번 실패하면 JobWaitError
+  waitFor: async (
+    jobId: string,
+    onProgress?: (job: ImportJob) => void,
+    intervalMs: number = 1000,
+    maxWaitMs: number = JOB_WAIT_MAX_MS
+  ): Promise<ImportJob> => {
+    const deadline = Date.now() + maxWaitMs;
+    let errors = 0;
+    while (Date.now() < deadline) {
+      try {
+        const job = await jobApi.get(jobId);
+        errors = 0;
+        onProgress?.(job);
+        if (job.status === 'succeeded' || job.status === 'failed') {
+          return job;
+        }
+      } catch (error) {
+        errors += 1;
+        if (errors >= JOB_WAIT_MAX_ERRORS) {
+          throw new JobWaitError(`작업(${jobId}) 상태를 조회할 수 없습니다. 잠시 후 목록을 새로고침해 결과를 확인하세요.`);
+        }
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+    throw new JobWaitError(`작업(${jobId})이 오래 걸리고 있습니다. 잠시 후 목록을 새로고침해 결과를 확인하세요.`);
+  },
+};
+
 // Teacher APIs
 export const teacherApi = {
   getMyAssignments: async (schoolYear: number = 2025): Promise<TeacherAssignment[]> => {
@@ -304,8 +362,7 @@ export const teacherApi = {
     subject_id?: number;
     record_type?: string;
   }): Promise<RecordWithDetails[]> => {
-    const response = await api.get<RecordWithDetails[]>('/teacher/accessible-records', { params });
-    return response.data;
+    return getAllPages<RecordWithDetails>('/teacher/accessible-records', params);
   },
 
   getActivitySubjects: async (): Promise<Subject[]> => {